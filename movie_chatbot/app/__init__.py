@@ -1,22 +1,26 @@
 """
-Initialize the application and load configuration.
+Movie chatbot application package.
+
+Importing the package is cheap: nothing is configured and the scraper and
+scheduler modules (requests, BeautifulSoup, APScheduler) are only imported
+when one of the names below is first used. Entry points call
+config.configure_logging() themselves.
 """
-from .config import LOGGING_CONFIG
-import logging.config
+import importlib
+
+_LAZY_EXPORTS = {
+    'get_mongo_client': '.database',
+    'scrape_imdb_movies': '.scraper',
+    'start_scheduler': '.scheduler',
+    'init_scheduler': '.scheduler',
+    'shutdown_scheduler': '.scheduler',
+    'run_scheduler': '.scheduler',
+}
 
-# Configure logging when the package is imported
-logging.config.dictConfig(LOGGING_CONFIG)
+__all__ = list(_LAZY_EXPORTS)
 
-# Import key modules to make them available when importing the package
-from .database import get_mongo_client
-from .scraper import scrape_imdb_movies
-from .scheduler import start_scheduler, init_scheduler, shutdown_scheduler, run_scheduler
 
-__all__ = [
-    'get_mongo_client',
-    'scrape_imdb_movies',
-    'start_scheduler',
-    'init_scheduler',
-    'shutdown_scheduler',
-    'run_scheduler',
-]
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
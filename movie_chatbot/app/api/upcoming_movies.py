@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Dict
-from app.database import get_db, get_mongo_client
+from typing import List, Dict, Optional
+from app.database import get_db
+from app.repository import get_movies_collection, get_upcoming_movie_list, get_upcoming_movies_page, run_in_db_executor
 from app.models import User
+from app.responses import FastJSONResponse
 from fastapi.templating import Jinja2Templates
-from app.scrapers.upcoming_movies_scraper import UpcomingMoviesScraper
 from app.auth import get_current_user
+from app.jobs import scrape_jobs, submit_upcoming_scrape
+from app.crud import upcoming_region
+from datetime import datetime
 import logging
 
 # Initialize templates
@@ -15,54 +19,65 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/scrape-upcoming-movies")
+def checked_region(region: Optional[str]) -> str:
+    """The requested calendar region; 400 unless it is configured."""
+    try:
+        return upcoming_region(region)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def release_date_key(value) -> str:
+    """Group key for a release date; dates are stored as BSON dates."""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+@router.post("/scrape-upcoming-movies", status_code=202)
 async def scrape_upcoming_movies(current_user: dict = Depends(get_current_user)):
-    """Scrape upcoming movies from IMDb and store them in MongoDB"""
+    """Queue a scrape of upcoming movies; poll /api/scrape-jobs/{job_id}"""
     try:
-        # Initialize scraper
-        scraper = UpcomingMoviesScraper()
-        
-        # Scrape and store movies
-        scraper.scrape_and_store_movies()
-        
-        return {"message": "Successfully scraped and stored upcoming movies"}
-        
+        return await run_in_db_executor(submit_upcoming_scrape)
     except Exception as e:
-        logger.error(f"Error scraping upcoming movies: {str(e)}")
+        logger.error(f"Error queueing upcoming movies scrape: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/api/scrape-jobs/{job_id}")
+async def get_scrape_job(job_id: str):
+    """Status and progress of a queued scrape"""
+    job = await run_in_db_executor(scrape_jobs.lookup, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return job
+
 @router.get("/upcoming-movies")
-async def upcoming_movies_list(request: Request, force_scrape: bool = False):
+async def upcoming_movies_list(request: Request, force_scrape: bool = False, region: Optional[str] = None):
     """Render the upcoming movies list page"""
+    region = checked_region(region)
     try:
         # Get MongoDB collection
-        _, _, movies_collection = get_mongo_client()
+        movies_collection = await get_movies_collection()
         if movies_collection is None:
             raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
 
-        # Force scrape if requested
+        # Queue a scrape if requested; the page renders from the current data
+        # and polls the job
+        scrape_job = None
         if force_scrape:
             logger.info("Force scrape requested")
-            scraper = UpcomingMoviesScraper()
-            scraper.scrape_and_store_movies(movies_collection)
-            time.sleep(2)  # Give some time for the scrape to complete
+            scrape_job = await run_in_db_executor(submit_upcoming_scrape)
 
         # Get upcoming movies
-        movies = list(movies_collection.find({"type": "upcoming"}))
-        logger.info(f"Found {len(movies)} upcoming movies in database")
+        movies = await get_upcoming_movie_list(region)
+        logger.debug(f"Found {len(movies)} upcoming movies in database")
 
         # Sort all movies by title
         movies.sort(key=lambda x: x.get("title", ""))
-        logger.info(f"Found {len(movies)} upcoming movies in database")
-        
-        # Log all movies being included
-        for movie in movies:
-            logger.info(f"Including movie: {movie.get('title')}")
         
         # Render template with all movies
         return templates.TemplateResponse("upcoming_movies.html", {
             "request": request,
-            "movies": movies
+            "movies": movies,
+            "scrape_job": scrape_job
         })
 
     except Exception as e:
@@ -70,38 +85,35 @@ async def upcoming_movies_list(request: Request, force_scrape: bool = False):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/upcoming-movies-graph")
-async def upcoming_movies_graph(request: Request, force_scrape: bool = False):
+async def upcoming_movies_graph(request: Request, force_scrape: bool = False, region: Optional[str] = None):
     """Render the upcoming movies graph page"""
+    region = checked_region(region)
     try:
         # Get MongoDB collection
-        _, _, movies_collection = get_mongo_client()
+        movies_collection = await get_movies_collection()
         if movies_collection is None:
             raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
 
-        # Force scrape if requested
+        # Queue a scrape if requested; the page renders from the current data
+        # and polls the job
+        scrape_job = None
         if force_scrape:
             logger.info("Force scrape requested")
-            scraper = UpcomingMoviesScraper()
-            scraper.scrape_and_store_movies(movies_collection)
-            time.sleep(2)  # Give some time for the scrape to complete
+            scrape_job = await run_in_db_executor(submit_upcoming_scrape)
 
         # Get upcoming movies
-        movies = list(movies_collection.find({"type": "upcoming"}))
-        logger.info(f"Found {len(movies)} upcoming movies in database")
+        movies = await get_upcoming_movie_list(region)
+        logger.debug(f"Found {len(movies)} upcoming movies in database")
 
         # Sort all movies by title
         movies.sort(key=lambda x: x.get("title", ""))
-        logger.info(f"Found {len(movies)} upcoming movies in database")
-        
-        # Log all movies being included
-        for movie in movies:
-            logger.info(f"Including movie: {movie.get('title')}")
         
         # Prepare data for the graph template
         movies_by_date = {}
         for movie in movies:
             release_date = movie.get("release_date")
             if release_date:
+                release_date = release_date_key(release_date)
                 if release_date not in movies_by_date:
                     movies_by_date[release_date] = 0
                 movies_by_date[release_date] += 1
@@ -117,9 +129,8 @@ async def upcoming_movies_graph(request: Request, force_scrape: bool = False):
         
         for date in sorted_dates:
             try:
-                month, year = date.split()[:2]
-                formatted_date = f"{month} {year}"
-            except:
+                formatted_date = datetime.strptime(date, '%Y-%m-%d').strftime('%b %d, %Y')
+            except ValueError:
                 formatted_date = date
             
             formatted_data["dates"].append(formatted_date)
@@ -137,63 +148,40 @@ async def upcoming_movies_graph(request: Request, force_scrape: bool = False):
             "request": request,
             "movies": movies,
             "movies_by_date": formatted_data,
-            "debug_info": debug_info
+            "debug_info": debug_info,
+            "scrape_job": scrape_job
         })
 
     except Exception as e:
         logger.error(f"Error getting upcoming movies: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/api/upcoming-movies")
-async def get_upcoming_movies(force_scrape: bool = False):
-    """Get upcoming movies data. If force_scrape is True, will scrape fresh data."""
+@router.get("/api/upcoming-movies", response_class=FastJSONResponse)
+async def get_upcoming_movies(
+    force_scrape: bool = False,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    region: Optional[str] = Query(None, description="Calendar region, e.g. US; the first configured by default")
+):
+    """Get one page of upcoming movies grouped by release date. If force_scrape is True, also queues a scrape."""
+    # Only configured regions get this far, so an empty page means a scrape is due
+    region = checked_region(region)
     try:
-        # Get MongoDB collection
-        _, _, movies_collection = get_mongo_client()
-        if movies_collection is None:
+        page = await get_upcoming_movies_page(cursor, limit, region)
+        if page is None:
             raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
             
-        # If force_scrape is true or no movies exist, trigger a scrape
-        if force_scrape or not list(movies_collection.find({'type': 'upcoming'}).limit(1)):
-            scraper = UpcomingMoviesScraper()
-            scraper.scrape_and_store_movies(movies_collection)
-            
-            # Wait a moment for the scraping to complete
-            import time
-            time.sleep(1)
-            
-            # Check if movies were actually stored
-            movies = list(movies_collection.find({'type': 'upcoming'}))
-            if not movies:
-                logger.error("No movies found after scraping")
-                raise HTTPException(status_code=500, detail="Failed to scrape movies")
-        else:
-            # Get all upcoming movies
-            movies = list(movies_collection.find({'type': 'upcoming'}))
-            
-        # Group movies by release date
-        movies_by_date = {}
-        for movie in movies:
-            release_date = movie.get("release_date")
-            if release_date:
-                if release_date not in movies_by_date:
-                    movies_by_date[release_date] = []
-                movies_by_date[release_date].append(movie)
-        
-        # Sort movies within each date group by title
-        for date_group in movies_by_date.values():
-            date_group.sort(key=lambda x: x.get("title", ""))
-        
-        # Sort date groups by date
-        sorted_movies_by_date = dict(sorted(movies_by_date.items()))
-        
-        # Convert ObjectId to string for JSON response
-        for date_group in sorted_movies_by_date.values():
-            for movie in date_group:
-                movie["_id"] = str(movie["_id"])
+        # If force_scrape is true or no movies exist, queue a scrape and answer
+        # from the current data; clients poll the returned job
+        if force_scrape or (not cursor and not page["movies_by_date"]):
+            page["scrape_job"] = await run_in_db_executor(submit_upcoming_scrape)
         
-        return {"movies_by_date": sorted_movies_by_date}
+        return FastJSONResponse(page)
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting upcoming movies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
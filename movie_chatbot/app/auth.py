@@ -1,3 +1,5 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
@@ -6,6 +8,8 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from . import models, schemas
+from .cache import MISSING, TTLCache
+from .config import AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS
 from .database import get_db
 
 # Security settings
@@ -16,6 +20,18 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Verified token hash -> (user principal, token expiry). Saves the JWT decode
+# and the user query on repeat requests; cleared by invalidate_auth_cache().
+auth_cache = TTLCache('auth_principals', AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS, movie_data=False)
+
+def _token_key(token: str) -> str:
+    # Never keep raw bearer tokens in memory longer than the request
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def invalidate_auth_cache() -> None:
+    """Forget every cached principal, e.g. after a user's status changes."""
+    auth_cache.clear()
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -46,6 +62,13 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    key = _token_key(token)
+    cached = auth_cache.get(key)
+    if cached is not MISSING:
+        principal, expires_at = cached
+        if expires_at is None or expires_at > time.time():
+            return principal
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -57,14 +80,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = db.query(models.User).filter(models.User.username == username).first()
     if user is None:
         raise credentials_exception
-    return user
+    
+    # A detached snapshot, so it can outlive this request's session
+    principal = schemas.User.model_validate(user)
+    auth_cache.set(key, (principal, payload.get("exp")))
+    return principal
 
-def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+def get_current_active_user(current_user: schemas.User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_admin_user(current_user: models.User = Depends(get_current_active_user)):
+def get_admin_user(current_user: schemas.User = Depends(get_current_active_user)):
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,192 @@
+"""
+In-process result caches for data that only changes when a scrape runs.
+
+TTLCache is a size-bounded LRU whose entries also expire after a TTL. Caches
+register themselves by name so their hit rates can be reported together and
+so a finished scrape can drop everything derived from the movie collection
+with one invalidate_movie_caches() call.
+
+Scrapes usually run in another process (the scheduler service, or whichever
+worker holds a job's lease), so invalidate_movie_caches() also bumps a scrape
+generation in MongoDB's `schema_meta`. Movie caches compare it with the one
+they last saw, at most every CACHE_GENERATION_CHECK_SECONDS, and clear
+themselves when it has moved.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List
+
+from .config import CACHE_GENERATION_CHECK_SECONDS
+from .title_index import invalidate_title_index
+
+logger = logging.getLogger(__name__)
+
+# Returned by TTLCache.get() on a miss, so None can be cached
+MISSING = object()
+
+_registry: Dict[str, "TTLCache"] = {}
+_registry_lock = threading.Lock()
+
+GENERATION_META_ID = 'scrape_generation'
+_generation_lock = threading.Lock()
+_seen_generation = None
+_next_generation_check = 0.0
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters.
+
+    Caches created with `movie_data=True` are cleared by
+    invalidate_movie_caches() when a scrape finishes writing.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl_seconds: float, movie_data: bool = True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.movie_data = movie_data
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value, or MISSING if absent or expired."""
+        if self.movie_data:
+            check_scrape_generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered cache, keyed by cache name."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def _meta_collection():
+    from .database import get_mongo_client
+    _, mongo_db, _ = get_mongo_client()
+    return mongo_db['schema_meta'] if mongo_db is not None else None
+
+
+def _clear_movie_caches() -> List[str]:
+    invalidate_title_index()
+    with _registry_lock:
+        caches = [cache for cache in _registry.values() if cache.movie_data]
+    for cache in caches:
+        cache.clear()
+    return [cache.name for cache in caches]
+
+
+def invalidate_movie_caches() -> None:
+    """Drop every cache derived from the movie collection, in every process.
+
+    Called by the scrapers once they have finished writing. Caches in this
+    process are cleared now; other processes notice the new scrape
+    generation on their next check.
+    """
+    global _seen_generation
+    from pymongo import ReturnDocument
+
+    try:
+        meta = _meta_collection()
+        if meta is not None:
+            doc = meta.find_one_and_update(
+                {'_id': GENERATION_META_ID},
+                {'$inc': {'generation': 1}, '$set': {'updated_at': datetime.utcnow()}},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+            with _generation_lock:
+                _seen_generation = doc['generation']
+    except Exception as e:
+        logger.warning(f"Could not publish the scrape generation: {str(e)}")
+    names = _clear_movie_caches()
+    logger.info(f"Invalidated movie caches: {', '.join(names) or 'none'}")
+
+
+def check_scrape_generation() -> bool:
+    """Clear movie caches if a scrape finished in any process since the last check.
+
+    Reads MongoDB at most once per CACHE_GENERATION_CHECK_SECONDS per
+    process; callers arriving while a check is running do not wait for it.
+    """
+    global _seen_generation, _next_generation_check
+    now = time.monotonic()
+    if now < _next_generation_check or not _generation_lock.acquire(blocking=False):
+        return False
+    try:
+        if now < _next_generation_check:
+            return False
+        _next_generation_check = now + CACHE_GENERATION_CHECK_SECONDS
+        meta = _meta_collection()
+        if meta is None:
+            return False
+        generation = (meta.find_one({'_id': GENERATION_META_ID}, {'generation': 1}) or {}).get('generation', 0)
+        # The first check only records where this process starts from
+        changed = _seen_generation is not None and generation != _seen_generation
+        _seen_generation = generation
+    except Exception as e:
+        logger.warning(f"Could not read the scrape generation: {str(e)}")
+        return False
+    finally:
+        _generation_lock.release()
+
+    if changed:
+        names = _clear_movie_caches()
+        logger.info(f"Scrape generation {generation} finished elsewhere, invalidated: {', '.join(names) or 'none'}")
+    return changed
@@ -16,11 +16,85 @@ is_docker = os.getenv('DOCKER', 'false').lower() == 'true'
 MONGODB_HOST = 'mongo' if is_docker else 'localhost'
 MONGODB_URL = os.getenv('MONGODB_URL', f'mongodb://{MONGODB_HOST}:27017/')
 MONGODB_DB = os.getenv('MONGODB_DB', 'movie_chatbot')
+MONGO_EXECUTOR_WORKERS = int(os.getenv('MONGO_EXECUTOR_WORKERS', '16'))  # Max blocking queries in flight per worker
+MONGO_BULK_BATCH_SIZE = int(os.getenv('MONGO_BULK_BATCH_SIZE', '200'))  # Upserts per bulk_write
+INDEX_BUILD_LEASE_SECONDS = int(os.getenv('INDEX_BUILD_LEASE_SECONDS', '1800'))  # One process builds indexes at a time
+SCRAPE_JOB_LEASE_SECONDS = int(os.getenv('SCRAPE_JOB_LEASE_SECONDS', '900'))  # One process runs an on-demand upcoming scrape at a time
 
 # IMDB Scraper Settings
+IMDB_BASE_URL = os.getenv('IMDB_BASE_URL', 'https://www.imdb.com').rstrip('/')  # Point at a fixture server for testing
 IMDB_TOP_MOVIES_URL = os.getenv('IMDB_TOP_MOVIES_URL', 'https://www.imdb.com/chart/top/')
 SCRAPER_USER_AGENT = os.getenv('SCRAPER_USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36')
 
+# Scraper Fetch Pipeline
+SCRAPER_RATE_PER_SECOND = float(os.getenv('SCRAPER_RATE_PER_SECOND', '2'))  # Token bucket refill rate, 0 disables
+SCRAPER_BURST = int(os.getenv('SCRAPER_BURST', '4'))  # Token bucket capacity
+SCRAPER_MAX_WORKERS = int(os.getenv('SCRAPER_MAX_WORKERS', '8'))  # Concurrent fetch threads
+SCRAPER_MAX_PER_HOST = int(os.getenv('SCRAPER_MAX_PER_HOST', '4'))  # Concurrent connections per host
+SCRAPER_PARSE_WORKERS = int(os.getenv('SCRAPER_PARSE_WORKERS', '2'))  # Parse processes, 0 parses on one thread
+SCRAPER_REQUEST_TIMEOUT = float(os.getenv('SCRAPER_REQUEST_TIMEOUT', '30'))  # Seconds
+SCRAPER_MAX_RETRIES = int(os.getenv('SCRAPER_MAX_RETRIES', '3'))
+HTML_PARSER = os.getenv('HTML_PARSER', 'auto')  # BeautifulSoup tree builder; auto prefers lxml when installed
+SCRAPER_DIAGNOSTICS = os.getenv('SCRAPER_DIAGNOSTICS', 'false').lower() in ('true', '1', 't')  # Dump calendar HTML at DEBUG while parsing
+
+# Upcoming Calendar
+# Every region/content type pair is one calendar page, fetched concurrently
+UPCOMING_REGIONS = [region.strip().upper() for region in os.getenv('UPCOMING_REGIONS', 'US').split(',') if region.strip()]  # The first is the default shown
+UPCOMING_CONTENT_TYPES = [kind.strip().upper() for kind in os.getenv('UPCOMING_CONTENT_TYPES', 'MOVIE').split(',') if kind.strip()]  # MOVIE, TV, TV_EPISODE
+
+# Scheduler
+# Every process that starts the scheduler shares one MongoDB job store; a
+# lease makes sure only one of them runs each scheduled job
+RUN_SCHEDULER = os.getenv('RUN_SCHEDULER', 'True').lower() in ('true', '1', 't')  # Start the scheduler in web workers too
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv('SCHEDULER_MISFIRE_GRACE_SECONDS', '3600'))  # Late runs within this still fire, once
+SCHEDULER_JOB_LEASE_SECONDS = int(os.getenv('SCHEDULER_JOB_LEASE_SECONDS', '14400'))  # Longest a scheduled run may hold its lock
+
+# Scraper Freshness Policy
+# Detail pages refreshed within their chart's TTL are not fetched again; chart
+# pages are always fetched. Override per chart with e.g. "popular=6,top_250=336".
+CHART_REFRESH_TTL_HOURS = {
+    'top_250': 168,  # The top 250 barely moves, weekly is plenty
+    'popular': 12,
+    'trending': 6,
+    'action': 72,
+    'comedy': 72,
+    'horror': 72,
+}
+CHART_REFRESH_TTL_HOURS.update({
+    chart.strip(): float(hours)
+    for chart, hours in (
+        item.split('=', 1) for item in os.getenv('CHART_REFRESH_TTL_HOURS', '').split(',') if '=' in item
+    )
+})
+CHART_REFRESH_DEFAULT_TTL_HOURS = float(os.getenv('CHART_REFRESH_DEFAULT_TTL_HOURS', '24'))  # Charts not listed above
+
+# Scraper HTTP Cache
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'True').lower() in ('true', '1', 't')
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', str(Path(__file__).resolve().parent.parent / '.cache' / 'http_cache.sqlite3'))  # Shared by the app, scheduler and CLIs wherever they start
+HTTP_CACHE_MAX_MB = int(os.getenv('HTTP_CACHE_MAX_MB', '256'))  # Compressed bodies, LRU-evicted beyond this
+
+# Chat Title Index Settings
+TITLE_INDEX_TTL_SECONDS = int(os.getenv('TITLE_INDEX_TTL_SECONDS', '600'))  # Rebuild at least every 10 minutes
+TITLE_INDEX_MAX_CANDIDATES = int(os.getenv('TITLE_INDEX_MAX_CANDIDATES', '50'))  # Titles scored per lookup
+
+# Response Caches
+CHAT_CACHE_TTL_SECONDS = int(os.getenv('CHAT_CACHE_TTL_SECONDS', '900'))  # Also cleared after every scrape
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '256'))  # LRU-evicted beyond this
+GRAPH_CACHE_TTL_SECONDS = int(os.getenv('GRAPH_CACHE_TTL_SECONDS', '3600'))  # /api/movie/graph, also cleared after every scrape
+AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS', '60'))  # Verified token -> user, 0 disables; cleared when a user's status changes
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '1024'))  # LRU-evicted beyond this
+CACHE_GENERATION_CHECK_SECONDS = float(os.getenv('CACHE_GENERATION_CHECK_SECONDS', '15'))  # How often a process looks for scrapes finished elsewhere
+
+# CSV Exports
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '500'))  # Documents per cursor batch, and rows per streamed chunk
+
+# Report Jobs
+REPORTS_DIR = os.getenv('REPORTS_DIR', str(Path(__file__).resolve().parent.parent / 'reports'))  # Outside /static; served by the admin report routes
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '1'))  # Render processes, 0 renders on a thread
+REPORT_CACHE_TTL_SECONDS = int(os.getenv('REPORT_CACHE_TTL_SECONDS', '3600'))  # Identical filters reuse artifacts; also cleared after every scrape
+REPORT_DIR_MAX_MB = int(os.getenv('REPORT_DIR_MAX_MB', '100'))  # Oldest artifacts evicted beyond this
+REPORT_MAX_AGE_HOURS = float(os.getenv('REPORT_MAX_AGE_HOURS', '72'))  # Artifacts older than this are evicted
+
 # Application Settings
 DEBUG = os.getenv('DEBUG', 'False').lower() in ('true', '1', 't')
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
@@ -54,3 +128,16 @@ LOGGING_CONFIG = {
         },
     }
 }
+
+
+_logging_configured = False
+
+
+def configure_logging() -> None:
+    """Apply LOGGING_CONFIG once per process; entry points call this."""
+    global _logging_configured
+    if _logging_configured:
+        return
+    import logging.config
+    logging.config.dictConfig(LOGGING_CONFIG)
+    _logging_configured = True
@@ -1,12 +1,26 @@
+from bson import ObjectId
 from sqlalchemy.orm import Session
-from . import models, schemas
-from .database import movies_collection
-from datetime import datetime
+from . import auth, models, schemas
+from .database import get_mongo_client
+from .cache import TTLCache, MISSING
+from .export import PUBLIC_REPORT_COLUMNS, REPORT_COLUMNS, iter_csv, projection, report_query, stream_movies_csv
+from .normalize import genre_prefix_query, genre_query
+from .config import GRAPH_CACHE_TTL_SECONDS, REPORTS_DIR, REPORT_DIR_MAX_MB, REPORT_MAX_AGE_HOURS, UPCOMING_REGIONS
+from datetime import datetime, timedelta
 from typing import List
-import pandas as pd
-import matplotlib.pyplot as plt
+import base64
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+# Graph counts and per-year pages, cleared after every scrape
+graph_cache = TTLCache('movie_graph', 128, GRAPH_CACHE_TTL_SECONDS)
+
+def _movies_collection():
+    _, _, movies_collection = get_mongo_client()
+    return movies_collection
+
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
@@ -27,22 +41,28 @@ def create_user(db: Session, user: schemas.UserCreate):
 def update_user_status(db: Session, user_id: int, is_active: bool):
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
+        changed = db_user.is_active != is_active
         db_user.is_active = is_active
         db.commit()
         db.refresh(db_user)
+        if changed:
+            # Cached principals still carry the old status
+            auth.invalidate_auth_cache()
         return db_user
     return None
 
 def get_movie(movie_id: str):
-    return movies_collection.find_one({"_id": movie_id})
+    return _movies_collection().find_one({"_id": movie_id})
 
 def get_movies(skip: int = 0, limit: int = 100):
-    return list(movies_collection.find().skip(skip).limit(limit))
+    return list(_movies_collection().find().sort("_id", 1).skip(skip).limit(limit))
+
+def text_query(text: str, phrase: bool = False) -> dict:
+    """Full-text search, or an exact phrase match with `phrase`."""
+    return {"$text": {"$search": f"\"{text}\"" if phrase else text}}
 
 def search_movies(query: str, limit: int = 10):
-    return list(movies_collection.find({
-        "$text": {"$search": query}
-    }, {
+    return list(_movies_collection().find(text_query(query), {
         "score": {"$meta": "textScore"}
     }).sort([("score", {"$meta": "textScore"})]).limit(limit))
 
@@ -52,20 +72,12 @@ def get_latest_movies(limit: int = 10, genre: str = None):
     If genre is specified but not found, returns top-rated movies.
     """
     try:
+        movies_collection = _movies_collection()
+
         # First, try to find movies matching the genre if specified
         if genre:
-            # Try exact match in genres array first
-            genre_query = {
-                "genres": {
-                    "$elemMatch": {
-                        "$regex": f"^{genre}$",
-                        "$options": "i"
-                    }
-                }
-            }
-            
-            # Try to find movies with the specified genre
-            genre_movies = list(movies_collection.find(genre_query)
+            # Try exact match on the stored genre keys first
+            genre_movies = list(movies_collection.find(genre_query(genre))
                                   .sort("rating", -1)
                                   .limit(limit))
             
@@ -75,33 +87,21 @@ def get_latest_movies(limit: int = 10, genre: str = None):
             
             # If no movies found with exact genre match, try text search
             try:
-                text_search_query = {
-                    "$text": {
-                        "$search": f"\"{genre}\""  # Exact phrase match
-                    }
-                }
-                
-                text_movies = list(movies_collection.find(text_search_query)
+                text_movies = list(movies_collection.find(text_query(genre, phrase=True))
                                      .sort("rating", -1)
                                      .limit(limit))
                 
                 if text_movies:
                     return text_movies
-            except Exception as e:
-                # If text search fails (e.g., no text index), try regex search on title and plot
-                regex_query = {
-                    "$or": [
-                        {"title": {"$regex": genre, "$options": "i"}},
-                        {"plot": {"$regex": genre, "$options": "i"}}
-                    ]
-                }
+            except Exception:
+                # If text search fails (e.g., no text index), try a prefix
+                # match on the genre keys, which stays on the genre index
+                prefix_movies = list(movies_collection.find(genre_prefix_query(genre))
+                                       .sort("rating", -1)
+                                       .limit(limit))
                 
-                regex_movies = list(movies_collection.find(regex_query)
-                                      .sort("rating", -1)
-                                      .limit(limit))
-                
-                if regex_movies:
-                    return regex_movies
+                if prefix_movies:
+                    return prefix_movies
         
         # If no genre specified or no matches found, return top-rated movies
         return list(movies_collection.find()
@@ -113,129 +113,371 @@ def get_latest_movies(limit: int = 10, genre: str = None):
         # Return empty list to prevent crashing, will be handled by the caller
         return []
 
+def one_copy_per_title() -> dict:
+    """Charted titles plus the default region's upcoming entries.
+
+    Upcoming movies are stored once per calendar region; counts and lists
+    across all movies only look at one of those copies.
+    """
+    return {"region": {"$in": [None, UPCOMING_REGIONS[0]]}}
+
+def upcoming_release_query() -> dict:
+    """Movies releasing from tomorrow on, one copy per title."""
+    tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    return {"release_date": {"$gte": tomorrow}, **one_copy_per_title()}
+
 def get_upcoming_movies(limit: int = 10):
-    today = datetime.now().date()
-    return list(movies_collection.find({
-        "release_date": {"$gt": today.isoformat()}
-    }).sort("release_date", 1).limit(limit))
+    return list(_movies_collection().find(upcoming_release_query()).sort("release_date", 1).limit(limit))
+
+def upcoming_region(region: str = None) -> str:
+    """A configured calendar region, the first by default; ValueError otherwise."""
+    if region is None:
+        return UPCOMING_REGIONS[0]
+    if region.upper() not in UPCOMING_REGIONS:
+        raise ValueError(f"Unknown region {region}; expected one of {', '.join(UPCOMING_REGIONS)}")
+    return region.upper()
+
+def upcoming_query(region: str = None) -> dict:
+    """Upcoming movies of one calendar region, the first configured by default."""
+    return {"type": "upcoming", "region": upcoming_region(region)}
 
-def generate_movie_report(start_date=None, end_date=None, min_rating=None):
+def get_upcoming_movie_list(region: str = None):
+    """All documents written by the upcoming movies scraper for a region."""
+    movies_collection = _movies_collection()
+    if movies_collection is None:
+        return None
+    return list(movies_collection.find(upcoming_query(region)))
+
+# Fields the upcoming calendar API sends; everything else stays in MongoDB
+UPCOMING_FIELDS = {"title": 1, "year": 1, "url": 1, "release_date": 1}
+
+def encode_upcoming_cursor(release_date: datetime, movie_id) -> str:
+    return base64.urlsafe_b64encode(f"{release_date.isoformat()}|{movie_id}".encode()).decode()
+
+def decode_upcoming_cursor(cursor: str):
+    """(release_date, ObjectId) from a cursor; ValueError if it is malformed."""
     try:
-        # Build query based on filters
-        query = {}
-        if start_date:
-            query["release_date"] = {"$gte": start_date.isoformat()}
-        if end_date:
-            if "release_date" in query:
-                query["release_date"]["$lte"] = end_date.isoformat()
-            else:
-                query["release_date"] = {"$lte": end_date.isoformat()}
-        if min_rating is not None:
-            query["rating"] = {"$gte": min_rating}
-        
-        # Get movies from database
-        movies = list(movies_collection.find(query).sort("release_date", -1))
-        
-        if not movies:
-            return None
-        
-        # Convert to DataFrame for analysis
-        df = pd.DataFrame(movies)
+        release_date, movie_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(release_date), ObjectId(movie_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def upcoming_page_pipeline(limit: int, region: str = None, after=None) -> list:
+    """Aggregation for get_upcoming_movies_page; `after` is a decoded cursor."""
+    query = {**upcoming_query(region), "release_date": {"$type": "date"}}
+    if after:
+        after_date, after_id = after
+        query["$or"] = [
+            {"release_date": {"$gt": after_date}},
+            {"release_date": after_date, "_id": {"$gt": after_id}},
+        ]
+    
+    return [
+        {"$match": query},
+        {"$sort": {"release_date": 1, "_id": 1}},
+        {"$limit": limit + 1},  # one extra tells us whether there is a next page
+        {"$project": UPCOMING_FIELDS},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$release_date"}},
+            "movies": {"$push": "$$ROOT"}
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+def get_upcoming_movies_page(cursor: str = None, limit: int = 50, region: str = None):
+    """One page of the upcoming calendar, grouped by release date.
+
+    Keyset-paginated on (release_date, _id), so every page costs the same
+    however far into the calendar it is. Returns {movies_by_date,
+    next_cursor}; a date can continue on the next page. None if MongoDB is
+    unavailable.
+    """
+    after = decode_upcoming_cursor(cursor) if cursor else None
+    movies_collection = _movies_collection()
+    if movies_collection is None:
+        return None
+    
+    groups = list(movies_collection.aggregate(upcoming_page_pipeline(limit, region, after)))
+    
+    has_more = sum(len(group["movies"]) for group in groups) > limit
+    if has_more:
+        groups[-1]["movies"].pop()
+        if not groups[-1]["movies"]:
+            groups.pop()
+    
+    next_cursor = None
+    if has_more and groups:
+        last = groups[-1]["movies"][-1]
+        next_cursor = encode_upcoming_cursor(last["release_date"], last["_id"])
+    
+    movies_by_date = {}
+    for group in groups:
+        for movie in group["movies"]:
+            movie["_id"] = str(movie["_id"])
+        movies_by_date[group["_id"]] = sorted(group["movies"], key=lambda movie: movie.get("title", ""))
+    return {"movies_by_date": movies_by_date, "next_cursor": next_cursor}
+
+def graph_years() -> List[int]:
+    """Years shown on the graph page: the current and next year."""
+    current_year = datetime.now().year
+    return [current_year, current_year + 1]
+
+def graph_query(years: List[int]) -> dict:
+    """Movies releasing in `years`, one copy per title."""
+    # Documents not yet migrated to int years still store them as strings
+    return {"year": {"$in": years + [str(year) for year in years]}, **one_copy_per_title()}
+
+def graph_counts_pipeline(years: List[int]) -> list:
+    return [
+        {"$match": graph_query(years)},
+        {"$group": {"_id": "$year", "count": {"$sum": 1}}}
+    ]
+
+def get_movie_graph_data():
+    """
+    Movie release counts per year for the current and next year.
+    Returns None if MongoDB is unavailable.
+    """
+    years = graph_years()
+    cached = graph_cache.get(('counts', tuple(years)))
+    if cached is not MISSING:
+        return cached
+
+    movies_collection = _movies_collection()
+    if movies_collection is None:
+        return None
+
+    # Count on the server; only one row per year comes back
+    counts = {}
+    for row in movies_collection.aggregate(graph_counts_pipeline(years)):
+        year = int(row["_id"])
+        counts[year] = counts.get(year, 0) + row["count"]
+
+    chart_data = {
+        "labels": sorted(counts),
+        "data": [counts[year] for year in sorted(counts)],
+    }
+    graph_cache.set(('counts', tuple(years)), chart_data)
+    return chart_data
+
+GRAPH_YEAR_FIELDS = {"_id": 0, "title": 1, "year": 1, "genres": 1}
+
+def get_movie_graph_year(year: int, skip: int = 0, limit: int = 30):
+    """
+    One page of the movies releasing in `year`, for the graph page.
+    Returns None if MongoDB is unavailable.
+    """
+    key = ('year', year, skip, limit)
+    cached = graph_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    movies_collection = _movies_collection()
+    if movies_collection is None:
+        return None
+
+    query = graph_query([year])
+    movies = list(
+        movies_collection.find(query, GRAPH_YEAR_FIELDS)
+        .sort("title", 1)
+        .skip(skip)
+        .limit(limit)
+    )
+    page = {
+        "year": year,
+        "total": movies_collection.count_documents(query),
+        "skip": skip,
+        "limit": limit,
+        "movies": [
+            {"title": movie.get("title", ""), "year": movie.get("year"), "genres": movie.get("genres", [])}
+            for movie in movies
+        ],
+    }
+    graph_cache.set(key, page)
+    return page
+
+def export_movies_csv(query, columns=REPORT_COLUMNS, sort=None, limit: int = 0, compress: bool = False):
+    """CSV byte chunks for the movies matching `query`, read lazily from a cursor.
+
+    None if MongoDB is unavailable, [] if nothing matches.
+    """
+    movies_collection = _movies_collection()
+    if movies_collection is None:
+        return None
+    if movies_collection.find_one(query, {"_id": 1}) is None:
+        return []
+    return stream_movies_csv(movies_collection, query, columns, sort, limit, compress)
+
+def public_report_query(start_date=None, end_date=None, min_rating=None) -> dict:
+    query = report_query(start_date, end_date, min_rating)
+    query.setdefault("year", {"$ne": None})
+    return query
+
+def export_public_report(start_date=None, end_date=None, min_rating=None, limit: int = 20, compress: bool = False):
+    """Latest movies by year for the public CSV report."""
+    query = public_report_query(start_date, end_date, min_rating)
+    return export_movies_csv(query, PUBLIC_REPORT_COLUMNS, [("year", -1)], limit, compress)
+
+def export_admin_report(start_date=None, end_date=None, min_rating=None, compress: bool = False):
+    """Every movie matching the report filters, newest release first."""
+    query = report_query(start_date, end_date, min_rating)
+    return export_movies_csv(query, REPORT_COLUMNS, [("release_date", -1)], compress=compress)
+
+# Rating histogram bins: [0, 1), [1, 2) ... [9, 10]
+RATING_BOUNDARIES = list(range(10)) + [10.01]
+
+def report_analytics_pipeline(start_date=None, end_date=None, min_rating=None) -> list:
+    query = report_query(start_date, end_date, min_rating)
+    query.setdefault("release_date", {})["$type"] = "date"
+    return [
+        {"$match": query},
+        {"$facet": {
+            "monthly": [
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m", "date": "$release_date"}},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id": 1}}
+            ],
+            "ratings": [
+                {"$match": {"rating": {"$type": "number"}}},
+                {"$bucket": {
+                    "groupBy": "$rating",
+                    "boundaries": RATING_BOUNDARIES,
+                    "default": "other",
+                    "output": {"count": {"$sum": 1}}
+                }}
+            ],
+            "summary": [
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "average_rating": {"$avg": "$rating"},
+                    "first": {"$min": "$release_date"},
+                    "last": {"$max": "$release_date"}
+                }}
+            ],
+        }}
+    ]
+
+def report_analytics(start_date=None, end_date=None, min_rating=None):
+    """Monthly release counts and rating histogram for the report filters.
+
+    Computed by one aggregation and returned as chart-ready label/data
+    series. None if MongoDB is unavailable or no dated movie matches.
+    """
+    movies_collection = _movies_collection()
+    if movies_collection is None:
+        return None
+    
+    facets = next(movies_collection.aggregate(report_analytics_pipeline(start_date, end_date, min_rating)), None)
+    if not facets or not facets["summary"] or not facets["summary"][0]["count"]:
+        return None
+    
+    summary = facets["summary"][0]
+    rating_counts = {bucket["_id"]: bucket["count"] for bucket in facets["ratings"]}
+    return {
+        "movie_count": summary["count"],
+        "date_range": {
+            "start": summary["first"].strftime('%Y-%m-%d'),
+            "end": summary["last"].strftime('%Y-%m-%d')
+        },
+        "average_rating": round(summary["average_rating"], 2) if summary["average_rating"] is not None else None,
+        "monthly": {
+            "labels": [bucket["_id"] for bucket in facets["monthly"]],
+            "data": [bucket["count"] for bucket in facets["monthly"]]
+        },
+        "ratings": {
+            "labels": [f"{low}-{low + 1}" for low in RATING_BOUNDARIES[:-1]],
+            "data": [rating_counts.get(low, 0) for low in RATING_BOUNDARIES[:-1]]
+        },
+    }
+
+def render_report_plot(analytics, plot_path: str) -> str:
+    """Draw the report series to a PNG. matplotlib is only imported here."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    
+    fig, (monthly_ax, ratings_ax) = plt.subplots(2, 1, figsize=(14, 8))
+    try:
+        monthly_ax.bar(analytics["monthly"]["labels"], analytics["monthly"]["data"], color='skyblue')
+        monthly_ax.set_title('Movies Released by Month')
+        monthly_ax.set_xlabel('Month')
+        monthly_ax.set_ylabel('Number of Movies')
+        monthly_ax.tick_params(axis='x', rotation=45)
         
-        # Clean and convert data
-        df['release_date'] = pd.to_datetime(df['release_date'], errors='coerce')
-        df = df.dropna(subset=['release_date'])
+        ratings_ax.bar(analytics["ratings"]["labels"], analytics["ratings"]["data"], color='lightgreen')
+        ratings_ax.set_title('Rating Distribution')
+        ratings_ax.set_xlabel('Rating')
+        ratings_ax.set_ylabel('Count')
         
-        if df.empty:
+        fig.tight_layout()
+        fig.savefig(plot_path, dpi=100, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return plot_path
+
+def generate_movie_report(start_date=None, end_date=None, min_rating=None, basename=None, plot: bool = False):
+    """Write the report CSV (and, with `plot`, a PNG) into REPORTS_DIR.
+
+    Files are named `<basename>.csv`/`.png`, by default a timestamped name.
+    Returns report_analytics() plus the file paths, or None if nothing matches.
+    """
+    try:
+        analytics = report_analytics(start_date, end_date, min_rating)
+        if not analytics:
             return None
         
         # Create directory for reports if it doesn't exist
-        os.makedirs("static/reports", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        basename = basename or f"movie_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        # Generate plot
-        plt.figure(figsize=(14, 8))
+        plot_path = None
+        if plot:
+            plot_path = render_report_plot(analytics, os.path.join(REPORTS_DIR, f"{basename}.png"))
         
-        # Plot 1: Movies by Month
-        plt.subplot(2, 1, 1)
-        monthly_data = df.groupby(df['release_date'].dt.to_period('M')).size()
-        monthly_data.plot(kind='bar', color='skyblue', ax=plt.gca())
-        plt.title('Movies Released by Month')
-        plt.xlabel('Month')
-        plt.ylabel('Number of Movies')
-        plt.xticks(rotation=45)
+        # Stream the CSV to disk straight from a cursor
+        csv_path = os.path.join(REPORTS_DIR, f"{basename}.csv")
+        query = report_query(start_date, end_date, min_rating)
+        cursor = _movies_collection().find(query, projection(REPORT_COLUMNS)).sort("release_date", -1)
+        with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            for chunk in iter_csv(cursor, REPORT_COLUMNS):
+                csv_file.write(chunk)
         
-        # Plot 2: Rating Distribution
-        plt.subplot(2, 1, 2)
-        if 'rating' in df.columns:
-            try:
-                df['rating_num'] = pd.to_numeric(df['rating'], errors='coerce')
-                df = df.dropna(subset=['rating_num'])
-                if not df.empty:
-                    df['rating_num'].plot(kind='hist', bins=10, color='lightgreen', ax=plt.gca())
-                    plt.title('Rating Distribution')
-                    plt.xlabel('Rating')
-                    plt.ylabel('Count')
-            except Exception as e:
-                logger.error(f"Error processing ratings: {str(e)}")
+        evict_old_reports()
         
-        plt.tight_layout()
-        
-        # Save plot
-        plot_path = f"static/reports/movie_report_{timestamp}.png"
-        plt.savefig(plot_path, dpi=100, bbox_inches='tight')
-        plt.close()
-        
-        # Generate CSV with selected columns
-        csv_path = f"static/reports/movie_report_{timestamp}.csv"
-        columns_to_export = ['title', 'year', 'rating', 'genre', 'release_date', 'director', 'runtime']
-        export_columns = [col for col in columns_to_export if col in df.columns]
-        
-        # Add any additional columns that might be useful
-        additional_columns = [col for col in df.columns if col not in columns_to_export and col not in ['_id', 'cast']]
-        export_columns.extend(additional_columns)
-        
-        # Export to CSV
-        df[export_columns].to_csv(csv_path, index=False)
-        
-        # Clean up old reports (keep last 5)
-        clean_up_old_reports()
-        
-        return {
-            "plot_path": plot_path,
-            "csv_path": csv_path,
-            "movie_count": len(movies),
-            "date_range": {
-                "start": df['release_date'].min().strftime('%Y-%m-%d'),
-                "end": df['release_date'].max().strftime('%Y-%m-%d')
-            },
-            "average_rating": df['rating'].mean() if 'rating' in df.columns and not df.empty else None
-        }
+        return {**analytics, "plot_path": plot_path, "csv_path": csv_path}
     except Exception as e:
         logger.error(f"Error generating movie report: {str(e)}")
         return None
 
-def clean_up_old_reports(max_files=5):
-    """Keep only the most recent report files"""
+def evict_old_reports(max_bytes: int = REPORT_DIR_MAX_MB * 1024 * 1024,
+                      max_age_hours: float = REPORT_MAX_AGE_HOURS):
+    """Delete report artifacts older than `max_age_hours`, then the oldest
+    remaining ones until the directory fits in `max_bytes`."""
     try:
-        if not os.path.exists("static/reports"):
+        if not os.path.exists(REPORTS_DIR):
             return
-            
-        # Get all report files
+        
         report_files = []
-        for f in os.listdir("static/reports"):
-            if f.startswith("movie_report_") and (f.endswith(".png") or f.endswith(".csv")):
-                file_path = os.path.join("static/reports", f)
-                report_files.append((file_path, os.path.getmtime(file_path)))
+        with os.scandir(REPORTS_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.startswith("movie_report_") and entry.name.endswith((".png", ".csv")):
+                    stat = entry.stat()
+                    report_files.append((entry.path, stat.st_mtime, stat.st_size))
         
-        # Sort by modification time (newest first)
+        # Newest first; keep files while they are young enough and fit the budget
         report_files.sort(key=lambda x: x[1], reverse=True)
-        
-        # Keep only the most recent files
-        for file_path, _ in report_files[max_files*2:]:  # *2 because we have both .png and .csv
+        cutoff = datetime.now().timestamp() - max_age_hours * 3600
+        total = 0
+        for file_path, mtime, size in report_files:
+            if mtime >= cutoff and total + size <= max_bytes:
+                total += size
+                continue
             try:
                 os.remove(file_path)
             except Exception as e:
                 logger.warning(f"Could not remove old report file {file_path}: {str(e)}")
     except Exception as e:
-        logger.error(f"Error cleaning up old reports: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error evicting old reports: {str(e)}")
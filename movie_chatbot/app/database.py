@@ -1,12 +1,17 @@
 import os
-from typing import Generator
+import logging
+from typing import Generator, List
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
+from .config import MONGO_BULK_BATCH_SIZE
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # SQL Database (for users)
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
 engine = create_engine(
@@ -29,28 +34,71 @@ def get_mongo_client():
             mongo_client = MongoClient(MONGO_DB_URL, serverSelectionTimeoutMS=5000)
             mongo_db = mongo_client["movie_chatbot"]
             movies_collection = mongo_db["movies"]
-            
-            # Create text index if it doesn't exist
-            try:
-                # Drop existing text index if any
-                current_indexes = movies_collection.index_information()
-                for index_name in current_indexes:
-                    if any('text' in idx for idx in current_indexes[index_name].get('key', [])):
-                        movies_collection.drop_index(index_name)
-                
-                # Create new text index on title, plot, and genres
-                movies_collection.create_index([
-                    ("title", "text"),
-                    ("plot", "text"),
-                    ("genres", "text")
-                ])
-            except Exception as e:
-                logger.error(f"Error creating text index: {str(e)}")
+            # Indexes are applied at startup from app.indexes
     except Exception as e:
         logger.error(f"Error connecting to MongoDB: {str(e)}")
         return None, None, None
     return mongo_client, mongo_db, movies_collection
 
+class BulkUpserter:
+    """Buffer write operations and flush them with unordered bulk_write.
+
+    Counts are accumulated per batch from the server's result, so callers
+    can report inserted/updated/errored totals without a round-trip per
+    document. Use as a context manager so the last partial batch is flushed.
+    """
+
+    def __init__(self, collection, batch_size: int = MONGO_BULK_BATCH_SIZE):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self._pending: List = []
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = 0
+        self.batches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def add(self, operation) -> None:
+        self._pending.append(operation)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        operations, self._pending = self._pending, []
+        self.batches += 1
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            upserted, matched, modified = result.upserted_count, result.matched_count, result.modified_count
+            failed = 0
+        except BulkWriteError as e:
+            # Unordered: everything except the reported errors was applied
+            details = e.details
+            upserted, matched, modified = details.get('nUpserted', 0), details.get('nMatched', 0), details.get('nModified', 0)
+            failed = len(details.get('writeErrors', []))
+            for error in details.get('writeErrors', [])[:5]:
+                logger.error(f"Bulk write error at op {error.get('index')}: {error.get('errmsg')}")
+        except Exception as e:
+            upserted = matched = modified = 0
+            failed = len(operations)
+            logger.error(f"Bulk write of {len(operations)} operations failed: {str(e)}")
+
+        self.inserted += upserted
+        self.updated += modified
+        self.unchanged += matched - modified
+        self.errors += failed
+        logger.debug(
+            f"Bulk batch {self.batches}: {len(operations)} ops, {upserted} inserted, "
+            f"{modified} updated, {failed} errors"
+        )
+
 # Dependency to get DB session
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -60,13 +108,6 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 def init_db():
+    """Create missing tables. Existing tables and their rows are kept."""
     from .models import Base
-    try:
-        # Try to drop tables first
-        Base.metadata.drop_all(bind=engine)
-    except:
-        # If tables don't exist, ignore the error
-        pass
-    
-    # Create tables
     Base.metadata.create_all(bind=engine)
\ No newline at end of file
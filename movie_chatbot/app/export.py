@@ -0,0 +1,116 @@
+"""
+Streaming CSV export of movie documents.
+
+Rows are written with the csv module, so titles and genres containing commas
+or quotes are quoted rather than mangled, and are produced straight from a
+MongoDB cursor in chunks of `EXPORT_BATCH_SIZE`. Memory use stays flat
+however many movies match; the routes hand the chunk generator to a
+StreamingResponse, and generate_movie_report() writes the same chunks to disk.
+"""
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import EXPORT_BATCH_SIZE
+from .normalize import normalize_date
+
+# (CSV header, document field)
+REPORT_COLUMNS = [
+    ('Title', 'title'),
+    ('Year', 'year'),
+    ('Rating', 'rating'),
+    ('Genres', 'genres'),
+    ('Release Date', 'release_date'),
+    ('Director', 'director'),
+    ('Runtime', 'runtime'),
+    ('IMDb ID', 'imdb_id'),
+    ('URL', 'url'),
+]
+PUBLIC_REPORT_COLUMNS = REPORT_COLUMNS[:4]
+
+
+def report_query(start_date=None, end_date=None, min_rating=None) -> Dict[str, Any]:
+    """MongoDB filter for the ReportRequest fields."""
+    query = {}
+    release_date = {}
+    if start_date:
+        release_date["$gte"] = normalize_date(start_date)
+    if end_date:
+        release_date["$lte"] = normalize_date(end_date)
+    if release_date:
+        query["release_date"] = release_date
+    if min_rating is not None:
+        query["rating"] = {"$gte": float(min_rating)}
+    return query
+
+
+def projection(columns: List[Tuple[str, str]]) -> Dict[str, int]:
+    fields = {field: 1 for _, field in columns}
+    fields["_id"] = 0
+    return fields
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return '|'.join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d') if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_csv(documents: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]],
+             rows_per_chunk: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Yield the CSV text for `documents` a chunk of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in columns])
+    rows = 0
+    for doc in documents:
+        writer.writerow([format_value(doc.get(field)) for _, field in columns])
+        rows += 1
+        if rows % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_chunks(chunks: Iterable[str], compress: bool = False) -> Iterator[bytes]:
+    """UTF-8 encode text chunks, optionally as one gzip stream."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    gzip_stream = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 writes a gzip header
+    for chunk in chunks:
+        data = gzip_stream.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield gzip_stream.flush()
+
+
+def stream_movies_csv(movies_collection, query: Dict[str, Any],
+                      columns: List[Tuple[str, str]] = REPORT_COLUMNS,
+                      sort: Optional[List[Tuple[str, int]]] = None,
+                      limit: int = 0, compress: bool = False) -> Iterator[bytes]:
+    """Byte chunks of a CSV export of the movies matching `query`."""
+    cursor = movies_collection.find(query, projection(columns)).batch_size(EXPORT_BATCH_SIZE)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    try:
+        yield from encode_chunks(iter_csv(cursor, columns), compress)
+    finally:
+        cursor.close()
+
+
+def export_filename(prefix: str, compress: bool = False) -> str:
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d')}.csv{'.gz' if compress else ''}"
@@ -0,0 +1,185 @@
+"""
+Concurrent, rate-limited page fetching for the IMDb scrapers.
+
+A shared token bucket caps the request rate across every worker, a per-host
+semaphore caps concurrent connections to one host, and downloaded pages are
+handed to a separate parse executor so fetch workers go straight back to the
+network.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Container, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from .http_cache import is_unchanged
+from .config import (
+    SCRAPER_RATE_PER_SECOND,
+    SCRAPER_BURST,
+    SCRAPER_MAX_WORKERS,
+    SCRAPER_MAX_PER_HOST,
+    SCRAPER_PARSE_WORKERS,
+    SCRAPER_REQUEST_TIMEOUT,
+    SCRAPER_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Pipeline result for a page whose cached copy is still current
+UNCHANGED = object()
+
+# Shared by every scraper in the process so concurrent runs stay under one budget
+imdb_rate_limiter = TokenBucket(SCRAPER_RATE_PER_SECOND, SCRAPER_BURST)
+
+
+def make_parse_executor(workers: int = SCRAPER_PARSE_WORKERS) -> Executor:
+    """Process pool for HTML parsing, or a single thread when workers is 0.
+
+    Parsing is CPU-bound, so extra processes only help with spare cores.
+    Workers are spawned rather than forked: scrapes also run inside web
+    processes, whose threads and MongoClient must not be forked.
+    """
+    if workers > 0 and (os.cpu_count() or 1) > 1:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="parse")
+
+
+class Fetcher:
+    """Bounded worker pool that fetches pages through a shared session."""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        rate_limiter: TokenBucket = imdb_rate_limiter,
+        max_workers: int = SCRAPER_MAX_WORKERS,
+        max_per_host: int = SCRAPER_MAX_PER_HOST,
+        timeout: float = SCRAPER_REQUEST_TIMEOUT,
+        max_retries: int = SCRAPER_MAX_RETRIES,
+    ):
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET with rate limiting, per-host concurrency cap and retries."""
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                with self._host_slot(url):
+                    self.rate_limiter.acquire()
+                    response = self.session.get(url, **kwargs)
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Fetch attempt {attempt} for {url} failed: {e}")
+                time.sleep(2 * attempt)  # Back off before retrying
+
+    def fetch_all(self, urls: Iterable[str], **kwargs) -> Iterator[Tuple[str, Optional[requests.Response]]]:
+        """Fetch URLs concurrently, yielding (url, response or None) in input order."""
+        futures = {url: self._pool.submit(self.get, url, **kwargs) for url in urls}
+        for url, future in futures.items():
+            try:
+                yield url, future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch {url} after {self.max_retries} attempts: {e}")
+                yield url, None
+
+    def pipeline(
+        self,
+        jobs: Iterable[Tuple[str, tuple]],
+        parse: Callable[..., Any],
+        parse_executor: Executor,
+        skip_unchanged: Container[str] = (),
+    ) -> Iterator[Tuple[str, tuple, Any]]:
+        """Fetch each (url, context) job and parse it off the network path.
+
+        `parse(html, url, *context)` runs on `parse_executor`. Yields
+        (url, context, result) in completion order; result is None when the
+        fetch or the parse failed, and UNCHANGED for URLs in `skip_unchanged`
+        whose page matched the HTTP cache (those are not parsed).
+        """
+        jobs = list(jobs)
+        done = queue.Queue()
+
+        def parsed(url, context, future):
+            try:
+                done.put((url, context, future.result()))
+            except Exception as e:
+                logger.error(f"Error parsing {url}: {str(e)}")
+                done.put((url, context, None))
+
+        def fetch_stage(url, context):
+            try:
+                response = self.get(url)
+                if url in skip_unchanged and is_unchanged(response):
+                    done.put((url, context, UNCHANGED))
+                    return
+                future = parse_executor.submit(parse, response.text, url, *context)
+            except Exception as e:
+                logger.error(f"Failed to fetch {url}: {e}")
+                done.put((url, context, None))
+                return
+            future.add_done_callback(lambda f: parsed(url, context, f))
+
+        for url, context in jobs:
+            self._pool.submit(fetch_stage, url, context)
+
+        for _ in range(len(jobs)):
+            yield done.get()
@@ -0,0 +1,185 @@
+"""
+Persistent HTTP cache for the scrapers.
+
+Response bodies are stored zlib-compressed in a small SQLite file together
+with their ETag/Last-Modified validators and a content hash. CachedSession
+sends conditional requests from those validators and marks responses that
+did not change (a 304, or a 200 with an identical body) so callers can skip
+re-parsing and re-writing them. The store is capped in size and evicts the
+least recently used pages.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import requests
+
+from .config import HTTP_CACHE_ENABLED, HTTP_CACHE_PATH, HTTP_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPCache:
+    """SQLite-backed page store with LRU eviction."""
+
+    def __init__(self, path: str = HTTP_CACHE_PATH, max_bytes: int = HTTP_CACHE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+                " content_hash TEXT, body BLOB, size INTEGER, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for a URL, marking it recently used."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, body FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+        etag, last_modified, content_hash, body = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': content_hash,
+            'body': zlib.decompress(body),
+        }
+
+    def put(self, url: str, body: bytes, content_hash: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        compressed = zlib.compress(body, 6)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, compressed, len(compressed), time.time())
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% of the cap so we don't evict on every put
+        target = int(self.max_bytes * 0.9)
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            self.evictions += 1
+
+
+class CachedSession(requests.Session):
+    """Session that revalidates GETs against an HTTPCache.
+
+    Responses carry two extra attributes: `from_cache` (body served from the
+    store after a 304) and `unchanged` (body identical to the cached copy).
+    """
+
+    def __init__(self, cache: HTTPCache):
+        super().__init__()
+        self.cache = cache
+        self._stats_lock = threading.Lock()
+        self.cache_stats = {'hits': 0, 'misses': 0, 'unchanged': 0}
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.cache_stats[key] += 1
+
+    def request(self, method, url, headers=None, **kwargs):
+        if method.upper() != 'GET':
+            return super().request(method, url, headers=headers, **kwargs)
+
+        entry = self.cache.get(url)
+        headers = dict(headers or {})
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().request(method, url, headers=headers, **kwargs)
+        response.from_cache = False
+        response.unchanged = False
+
+        if response.status_code == 304 and entry:
+            # Serve the stored body as a normal 200 so callers need no special casing
+            response.status_code = 200
+            response._content = entry['body']
+            response.encoding = response.encoding or 'utf-8'
+            response.from_cache = True
+            response.unchanged = True
+            self._count('hits')
+        elif response.status_code == 200:
+            body = response.content
+            content_hash = hashlib.sha256(body).hexdigest()
+            if entry and entry['content_hash'] == content_hash:
+                response.unchanged = True
+                self._count('unchanged')
+            else:
+                self._count('misses')
+            self.cache.put(
+                url, body, content_hash,
+                response.headers.get('ETag'), response.headers.get('Last-Modified')
+            )
+        return response
+
+    def cache_summary(self) -> str:
+        stats = self.cache_stats
+        return (
+            f"HTTP cache: {stats['hits']} not modified, {stats['unchanged']} identical, "
+            f"{stats['misses']} misses, {self.cache.evictions} evictions"
+        )
+
+
+_cache: Optional[HTTPCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HTTPCache]:
+    """Return the process-wide cache, or None if disabled or unavailable."""
+    global _cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = HTTPCache()
+            except Exception as e:
+                logger.error(f"HTTP cache unavailable at {HTTP_CACHE_PATH}: {str(e)}")
+                return None
+        return _cache
+
+
+def make_session() -> requests.Session:
+    """A CachedSession when caching is enabled, else a plain Session."""
+    cache = get_http_cache()
+    if cache is None:
+        return requests.Session()
+    return CachedSession(cache)
+
+
+def is_unchanged(response) -> bool:
+    return getattr(response, 'unchanged', False)
+
+
+def cache_summary(session) -> Optional[str]:
+    if isinstance(session, CachedSession):
+        return session.cache_summary()
+    return None
@@ -0,0 +1,355 @@
+"""
+Declarative index registry for the movies collection.
+
+MOVIE_INDEXES lists every index the crud/utils queries and the scrapers rely
+on. apply_indexes() brings a collection in line with it: missing indexes are
+created, ones whose keys or options changed are rebuilt, and indexes that
+already match are left alone.
+
+The registry is versioned by a fingerprint of its specs, recorded in the
+`schema_meta` collection once applied. At startup ensure_indexes() compares
+fingerprints with one read and returns straight away when nothing changed;
+otherwise one process, holding a lease, applies the registry on a background
+thread while the others keep serving on the existing indexes.
+
+The CLI builds each query those modules run from their own filter and
+pipeline builders, explains it, and fails when any falls back to a
+collection scan:
+
+    python -m app.indexes --apply --explain
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import PyMongoError
+
+from .config import INDEX_BUILD_LEASE_SECONDS, configure_logging
+from .locks import MongoLease
+
+logger = logging.getLogger(__name__)
+
+
+def _key_pattern(keys) -> List[Tuple[str, Any]]:
+    # The server may report 1.0 for 1
+    return [(field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys]
+
+
+def _is_text_index(info: Dict[str, Any]) -> bool:
+    return 'weights' in info or any(direction == TEXT for _, direction in info['key'])
+
+
+class IndexSpec:
+    """One index: its name, key pattern and create_index options."""
+
+    def __init__(self, name: str, keys: List[Tuple[str, Any]], **options):
+        self.name = name
+        self.keys = keys
+        self.options = options
+
+    @property
+    def is_text(self) -> bool:
+        return any(direction == TEXT for _, direction in self.keys)
+
+    def matches_keys(self, info: Dict[str, Any]) -> bool:
+        if self.is_text and 'weights' in info:
+            # The server reports a text index's fields as weights, not keys
+            return set(info['weights']) == {field for field, _ in self.keys}
+        return _key_pattern(info['key']) == _key_pattern(self.keys)
+
+    def matches_options(self, info: Dict[str, Any]) -> bool:
+        return all(info.get(option) == value for option, value in self.options.items())
+
+
+MOVIE_INDEXES = [
+    IndexSpec('title_text_plot_text_genres_text',
+              [("title", TEXT), ("plot", TEXT), ("genres", TEXT)]),  # crud.search_movies
+    # Upsert key: charted titles have no region, upcoming ones one per calendar region
+    IndexSpec('imdb_id_region_unique', [("imdb_id", ASCENDING), ("region", ASCENDING)],
+              unique=True, partialFilterExpression={"imdb_id": {"$exists": True}}),
+    IndexSpec('chart_types_rating', [("chart_types", ASCENDING), ("rating", DESCENDING)]),  # utils.get_movies_from_chart
+    IndexSpec('genre_keys_rating', [("genre_keys", ASCENDING), ("rating", DESCENDING)]),  # genre lookups sorted by rating
+    IndexSpec('type_region_release_date',
+              [("type", ASCENDING), ("region", ASCENDING), ("release_date", ASCENDING), ("_id", ASCENDING)]),  # upcoming calendar pages
+    IndexSpec('rating_year', [("rating", DESCENDING), ("year", DESCENDING)]),  # crud.get_latest_movies fallback
+    IndexSpec('title_key', [("title_key", ASCENDING)]),  # utils.search_movie_by_title
+    IndexSpec('scraped_at', [("scraped_at", DESCENDING)]),  # utils.get_latest_movies
+    IndexSpec('year', [("year", DESCENDING)]),  # public report, graph counts
+    IndexSpec('release_date', [("release_date", ASCENDING)]),  # crud.get_upcoming_movies, reports
+]
+
+# Indexes the registry used to define; dropped once their replacements exist.
+# imdb_id_unique would reject one upcoming document per region.
+RETIRED_INDEXES = ['imdb_id_unique', 'type_release_date']
+
+
+def apply_indexes(movies_collection, specs: List[IndexSpec] = MOVIE_INDEXES,
+                  retired: List[str] = RETIRED_INDEXES) -> Dict[str, int]:
+    """Create or rebuild indexes so the collection matches `specs`.
+
+    Indexes not in the registry are left in place, except a conflicting
+    text index, since a collection can only have one, and the `retired`
+    ones, which are dropped after the rest are built.
+    """
+    stats = {'created': 0, 'rebuilt': 0, 'unchanged': 0, 'dropped': 0, 'failed': 0}
+    existing = movies_collection.index_information()
+
+    for spec in specs:
+        try:
+            current = next(
+                (name for name, info in existing.items() if name != '_id_' and spec.matches_keys(info)),
+                None
+            )
+            if current is None and spec.is_text:
+                current = next((name for name, info in existing.items() if _is_text_index(info)), None)
+
+            if current is not None:
+                info = existing[current]
+                if spec.matches_keys(info) and spec.matches_options(info):
+                    stats['unchanged'] += 1
+                    continue
+                logger.info(f"Rebuilding index {current} as {spec.name}")
+                movies_collection.drop_index(current)
+                stats['rebuilt'] += 1
+            elif spec.name in existing:
+                # Same name, different keys
+                movies_collection.drop_index(spec.name)
+                stats['rebuilt'] += 1
+            else:
+                stats['created'] += 1
+
+            movies_collection.create_index(spec.keys, name=spec.name, **spec.options)
+        except Exception as e:
+            stats['failed'] += 1
+            logger.error(f"Error applying index {spec.name}: {str(e)}")
+
+    registered = {spec.name for spec in specs}
+    for name in retired:
+        if name in existing and name not in registered:
+            try:
+                movies_collection.drop_index(name)
+                stats['dropped'] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                logger.error(f"Error dropping retired index {name}: {str(e)}")
+
+    logger.info(f"Indexes applied: {stats}")
+    return stats
+
+
+INDEX_META_ID = 'movie_indexes'
+
+
+def registry_version(specs: List[IndexSpec] = MOVIE_INDEXES) -> str:
+    """Fingerprint of the registry; changes whenever any spec does."""
+    canonical = json.dumps(
+        [[spec.name, _key_pattern(spec.keys), spec.options] for spec in specs], sort_keys=True
+    )
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def ensure_indexes(movies_collection, specs: List[IndexSpec] = MOVIE_INDEXES) -> str:
+    """Apply the registry unless this version was already applied.
+
+    Returns 'current', 'applied', 'failed' or 'busy' (another process
+    holds the build lease).
+    """
+    db = movies_collection.database
+    meta = db['schema_meta']
+    version = registry_version(specs)
+    recorded = meta.find_one({'_id': INDEX_META_ID}, {'version': 1})
+    if recorded and recorded.get('version') == version:
+        logger.info(f"Indexes are current (version {version})")
+        return 'current'
+
+    lease = MongoLease(db['locks'], 'index_build', INDEX_BUILD_LEASE_SECONDS)
+    if not lease.acquire():
+        logger.info(f"Index build for version {version} is running elsewhere")
+        return 'busy'
+    try:
+        stats = apply_indexes(movies_collection, specs)
+        if stats['failed']:
+            return 'failed'
+        meta.update_one(
+            {'_id': INDEX_META_ID},
+            {'$set': {'version': version, 'applied_at': datetime.utcnow(), 'stats': stats}},
+            upsert=True
+        )
+        logger.info(f"Indexes updated to version {version}")
+        return 'applied'
+    finally:
+        lease.release()
+
+
+def start_index_build(movies_collection) -> threading.Thread:
+    """Run ensure_indexes() on a daemon thread so startup does not wait."""
+    def build():
+        try:
+            ensure_indexes(movies_collection)
+        except Exception as e:
+            logger.error(f"Index build failed: {str(e)}", exc_info=True)
+
+    thread = threading.Thread(target=build, name="index-build", daemon=True)
+    thread.start()
+    return thread
+
+
+def _find(filter: Dict[str, Any], projection: Dict[str, Any] = None, sort: Dict[str, Any] = None,
+          limit: int = 0) -> Tuple[str, Dict[str, Any]]:
+    """explain() body for a find, without the collection name."""
+    command = {'filter': filter}
+    if projection:
+        command['projection'] = projection
+    if sort:
+        command['sort'] = sort
+    if limit:
+        command['limit'] = limit
+    return 'find', command
+
+
+def _aggregate(pipeline: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """explain() body for an aggregation, without the collection name."""
+    return 'aggregate', {'pipeline': pipeline, 'cursor': {}}
+
+
+def _query_shapes() -> List[Tuple[str, Tuple[str, Dict[str, Any]]]]:
+    """(name, explain body) for the queries crud.py, utils.py and the scrapers run.
+
+    The crud and utils filters and pipelines come from the same builders
+    those modules use, so a changed query is explained as it now runs.
+    """
+    from . import crud, utils
+    from .normalize import genre_prefix_query, genre_query
+
+    year = datetime.now().year
+    cursor = (datetime.now(), ObjectId())
+    return [
+        ('crud.get_movie', _find({"_id": ObjectId()})),
+        ('crud.get_movies', _find({}, sort={"_id": 1}, limit=100)),
+        ('crud.search_movies', _find(
+            crud.text_query("dark knight"), {"score": {"$meta": "textScore"}},
+            {"score": {"$meta": "textScore"}}, 10
+        )),
+        ('crud.get_latest_movies (genre)', _find(genre_query("action"), sort={"rating": -1}, limit=10)),
+        ('crud.get_latest_movies (text)', _find(crud.text_query("action", phrase=True), sort={"rating": -1}, limit=10)),
+        ('crud.get_latest_movies (prefix)', _find(genre_prefix_query("act"), sort={"rating": -1}, limit=10)),
+        ('crud.get_latest_movies', _find({}, sort={"rating": -1, "year": -1}, limit=10)),
+        ('crud.get_upcoming_movies', _find(crud.upcoming_release_query(), sort={"release_date": 1}, limit=10)),
+        ('crud.get_upcoming_movie_list', _find(crud.upcoming_query())),
+        ('crud.get_upcoming_movies_page', _aggregate(crud.upcoming_page_pipeline(50))),
+        ('crud.get_upcoming_movies_page (cursor)', _aggregate(crud.upcoming_page_pipeline(50, after=cursor))),
+        ('crud.get_movie_graph_data', _aggregate(crud.graph_counts_pipeline(crud.graph_years()))),
+        ('crud.get_movie_graph_year', _find(
+            crud.graph_query([year]), crud.GRAPH_YEAR_FIELDS, {"title": 1}, 30
+        )),
+        ('crud.export_public_report', _find(crud.public_report_query(), sort={"year": -1}, limit=20)),
+        ('crud.export_admin_report', _find(
+            crud.report_query(datetime(year - 5, 1, 1), None, 7.0), sort={"release_date": -1}
+        )),
+        ('crud.report_analytics', _aggregate(crud.report_analytics_pipeline(datetime(year - 5, 1, 1), None, 7.0))),
+        ('utils.search_movie_by_title', _find(utils.title_query("The Dark Knight"), limit=1)),
+        ('utils.get_movies_from_chart', _find(utils.chart_query("top"), sort={"rating": -1}, limit=5)),
+        ('utils.get_movies_by_genre', _find(genre_query("horror"), sort={"rating": -1}, limit=5)),
+        ('utils.get_movies_by_genre (prefix)', _find(genre_prefix_query("sci"), sort={"rating": -1}, limit=5)),
+        ('utils.get_latest_movies', _find({}, sort={"scraped_at": -1}, limit=5)),
+        ('scraper stored titles', _find(
+            {"imdb_id": {"$in": ["tt0111161", "tt0068646"]}, "region": None}, {"imdb_id": 1, "last_updated": 1, "_id": 0}
+        )),
+        ('scraper chart membership', _find({"chart_types": "popular", "imdb_id": {"$nin": ["tt0111161"]}})),
+        ('upcoming scraper upsert key', _find({"imdb_id": "tt15239678", "region": "US"})),
+        ('upcoming scraper stored regions', _find({"type": "upcoming", "region": "US"}, limit=1)),
+        ('upcoming scraper legacy cleanup', _find({"type": "upcoming", "region": {"$exists": False}})),
+    ]
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get('stage', '?')]
+    for child in [plan.get('inputStage')] + plan.get('inputStages', []):
+        if child:
+            stages.extend(_plan_stages(child))
+    return stages
+
+
+def _winning_plans(explained: Any) -> List[Dict[str, Any]]:
+    """Every winning plan in an explain result.
+
+    Finds report one; aggregations nest theirs under the `$cursor` stage, or
+    per shard, depending on the server version and topology.
+    """
+    plans = []
+    if isinstance(explained, dict):
+        planner = explained.get('queryPlanner')
+        if isinstance(planner, dict) and 'winningPlan' in planner:
+            winning = planner['winningPlan']
+            plans.append(winning.get('queryPlan', winning))
+        for key, value in explained.items():
+            if key != 'queryPlanner':
+                plans.extend(_winning_plans(value))
+    elif isinstance(explained, list):
+        for value in explained:
+            plans.extend(_winning_plans(value))
+    return plans
+
+
+def explain_queries(movies_collection) -> List[Tuple[str, List[str]]]:
+    """Return (query name, winning plan stages) for every query shape.
+
+    A shape the server cannot explain (say, $text without a text index)
+    reports an ERROR stage.
+    """
+    db = movies_collection.database
+    results = []
+    for name, (verb, body) in _query_shapes():
+        try:
+            explained = db.command('explain', {verb: movies_collection.name, **body}, verbosity='queryPlanner')
+        except PyMongoError as e:
+            results.append((name, [f"ERROR ({e})"]))
+            continue
+        stages = [stage for plan in _winning_plans(explained) for stage in _plan_stages(plan)]
+        results.append((name, stages or ['?']))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the movie index registry and check query plans")
+    parser.add_argument("--apply", action="store_true", help="Create or rebuild registry indexes first")
+    parser.add_argument("--explain", action="store_true", help="Fail if any query does a COLLSCAN")
+    args = parser.parse_args()
+
+    configure_logging()
+    from .database import get_mongo_client
+    _, _, movies_collection = get_mongo_client()
+    if movies_collection is None:
+        raise SystemExit("MongoDB is unavailable")
+
+    if args.apply or not args.explain:
+        # Always compare against the server here, whatever version is recorded
+        stats = apply_indexes(movies_collection)
+        if not stats['failed']:
+            movies_collection.database['schema_meta'].update_one(
+                {'_id': INDEX_META_ID},
+                {'$set': {'version': registry_version(), 'applied_at': datetime.utcnow(), 'stats': stats}},
+                upsert=True
+            )
+
+    if args.explain:
+        collscans = []
+        for name, stages in explain_queries(movies_collection):
+            failed = 'COLLSCAN' in stages or stages[0].startswith('ERROR')
+            print(f"{'FAIL' if failed else 'ok':<5} {name:<40} {' <- '.join(stages)}")
+            if failed:
+                collscans.append(name)
+        if collscans:
+            print(f"\n{len(collscans)} queries do a collection scan or could not be explained: {', '.join(collscans)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Keyword intent classifier for chat messages.
+
+Every intent keyword is compiled into a single alternation regex, so a
+message is classified in one pass instead of a cascade of substring scans.
+Keywords match on word boundaries ("hi" no longer fires inside "this").
+Only chart and genre keywords also match their plural ("cartoons"), so a
+word like "his" is not read as the greeting "hi".
+"""
+import re
+from typing import List, NamedTuple, Optional
+
+# (intent, value, keywords) in resolution priority order
+INTENTS = [
+    ('greeting', None, ["hello", "hi", "hey"]),
+    ('help', None, ["help", "what can you do", "options"]),
+    ('chart', 'top_250', ["top 250", "top movies", "best movies"]),
+    ('chart', 'popular', ["popular", "trending", "what's hot"]),
+    ('genre', 'horror', ["horror", "scary", "frightening", "terrifying"]),
+    ('genre', 'action', ["action", "fight", "battle", "explosion"]),
+    ('genre', 'adventure', ["adventure", "expedition", "journey", "quest"]),
+    ('genre', 'comedy', ["comedy", "funny", "humor", "hilarious"]),
+    ('genre', 'drama', ["drama", "emotional", "serious"]),
+    ('genre', 'sci-fi', ["sci-fi", "science fiction", "space", "future", "alien"]),
+    ('genre', 'romance', ["romance", "romantic", "love story", "rom com"]),
+    ('genre', 'thriller', ["thriller", "suspense", "mystery", "crime"]),
+    ('genre', 'animation', ["animation", "animated", "cartoon"]),
+    ('genre', 'fantasy', ["fantasy", "magic", "sword", "dragon"]),
+    ('latest', None, ["new", "latest", "recent", "just added"]),
+]
+
+# Intents whose keywords are nouns that may appear in the plural
+PLURAL_INTENTS = frozenset({'chart', 'genre'})
+
+# Words that carry no title information around an intent keyword
+FILLER_WORDS = frozenset("""
+    a an any are can could find for give i in is list me movie movies film films
+    good great please recommend see show some something suggest tell the to
+    want watch what what's whats which with you
+""".split())
+
+_WORDS = re.compile(r"[\w'-]+")
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    value: Optional[str]
+    keyword: str
+    start: int
+    end: int
+    priority: int
+
+
+def _compile():
+    lookup = {}
+    for priority, (intent, value, keywords) in enumerate(INTENTS):
+        for keyword in keywords:
+            lookup.setdefault(keyword, (intent, value, priority))
+    # Longest first so multi-word phrases win over their prefixes
+    alternation = '|'.join(
+        re.escape(k) + ('s?' if lookup[k][0] in PLURAL_INTENTS else '')
+        for k in sorted(lookup, key=len, reverse=True)
+    )
+    return re.compile(rf"\b(?:{alternation})\b"), lookup
+
+
+_PATTERN, _LOOKUP = _compile()
+
+
+def classify(message: str) -> List[IntentMatch]:
+    """Return every intent keyword in the message, in message order."""
+    matches = []
+    for match in _PATTERN.finditer(message.lower()):
+        keyword = match.group(0)
+        if keyword not in _LOOKUP:
+            keyword = keyword[:-1]  # Plural form, e.g. "cartoons"
+        intent, value, priority = _LOOKUP[keyword]
+        matches.append(IntentMatch(intent, value, keyword, match.start(), match.end(), priority))
+    return matches
+
+
+def best_intent(matches: List[IntentMatch], *intents: str) -> Optional[IntentMatch]:
+    """The highest priority match, optionally restricted to some intents."""
+    candidates = [m for m in matches if not intents or m.intent in intents]
+    return min(candidates, key=lambda m: m.priority, default=None)
+
+
+def has_title_words(message: str, matches: List[IntentMatch]) -> bool:
+    """Whether anything but intent keywords and filler is left to look up as a title."""
+    remaining = message.lower()
+    for match in reversed(matches):
+        remaining = remaining[:match.start] + ' ' + remaining[match.end:]
+    return any(word not in FILLER_WORDS for word in _WORDS.findall(remaining))
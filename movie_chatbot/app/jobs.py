@@ -0,0 +1,409 @@
+"""
+Background jobs for work that should not run inside a request.
+
+JobManager runs callables on an executor and hands out job ids to poll.
+Submissions are single-flight: submitting a key that is already queued or
+running returns that job instead of starting another.
+
+Report and scrape jobs are also saved in MongoDB (`report_jobs` and
+`scrape_jobs`), so a poll that reaches another app process still finds them.
+
+Report jobs write the report CSV, and optionally draw its PNG with
+matplotlib, on a small process pool, so matplotlib is only ever imported in
+the workers. Artifacts go to REPORTS_DIR, outside the static tree, under a
+random name, and are only served through the admin report routes. A
+finished result is cached per process for REPORT_CACHE_TTL_SECONDS (and
+until the next scrape), keyed by a hash of the filters, so resubmitting the
+same filters to that process completes at once.
+
+Scrape jobs run the upcoming movies scraper on a thread and report its
+progress. A MongoDB lease keeps other app processes from scraping at the
+same time, and a submit on another process joins the running scrape.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+from .cache import MISSING, TTLCache
+from .config import REPORT_CACHE_TTL_SECONDS, REPORT_WORKERS, SCRAPE_JOB_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Jobs are forgotten this long after they finish
+JOB_RETENTION_SECONDS = 3600
+
+# Progress is saved to MongoDB at most this often, except on stage changes
+PROGRESS_SAVE_SECONDS = 2.0
+
+report_cache = TTLCache('movie_reports', 64, REPORT_CACHE_TTL_SECONDS)
+
+
+class Job:
+    def __init__(self, kind: str, key: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.params = params
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.future: Optional[Future] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.progress: Dict[str, Any] = {}
+        self.cached = False
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return 'failed'
+        if self.finished_at:
+            return 'done'
+        if self.future is not None and (self.future.running() or self.future.done()):
+            return 'running'
+        return 'queued'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'cached': self.cached,
+            'params': self.params,
+            'progress': self.progress,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class JobManager:
+    """Jobs on one executor, single-flight per key."""
+
+    def __init__(self, kind: str, make_executor: Callable[[], Executor]):
+        self.kind = kind
+        self._make_executor = make_executor
+        self._executor: Optional[Executor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._inflight: Dict[str, str] = {}  # key -> job id
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so importing the app does not start workers
+        if self._executor is None:
+            self._executor = self._make_executor()
+        return self._executor
+
+    def submit(self, key: str, params: Dict[str, Any], func: Callable, *args,
+               pass_job: bool = False, cached_result: Any = MISSING) -> Job:
+        """Queue `func(*args)` unless `key` is already in flight.
+
+        With `pass_job` the job is passed as the first argument, so a thread
+        worker can update `job.progress`. A `cached_result` completes the
+        job straight away.
+        """
+        with self._lock:
+            self._forget_old_jobs()
+            running = self._inflight.get(key)
+            if running:
+                return self._jobs[running]
+
+            job = Job(self.kind, key, params)
+            self._jobs[job.id] = job
+            if cached_result is not MISSING:
+                job.result = cached_result
+                job.cached = True
+                job.finished_at = datetime.utcnow()
+                return job
+
+            self._inflight[key] = job.id
+            job.future = self.executor.submit(func, *((job,) + args if pass_job else args))
+
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        logger.info(f"Queued {self.kind} job {job.id} for {params or key}")
+        return job
+
+    def on_result(self, job: Job, result: Any) -> None:
+        """Store a worker's return value on the job; subclasses add to this."""
+        job.result = result
+
+    def _finish(self, job: Job, future: Future) -> None:
+        try:
+            self.on_result(job, future.result())
+        except Exception as e:
+            job.error = str(e)
+            logger.error(f"{self.kind.capitalize()} job {job.id} failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._inflight.pop(job.key, None)
+        elapsed = (job.finished_at - job.created_at).total_seconds()
+        logger.info(f"{self.kind.capitalize()} job {job.id} {job.status} in {elapsed:.1f}s")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _forget_old_jobs(self) -> None:
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_RETENTION_SECONDS)
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class StoredJobManager(JobManager):
+    """Jobs that are also saved in a MongoDB collection.
+
+    Any app process can then answer a poll for them. A job that another
+    process left queued or running without an update for `stale_seconds`
+    is reported as failed.
+    """
+
+    def __init__(self, kind: str, make_executor: Callable[[], Executor], collection: str, stale_seconds: float):
+        super().__init__(kind, make_executor)
+        self.collection_name = collection
+        self.stale_seconds = stale_seconds
+        self._save_lock = threading.Lock()
+        self._saved_at: Dict[str, float] = {}  # job id -> last progress save
+
+    def _collection(self):
+        from .database import get_mongo_client
+        _, mongo_db, _ = get_mongo_client()
+        return mongo_db[self.collection_name] if mongo_db is not None else None
+
+    def save(self, job: Job, force: bool = True) -> None:
+        """Write the job's current state; unforced saves are throttled."""
+        now = time.monotonic()
+        if not force and now - self._saved_at.get(job.id, 0) < PROGRESS_SAVE_SECONDS:
+            return
+        collection = self._collection()
+        if collection is None:
+            return
+        # Serialized so a late writer never replaces a newer state
+        with self._save_lock:
+            self._saved_at[job.id] = now
+            doc = job.to_dict()
+            doc['_id'] = doc.pop('job_id')
+            doc['updated_at'] = datetime.utcnow()
+            try:
+                collection.replace_one({'_id': job.id}, doc, upsert=True)
+            except PyMongoError as e:
+                logger.warning(f"Could not save {self.kind} job {job.id}: {str(e)}")
+
+    def _finish(self, job: Job, future: Future) -> None:
+        super()._finish(job, future)
+        self.save(job)
+        self._saved_at.pop(job.id, None)
+
+    def _stored(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        collection = self._collection()
+        if collection is None:
+            return None
+        try:
+            doc = collection.find_one(query, sort=[('created_at', -1)])
+        except PyMongoError as e:
+            logger.warning(f"Could not read {self.kind} jobs: {str(e)}")
+            return None
+        if doc is None:
+            return None
+        doc['job_id'] = doc.pop('_id')
+        updated_at = doc.pop('updated_at', None)
+        stale = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        if doc['status'] in ('queued', 'running') and (updated_at is None or updated_at < stale):
+            doc['status'] = 'failed'
+            doc['error'] = f"The process running this {self.kind} stopped responding"
+        return doc
+
+    def lookup(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's state from this process, or else from MongoDB."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self._stored({'_id': job_id})
+
+    def _forget_stored(self) -> None:
+        collection = self._collection()
+        if collection is None:
+            return
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_RETENTION_SECONDS)
+        try:
+            collection.delete_many({'finished_at': {'$lt': cutoff}})
+        except PyMongoError as e:
+            logger.warning(f"Could not remove old {self.kind} jobs: {str(e)}")
+
+
+# --- Reports ---
+REPORT_JOBS_COLLECTION = 'report_jobs'
+
+# Artifact name in the download URL -> result key and media type
+REPORT_ARTIFACTS = {
+    'csv': ('csv_path', 'text/csv'),
+    'png': ('plot_path', 'image/png'),
+}
+
+
+def report_key(start_date=None, end_date=None, min_rating=None, plot: bool = False) -> str:
+    """Stable hash of the report filters."""
+    filters = {
+        'start_date': str(start_date) if start_date else None,
+        'end_date': str(end_date) if end_date else None,
+        'min_rating': float(min_rating) if min_rating is not None else None,
+        'plot': bool(plot),
+    }
+    return hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def render_report(start_date, end_date, min_rating, key: str, plot: bool = False) -> Optional[Dict[str, Any]]:
+    """Worker entry point; runs in the pool process."""
+    from .crud import generate_movie_report
+    # The random suffix keeps artifact names from being derived from the filters
+    basename = f"movie_report_{key}_{secrets.token_hex(8)}"
+    return generate_movie_report(start_date, end_date, min_rating, basename=basename, plot=plot)
+
+
+def make_report_executor(workers: int = REPORT_WORKERS) -> Executor:
+    """Process pool for rendering, or a single thread when workers is 0.
+
+    Workers are spawned rather than forked so they do not inherit the
+    parent's MongoClient, which is not fork-safe.
+    """
+    if workers > 0:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+
+
+def _artifacts_exist(result: Dict[str, Any]) -> bool:
+    paths = [result['csv_path'], result['plot_path']]
+    return all(os.path.exists(path) for path in paths if path)
+
+
+def _with_urls(job_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """The result plus the admin download URLs of its artifacts."""
+    urls = {'csv_url': f"/api/admin/reports/{job_id}/csv"}
+    if result['plot_path']:
+        urls['plot_url'] = f"/api/admin/reports/{job_id}/png"
+    return {**result, **urls}
+
+
+class ReportJobManager(StoredJobManager):
+    def submit_report(self, start_date=None, end_date=None, min_rating=None, plot: bool = False) -> Dict[str, Any]:
+        """Queue a report and return its state; reads and writes MongoDB."""
+        key = report_key(start_date, end_date, min_rating, plot)
+        filters = {
+            'start_date': str(start_date) if start_date else None,
+            'end_date': str(end_date) if end_date else None,
+            'min_rating': min_rating,
+            'plot': plot,
+        }
+        cached = report_cache.get(key)
+        if cached is not MISSING and not _artifacts_exist(cached):
+            cached = MISSING
+        self._forget_stored()
+        job = self.submit(key, filters, render_report, start_date, end_date, min_rating, key, plot,
+                          cached_result=cached)
+        if job.cached:
+            job.result = _with_urls(job.id, cached)
+        self.save(job)
+        return job.to_dict()
+
+    def artifact_path(self, job_id: str, name: str) -> Optional[str]:
+        """Path of a finished job's CSV or PNG, or None if there is none."""
+        job = self.lookup(job_id)
+        if name not in REPORT_ARTIFACTS or not job or not job.get('result'):
+            return None
+        path = job['result'].get(REPORT_ARTIFACTS[name][0])
+        return path if path and os.path.exists(path) else None
+
+    def on_result(self, job: Job, result: Optional[Dict[str, Any]]) -> None:
+        if result is None:
+            job.error = "No movies match these filters"
+            return
+        job.result = _with_urls(job.id, result)
+        report_cache.set(job.key, result)
+
+
+report_jobs = ReportJobManager('report', make_report_executor, REPORT_JOBS_COLLECTION, JOB_RETENTION_SECONDS)
+
+
+# --- Scrapes ---
+SCRAPE_JOBS_COLLECTION = 'scrape_jobs'
+
+
+def scrape_upcoming_exclusive(progress: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+    """Run the upcoming scraper unless another process is already running it.
+
+    Shared by on-demand scrape jobs and the scheduler.
+    """
+    from .database import get_mongo_client
+    from .locks import MongoLease
+    from .scrapers.upcoming_movies_scraper import UpcomingMoviesScraper
+
+    _, mongo_db, movies_collection = get_mongo_client()
+    if movies_collection is None:
+        raise RuntimeError("Failed to connect to MongoDB")
+
+    lease = MongoLease(mongo_db['locks'], 'upcoming_scrape', SCRAPE_JOB_LEASE_SECONDS)
+    if not lease.acquire():
+        holder = lease.holder() or {}
+        return {'skipped': True, 'reason': f"already running on {holder.get('owner', 'another process')}"}
+    try:
+        return UpcomingMoviesScraper().scrape_and_store_movies(movies_collection, progress=progress)
+    finally:
+        lease.release()
+
+
+def run_upcoming_scrape(job: Job) -> Dict[str, Any]:
+    """Worker entry point; runs on the scrape thread."""
+    def report(update: Dict[str, Any]) -> None:
+        job.progress.update(update)
+        scrape_jobs.save(job, force='stage' in update)
+
+    return scrape_upcoming_exclusive(report)
+
+
+class ScrapeJobManager(StoredJobManager):
+    def submit_scrape(self) -> Dict[str, Any]:
+        """Queue the upcoming scrape, or return the one already in flight here or elsewhere."""
+        with self._lock:
+            local = self._inflight.get('upcoming')
+            local_ids = list(self._jobs)
+        if not local:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+            running = self._stored({
+                '_id': {'$nin': local_ids},
+                'status': {'$in': ['queued', 'running']},
+                'updated_at': {'$gte': cutoff},
+            })
+            if running is not None and running['status'] != 'failed':
+                return running
+            self._forget_stored()
+
+        job = self.submit('upcoming', {'scraper': 'upcoming'}, run_upcoming_scrape, pass_job=True)
+        self.save(job)
+        return job.to_dict()
+
+
+# A scrape that has not reported for its lease period has been abandoned
+scrape_jobs = ScrapeJobManager('scrape', lambda: ThreadPoolExecutor(max_workers=1, thread_name_prefix="scrape"),
+                               SCRAPE_JOBS_COLLECTION, SCRAPE_JOB_LEASE_SECONDS)
+
+
+def submit_upcoming_scrape() -> Dict[str, Any]:
+    """Queue the upcoming scrape and return its state; reads and writes MongoDB."""
+    return scrape_jobs.submit_scrape()
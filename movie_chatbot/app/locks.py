@@ -0,0 +1,76 @@
+"""
+Lease locks stored in MongoDB, for work only one process should do at a time.
+
+A lease is a document in the `locks` collection with an owner and an expiry.
+Acquiring it is a single upsert that only matches a free or expired lease, so
+a crashed holder blocks others for at most `ttl_seconds`.
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+def make_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class MongoLease:
+    """Named, expiring lock. Use `acquire()`/`release()` or `with lease:`."""
+
+    def __init__(self, locks_collection, name: str, ttl_seconds: float, owner: str = None):
+        self.collection = locks_collection
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = owner or make_owner_id()
+        self.held = False
+
+    def acquire(self) -> bool:
+        """Take the lease if it is free, expired or already ours."""
+        now = datetime.utcnow()
+        try:
+            self.collection.update_one(
+                {
+                    '_id': self.name,
+                    '$or': [{'expires_at': {'$lt': now}}, {'owner': self.owner}],
+                },
+                {'$set': {
+                    'owner': self.owner,
+                    'acquired_at': now,
+                    'expires_at': now + timedelta(seconds=self.ttl_seconds),
+                }},
+                upsert=True
+            )
+            self.held = True
+        except DuplicateKeyError:
+            # The lease document exists and someone else holds it
+            self.held = False
+        return self.held
+
+    def renew(self) -> bool:
+        """Push the expiry out again; False if the lease was lost."""
+        result = self.collection.update_one(
+            {'_id': self.name, 'owner': self.owner},
+            {'$set': {'expires_at': datetime.utcnow() + timedelta(seconds=self.ttl_seconds)}}
+        )
+        self.held = result.matched_count == 1
+        return self.held
+
+    def release(self) -> None:
+        if self.held:
+            self.collection.delete_one({'_id': self.name, 'owner': self.owner})
+            self.held = False
+
+    def holder(self):
+        return self.collection.find_one({'_id': self.name})
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
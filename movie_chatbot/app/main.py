@@ -5,11 +5,12 @@ from datetime import datetime, timedelta
 from typing import List, Generator, Dict, Any, Optional
 from urllib.parse import quote
 
-from fastapi import FastAPI, Depends, HTTPException, Request, Form, status, Response, Cookie
-from fastapi.responses import RedirectResponse, JSONResponse, HTMLResponse, FileResponse
+from fastapi import FastAPI, Depends, HTTPException, Request, Form, status, Response, Cookie, Query
+from fastapi.responses import RedirectResponse, JSONResponse, HTMLResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine
 from fastapi.security import OAuth2PasswordRequestForm
@@ -19,18 +20,19 @@ from . import auth, database, models, schemas
 templates = Jinja2Templates(directory="app/templates")
 
 # Import config first to set up logging
-from .config import LOGGING_CONFIG
-import logging.config
+from .config import configure_logging, RUN_SCHEDULER
 
 # Configure logging
-logging.config.dictConfig(LOGGING_CONFIG)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Import other modules after logging is configured
-from . import models, schemas, crud, utils
+from . import models, schemas, crud, utils, repository
 from .database import get_db, init_db, get_mongo_client
-from .scraper import scrape_imdb_movies
-from .scrapers.upcoming_movies_scraper import UpcomingMoviesScraper
+from .cache import cache_stats
+from .export import export_filename
+from .jobs import REPORT_ARTIFACTS, report_jobs, scrape_jobs
+from .indexes import start_index_build
 from .api.upcoming_movies import router as upcoming_movies_router
 
 app = FastAPI(
@@ -51,6 +53,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON and HTML responses; small ones aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Root route
 @app.get("/")
 async def root(request: Request):
@@ -94,16 +99,15 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 # Configure templates
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
-# Initialize database tables
-init_db()
-
-# Create admin user if it doesn't exist
+# Create tables and the admin user if they don't exist. This runs at startup,
+# not at import, so importing the app never touches the schema.
 @app.on_event("startup")
 async def create_admin_user():
     from .database import SessionLocal
     from .models import User
     from .auth import get_password_hash
     
+    init_db()
     db = SessionLocal()
     try:
         admin_username = "admin@example.com"
@@ -145,17 +149,18 @@ async def startup_event():
         if movies_collection is None:
             logger.error("Failed to initialize MongoDB connection")
             raise Exception("Failed to initialize MongoDB connection")
-            
-        # Initialize and start the scheduler (will run at 3 AM daily)
-        from .scheduler import start_scheduler
-        start_scheduler()
         
-        # Log when the next run will be
-        from apscheduler.job import Job
-        jobs = start_scheduler().get_jobs()
-        if jobs:
-            next_run = jobs[0].next_run_time
-            logger.info(f"Next scheduled scrape at: {next_run}")
+        # Bring indexes in line with the registry without delaying startup
+        start_index_build(movies_collection)
+            
+        # Initialize and start the scheduler (will run at 3 AM daily); the
+        # job store is shared, so only one process runs each scrape
+        if RUN_SCHEDULER:
+            from .scheduler import start_scheduler
+            jobs = start_scheduler().get_jobs()
+            if jobs:
+                next_run = jobs[0].next_run_time
+                logger.info(f"Next scheduled scrape at: {next_run}")
         
         # Log database status
         movie_count = movies_collection.count_documents({})
@@ -217,7 +222,7 @@ async def chat(request: Dict[str, Any]):
     
     try:
         logger.info(f"Processing message: {message_text}")
-        response = utils.process_chat_message(message_text)
+        response = await repository.process_chat_message(message_text)
         return {"message": response, "is_user": False}
     except Exception as e:
         logger.error(f"Error processing chat message: {str(e)}", exc_info=True)
@@ -226,141 +231,191 @@ async def chat(request: Dict[str, Any]):
             detail={"error": "Error processing your message", "details": str(e)}
         )
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit rates and sizes of the in-process result caches."""
+    return cache_stats()
+
 @app.get("/api/movies/search")
 async def search_movies(query: str, limit: int = 5):
-    movies = crud.search_movies(query, limit)
+    movies = await repository.search_movies(query, limit)
     return movies
 
 @app.get("/api/movies/latest")
 async def get_latest_movies(limit: int = 5):
-    movies = crud.get_latest_movies(limit)
+    movies = await repository.get_latest_movies(limit)
     return movies
 
 @app.get("/api/movies/upcoming")
 async def get_upcoming_movies(limit: int = 5):
-    movies = crud.get_upcoming_movies(limit)
+    movies = await repository.get_upcoming_movies(limit)
     return movies
 
 @app.get("/api/movie/graph")
 async def get_movie_graph_data():
     """
     Get movie data for the graph page
-    Returns movie release counts per year for current and next year
+    Returns movie release counts per year for current and next year;
+    the movies themselves are paged from /api/movie/graph/{year}
     """
     try:
-        # Get MongoDB client
-        _, _, movies_collection = get_mongo_client()
-        if movies_collection is None:
+        chart_data = await repository.get_movie_graph_data()
+        if chart_data is None:
             raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
-            
-        # Get current year and next year
-        current_year = datetime.now().year
-        next_year = current_year + 1
-        
-        # Query movies for current and next year
-        movies = list(movies_collection.find({
-            "year": {"$exists": True},
-            "$or": [
-                {"year": {"$regex": f"{current_year}"}},
-                {"year": {"$regex": f"{next_year}"}}
-            ]
-        }).sort("year", 1))
-        
-        if not movies:
-            return {
-                "labels": [],
-                "data": [],
-                "movies": []
-            }
-        
-        # Prepare data for chart
-        chart_data = {
-            "labels": [],
-            "data": [],
-            "movies": []
-        }
-        
-        # Group movies by year
-        year_movies = {}
-        for movie in movies:
-            try:
-                year = movie.get('year', '')
-                title = movie.get('title', '')
-                genres = movie.get('genres', [])
-                
-                if year not in year_movies:
-                    year_movies[year] = []
-                
-                # Store the original year for display
-                year_movies[year].append({
-                    "title": title,
-                    "year": year,  # Store original year
-                    "genres": genres
-                })
-            except Exception as e:
-                logger.error(f"Error processing movie {title}: {str(e)}")
-                continue
-        
-        # Prepare chart data
-        for year in sorted(year_movies.keys()):
-            try:
-                # Count movies for this year
-                movie_count = len(year_movies[year])
-                
-                chart_data["labels"].append(year)
-                chart_data["data"].append(movie_count)
-                chart_data["movies"].extend(year_movies[year])
-            except Exception as e:
-                logger.error(f"Error processing year {year}: {str(e)}")
-                continue
         
         return chart_data
     except Exception as e:
         logger.error(f"Error in get_movie_graph_data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/movie/graph/{year}")
+async def get_movie_graph_year(year: int, skip: int = Query(0, ge=0), limit: int = Query(30, ge=1, le=100)):
+    """
+    Get one page of the movies behind a bar on the graph page
+    """
+    try:
+        page = await repository.get_movie_graph_year(year, skip, limit)
+        if page is None:
+            raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
+        
+        return page
+    except Exception as e:
+        logger.error(f"Error in get_movie_graph_year: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def csv_download(chunks, filename: str, compress: bool) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if compress else "text/csv",
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @app.get("/api/report/download")
-async def download_public_report():
+async def download_public_report(
+    filters: schemas.ReportRequest = Depends(),
+    limit: int = Query(20, ge=1, le=1000),
+    compress: bool = Query(False, description="Gzip the CSV")
+):
     try:
-        # Get MongoDB client
-        _, _, movies_collection = get_mongo_client()
-        if movies_collection is None:
+        chunks = await repository.export_public_report(
+            filters.start_date, filters.end_date, filters.min_rating, limit, compress
+        )
+        if chunks is None:
             raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
-            
-        # Get latest movies sorted by year
-        latest_movies = list(movies_collection.find({"year": {"$ne": None}})
-            .sort("year", -1)
-            .limit(20))
         
-        if not latest_movies:
+        if not chunks:
             raise HTTPException(status_code=404, detail="No movies found")
-            
-        # Prepare CSV content
-        csv_content = "Title,Year,Rating,Genres\n"
-        for movie in latest_movies:
-            try:
-                title = movie.get('title', '').replace(',', '')
-                year = str(movie.get('year', ''))
-                rating = str(movie.get('rating', ''))
-                genres = '|'.join(movie.get('genres', [])).replace(',', '')
-                csv_content += f"{title},{year},{rating},{genres}\n"
-            except Exception as e:
-                logger.error(f"Error processing movie {movie.get('title', '')}: {str(e)}")
-                continue
-                
-        # Create response
-        headers = {
-            'Content-Disposition': f'attachment; filename=latest_movies_{datetime.now().strftime("%Y%m%d")}.csv'
-        }
         
-        return Response(
-            content=csv_content,
-            media_type="text/csv",
-            headers=headers
-        )
+        return csv_download(chunks, export_filename("latest_movies", compress), compress)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating public report: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500, 
             detail=f"Error generating report: {str(e)}"
         )
+
+@app.get("/api/admin/report/download")
+async def download_admin_report(
+    filters: schemas.ReportRequest = Depends(),
+    compress: bool = Query(False, description="Gzip the CSV"),
+    current_user: schemas.User = Depends(auth.get_admin_user)
+):
+    """
+    Full CSV export of the movies matching the report filters
+    """
+    try:
+        chunks = await repository.export_admin_report(
+            filters.start_date, filters.end_date, filters.min_rating, compress
+        )
+        if chunks is None:
+            raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
+        
+        if not chunks:
+            raise HTTPException(status_code=404, detail="No movies found")
+        
+        return csv_download(chunks, export_filename("movie_report", compress), compress)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating admin report: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Error generating report: {str(e)}"
+        )
+
+@app.get("/api/admin/report/analytics")
+async def get_report_analytics(
+    filters: schemas.ReportRequest = Depends(),
+    current_user: schemas.User = Depends(auth.get_admin_user)
+):
+    """
+    Monthly release counts and rating histogram for the report filters
+    """
+    try:
+        analytics = await repository.report_analytics(filters.start_date, filters.end_date, filters.min_rating)
+        if analytics is None:
+            raise HTTPException(status_code=404, detail="No movies found")
+        return analytics
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_report_analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/admin/reports", status_code=status.HTTP_202_ACCEPTED)
+async def submit_report(
+    filters: schemas.ReportRequest,
+    plot: bool = Query(False, description="Also render a PNG with matplotlib"),
+    current_user: schemas.User = Depends(auth.get_admin_user)
+):
+    """
+    Queue a report CSV for these filters; poll the returned job id
+    """
+    return await repository.run_in_db_executor(
+        report_jobs.submit_report, filters.start_date, filters.end_date, filters.min_rating, plot
+    )
+
+@app.get("/api/admin/reports/{job_id}")
+async def get_report_job(job_id: str, current_user: schemas.User = Depends(auth.get_admin_user)):
+    job = await repository.run_in_db_executor(report_jobs.lookup, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+@app.get("/api/admin/reports/{job_id}/{artifact}")
+async def download_report_artifact(
+    job_id: str,
+    artifact: str,
+    current_user: schemas.User = Depends(auth.get_admin_user)
+):
+    """
+    The CSV or PNG (`csv` or `png`) written by a finished report job
+    """
+    path = await repository.run_in_db_executor(report_jobs.artifact_path, job_id, artifact)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Report file not found")
+    return FileResponse(path, media_type=REPORT_ARTIFACTS[artifact][1], filename=os.path.basename(path))
+
+@app.get("/api/admin/scheduler")
+async def get_scheduler_status(current_user: schemas.User = Depends(auth.get_admin_user)):
+    """
+    Next run, last run and current holder of every scheduled job
+    """
+    try:
+        from .scheduler import scheduler_status
+        jobs = await repository.run_in_db_executor(scheduler_status)
+        if jobs is None:
+            raise HTTPException(status_code=500, detail="Failed to connect to MongoDB")
+        return {"jobs": jobs}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_scheduler_status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.on_event("shutdown")
+async def shutdown_jobs():
+    report_jobs.shutdown()
+    scrape_jobs.shutdown()
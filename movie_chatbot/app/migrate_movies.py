@@ -0,0 +1,86 @@
+"""
+One-shot backfill of typed movie fields.
+
+Rewrites year, rating, release dates, timestamps and genres, and fills in
+the title_key/genre_keys lookup fields, on existing documents with the same
+normalization the scrapers now apply on write, then creates the movie
+indexes. Safe to re-run: documents that are already
+normalized are left alone.
+
+    python -m app.migrate_movies [--dry-run] [--batch-size 500]
+"""
+import argparse
+import logging
+
+from pymongo import UpdateOne
+
+from .config import configure_logging
+from .database import BulkUpserter, get_mongo_client
+from .indexes import ensure_indexes
+from .normalize import DERIVED_FIELDS, TYPED_FIELDS, normalize_movie
+
+logger = logging.getLogger(__name__)
+
+
+def migration_update(doc):
+    """The $set/$unset needed to normalize one document, or None."""
+    normalized = normalize_movie(doc)
+    to_set = {
+        field: normalized[field] for field in list(TYPED_FIELDS) + list(DERIVED_FIELDS)
+        if field in normalized and normalized[field] != doc.get(field)
+    }
+    # Unparseable values are dropped so sorts never mix strings and numbers
+    to_unset = {
+        field: '' for field in list(TYPED_FIELDS) + list(DERIVED_FIELDS)
+        if field in doc and field not in normalized
+    }
+    update = {}
+    if to_set:
+        update['$set'] = to_set
+    if to_unset:
+        update['$unset'] = to_unset
+    return update or None
+
+
+def migrate(movies_collection, dry_run: bool = False, batch_size: int = 500) -> dict:
+    projection = {field: 1 for field in list(TYPED_FIELDS) + list(DERIVED_FIELDS) + list(DERIVED_FIELDS.values())}
+    stats = {'scanned': 0, 'changed': 0, 'unset_fields': 0}
+
+    with BulkUpserter(movies_collection, batch_size) as upserter:
+        for doc in movies_collection.find({}, projection).batch_size(batch_size):
+            stats['scanned'] += 1
+            update = migration_update(doc)
+            if not update:
+                continue
+            stats['changed'] += 1
+            stats['unset_fields'] += len(update.get('$unset', {}))
+            if dry_run:
+                if stats['changed'] <= 5:
+                    logger.info(f"Would update {doc['_id']}: {update}")
+                continue
+            upserter.add(UpdateOne({'_id': doc['_id']}, update))
+
+    stats['updated'] = upserter.updated
+    stats['errors'] = upserter.errors
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill typed movie fields")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    configure_logging()
+    _, _, movies_collection = get_mongo_client()
+    if movies_collection is None:
+        raise SystemExit("MongoDB is unavailable")
+
+    stats = migrate(movies_collection, args.dry_run, args.batch_size)
+    logger.info(f"Migration {'dry run ' if args.dry_run else ''}complete: {stats}")
+    if not args.dry_run:
+        ensure_indexes(movies_collection)
+
+
+if __name__ == "__main__":
+    main()
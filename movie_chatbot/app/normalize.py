@@ -0,0 +1,173 @@
+"""
+Typed movie fields for the write path.
+
+The scrapers pull year, rating and dates out of page text, so the raw values
+come in many shapes ("2024", "(2024)", "8.8/10", "June 5, 2025",
+"2025-06-05"). normalize_movie() turns them into an int year, a float
+rating, BSON dates and a canonical lowercase genre list so range queries
+and sorts compare like with like. Values that cannot be parsed are dropped
+rather than stored as strings.
+
+It also derives `title_key` and `genre_keys`, the normalized forms that
+exact title and genre lookups match with an equality query.
+"""
+import re
+import unicodedata
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+_YEAR = re.compile(r'\b(1[89]\d{2}|2[01]\d{2})\b')
+_RATING = re.compile(r'\d+(?:\.\d+)?')
+
+# Release date formats seen on IMDb title and calendar pages
+DATE_FORMATS = ['%Y-%m-%d', '%B %d, %Y', '%b %d, %Y', '%d %B %Y', '%B %Y', '%b %Y']
+
+GENRE_ALIASES = {
+    'science fiction': 'sci-fi',
+    'sci fi': 'sci-fi',
+    'scifi': 'sci-fi',
+    'rom com': 'romance',
+    'rom-com': 'romance',
+    'animated': 'animation',
+}
+
+# Lookup keys derived from other fields, and the fields they come from
+DERIVED_FIELDS = {'title_key': 'title', 'genre_keys': 'genres'}
+
+# Fields normalize_movie() may set; the migration rewrites or unsets these
+TYPED_FIELDS = {
+    'year': 'int',
+    'rating': 'float',
+    'release_date': 'date',
+    'genres': 'genres',
+    'last_updated': 'date',
+    'scraped_at': 'date',
+    'created_at': 'date',
+}
+
+
+def normalize_title(title: str) -> str:
+    """Casefold, strip accents and punctuation, and collapse whitespace."""
+    if not title:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', title)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', stripped.casefold()).strip()
+
+
+def genre_key(genre: str) -> str:
+    """Lookup key for a genre: canonical name, then title-normalized."""
+    return normalize_title(canonical_genre(genre))
+
+
+def genre_query(genre: str) -> Dict[str, Any]:
+    """Exact match on the stored genre keys."""
+    return {"genre_keys": genre_key(genre)}
+
+
+def genre_prefix_query(genre: str) -> Dict[str, Any]:
+    """Prefix match on the genre keys ("sci" finds "sci fi").
+
+    Anchored and case-sensitive on the lowercase keys, so it stays an index
+    range scan.
+    """
+    return {"genre_keys": {"$regex": f"^{re.escape(genre_key(genre))}"}}
+
+
+def normalize_year(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.year
+    if value is None:
+        return None
+    match = _YEAR.search(str(value))
+    return int(match.group(1)) if match else None
+
+
+def normalize_rating(value: Any) -> Optional[float]:
+    """IMDb ratings on a 0-10 scale; "8.8/10" becomes 8.8."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        rating = float(value)
+    else:
+        match = _RATING.search(str(value))
+        if not match:
+            return None
+        rating = float(match.group(0))
+    return rating if 0 <= rating <= 10 else None
+
+
+def normalize_date(value: Any) -> Optional[datetime]:
+    """A naive UTC datetime (BSON date) from a datetime, date or date string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if not isinstance(value, str) or not value.strip():
+        return None
+
+    text = value.strip()
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        pass
+    # Calendar headers have come through as "June 5,, 2025"
+    text = re.sub(r'\s*,[\s,]*', ', ', text)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def canonical_genre(genre: str) -> str:
+    key = ' '.join(str(genre).lower().split())
+    return GENRE_ALIASES.get(key, key)
+
+
+def normalize_genres(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, Iterable):
+        return []
+    return list(dict.fromkeys(canonical_genre(g) for g in value if g and str(g).strip()))
+
+
+_NORMALIZERS = {
+    'int': normalize_year,
+    'float': normalize_rating,
+    'date': normalize_date,
+    'genres': normalize_genres,
+}
+
+
+def normalize_movie(movie: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a movie document with typed fields.
+
+    Typed fields that fail to parse are left out of the copy. A release
+    date also fills in a missing year.
+    """
+    normalized = dict(movie)
+    for field, kind in TYPED_FIELDS.items():
+        if field not in movie:
+            continue
+        value = _NORMALIZERS[kind](movie[field])
+        if value is None or value == []:
+            del normalized[field]
+        else:
+            normalized[field] = value
+
+    if 'year' not in normalized and isinstance(normalized.get('release_date'), datetime):
+        normalized['year'] = normalized['release_date'].year
+
+    if normalized.get('title'):
+        normalized['title_key'] = normalize_title(normalized['title'])
+    if normalized.get('genres'):
+        normalized['genre_keys'] = list(dict.fromkeys(genre_key(g) for g in normalized['genres']))
+    return normalized
@@ -0,0 +1,253 @@
+"""
+Field extraction for IMDb title pages.
+
+IMDb embeds the title's metadata as JSON (a schema.org JSON-LD block and the
+Next.js `__NEXT_DATA__` payload). Pulling those out with a regex and
+`json.loads` avoids building a DOM for the whole page, which is most of the
+parse time on large title pages. Pages without usable structured data fall
+back to the CSS selectors, parsed with the fastest available BeautifulSoup
+tree builder.
+"""
+import html as html_lib
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from .config import HTML_PARSER
+
+logger = logging.getLogger(__name__)
+
+_JSON_LD = re.compile(
+    r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE
+)
+_NEXT_DATA = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE
+)
+
+MAX_CAST = 10
+
+
+def _resolve_backend(name: str) -> str:
+    if name != 'auto':
+        return name
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+# BeautifulSoup tree builder used when a page has to be parsed as HTML
+PARSER_BACKEND = _resolve_backend(HTML_PARSER)
+
+
+def make_soup(html: str, backend: Optional[str] = None) -> BeautifulSoup:
+    return BeautifulSoup(html, backend or PARSER_BACKEND)
+
+
+def _text(value: Any) -> Any:
+    # Structured data escapes quotes and apostrophes as HTML entities
+    return html_lib.unescape(value) if isinstance(value, str) else value
+
+
+def _names(people: Any) -> List[str]:
+    if isinstance(people, dict):
+        people = [people]
+    return [_text(p['name']) for p in people or [] if isinstance(p, dict) and p.get('name')]
+
+
+def _dig(data: Any, *path) -> Any:
+    for key in path:
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and isinstance(key, int) and len(data) > key:
+            data = data[key]
+        else:
+            return None
+    return data
+
+
+def from_json_ld(html: str) -> Optional[Dict]:
+    """Movie fields from the schema.org JSON-LD block, if present."""
+    for match in _JSON_LD.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        if isinstance(data, list):
+            data = next((d for d in data if isinstance(d, dict) and d.get('name')), None)
+        if not isinstance(data, dict) or not data.get('name'):
+            continue
+
+        genres = data.get('genre') or []
+        if isinstance(genres, str):
+            genres = [genres]
+        rating = _dig(data, 'aggregateRating', 'ratingValue')
+        image = data.get('image')
+        if isinstance(image, dict):
+            image = image.get('url')
+
+        fields = {
+            'title': _text(data['name']),
+            'rating': str(rating) if rating is not None else None,
+            'plot': _text(data.get('description')),
+            'genres': [_text(genre) for genre in genres],
+            'director': next(iter(_names(data.get('director'))), None),
+            'cast': _names(data.get('actor')),
+            'poster': image,
+        }
+        published = str(data.get('datePublished') or '')
+        if re.fullmatch(r'\d{4}-\d{2}-\d{2}', published):
+            fields['release_date'] = published
+            fields['year'] = published[:4]
+        elif re.fullmatch(r'\d{4}', published):
+            fields['year'] = published
+        return fields
+    return None
+
+
+def from_next_data(html: str) -> Optional[Dict]:
+    """Movie fields from the Next.js `__NEXT_DATA__` payload, if present."""
+    match = _NEXT_DATA.search(html)
+    if not match:
+        return None
+    try:
+        page = _dig(json.loads(match.group(1)), 'props', 'pageProps')
+    except ValueError:
+        return None
+    top = _dig(page, 'aboveTheFoldData') or {}
+    main = _dig(page, 'mainColumnData') or {}
+    title = _text(_dig(top, 'titleText', 'text'))
+    if not title:
+        return None
+
+    rating = _dig(top, 'ratingsSummary', 'aggregateRating')
+    year = _dig(top, 'releaseYear', 'year')
+    release = _dig(top, 'releaseDate') or {}
+    release_date = None
+    if all(release.get(k) for k in ('year', 'month', 'day')):
+        release_date = f"{release['year']:04d}-{release['month']:02d}-{release['day']:02d}"
+
+    directors = _dig(top, 'directorsPageTitle', 0, 'credits') or []
+    cast = _dig(main, 'cast', 'edges') or []
+    return {
+        'title': title,
+        'year': str(year) if year else None,
+        'rating': str(rating) if rating is not None else None,
+        'plot': _text(_dig(top, 'plot', 'plotText', 'plainText')),
+        'genres': [_text(g.get('text')) for g in _dig(top, 'genres', 'genres') or [] if g.get('text')],
+        'director': next(iter(_text(d) for d in (_dig(c, 'name', 'nameText', 'text') for c in directors) if d), None),
+        'cast': [_text(n) for n in (_dig(e, 'node', 'name', 'nameText', 'text') for e in cast) if n],
+        'poster': _dig(top, 'primaryImage', 'url'),
+        'release_date': release_date,
+    }
+
+
+def from_selectors(html: str, backend: Optional[str] = None) -> Dict:
+    """Movie fields scraped from the rendered markup."""
+    soup = make_soup(html, backend)
+
+    # Helper function to safely get text from selector
+    def get_text(selector, attr='text', default=None):
+        try:
+            elem = soup.select_one(selector)
+            if not elem:
+                return default
+            if attr == 'text':
+                return elem.get_text(strip=True)
+            return elem.get(attr, default)
+        except Exception as e:
+            logger.debug(f"Error getting {selector}: {e}")
+            return default
+
+    title = get_text('h1[data-testid="hero__pageTitle"]')
+    if not title:  # Fallback for different page structure
+        title = get_text('h1')
+
+    year = get_text('a[href*="releaseinfo"]')
+    if not year:  # Try alternative year selector
+        year = get_text('span[data-testid="title-details-releasedate"] a')
+
+    rating = get_text('div[data-testid="hero-rating-bar__aggregate-rating__score"]')
+    if not rating:  # Try alternative rating selector
+        rating = get_text('span.sc-7ab21ed2-1.jGRxWM')
+
+    plot = get_text('span[data-testid="plot-xl"]')
+    if not plot:  # Fallback to shorter plot
+        plot = get_text('span[data-testid="plot-l"]')
+
+    # Genre chips in the hero, then the genre links IMDb has used in the
+    # title block, details and storyline sections, in one selector pass
+    genres = []
+    genre_section = soup.find('div', {'class': 'ipc-chip-list'})
+    if genre_section:
+        genres = [g.get_text(strip=True) for g in genre_section.find_all('a')]
+    if not genres:
+        genres = list(dict.fromkeys(
+            a.get_text(strip=True) for a in soup.select(
+                'div.sc-52d569c6-0 a[href*="/genres="], '
+                'div[data-testid="title-details-section"] a[href*="/genres="], '
+                'div[data-testid="storyline-genres"] a, '
+                'div[data-testid="title-genres"] a'
+            )
+        ))
+
+    # Get release date
+    release_date = None
+    release_info = soup.find('li', {'data-testid': 'title-details-releasedate'})
+    if release_info and release_info.find('a'):
+        date_text = release_info.find('a').get_text(strip=True)
+        try:
+            # Try to parse date in format "Month DD, YYYY"
+            date_obj = datetime.strptime(date_text, '%B %d, %Y')
+            release_date = date_obj.strftime('%Y-%m-%d')
+            # Store only the year
+            year = str(date_obj.year)
+        except ValueError:
+            logger.warning(f"Could not parse release date for {title}: {date_text}")
+
+    director = get_text('a[href*="tt_ov_dr"]')
+    if not director:  # Fallback for director
+        director_elem = soup.find('a', {'data-testid': 'title-pc-principal-credit'})
+        if director_elem:
+            director = director_elem.get_text(strip=True)
+
+    cast = [actor.get_text(strip=True) for actor in soup.select('a[data-testid="title-cast-item__actor"]')]
+
+    poster = get_text('img[data-testid="hero-media__poster"]', 'src')
+    if not poster:  # Fallback for poster
+        poster_elem = soup.find('img', {'class': 'ipc-image'})
+        if poster_elem:
+            poster = poster_elem.get('src')
+
+    return {
+        'title': title,
+        'year': year,
+        'rating': rating,
+        'plot': plot,
+        'genres': genres,
+        'director': director,
+        'cast': cast,
+        'poster': poster,
+        'release_date': release_date,
+    }
+
+
+def extract_movie_fields(html: str, structured: bool = True, backend: Optional[str] = None) -> Dict:
+    """Return the title page's fields, preferring embedded structured data.
+
+    Genres are lowercased and cast is capped at MAX_CAST, whichever source
+    the fields came from. Pass `structured=False` to force the selector path
+    and `backend` to override the tree builder.
+    """
+    fields = None
+    if structured:
+        fields = from_json_ld(html) or from_next_data(html)
+    if fields is None:
+        fields = from_selectors(html, backend)
+    fields['genres'] = [g.lower().strip() for g in fields.get('genres') or [] if g]
+    fields['cast'] = (fields.get('cast') or [])[:MAX_CAST]
+    return fields
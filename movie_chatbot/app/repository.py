@@ -0,0 +1,112 @@
+"""
+Async data layer for the FastAPI routes.
+
+pymongo is synchronous, so calling crud/utils directly from an `async def`
+route blocks the event loop for the duration of the query. These wrappers keep
+the same query surface as crud.py and utils.py but run each call on a bounded
+thread pool, so concurrent requests overlap their MongoDB round-trips and the
+pool size caps how many queries a worker has in flight.
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from . import crud, utils
+from .config import MONGO_EXECUTOR_WORKERS
+from .database import get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=MONGO_EXECUTOR_WORKERS, thread_name_prefix="mongo")
+
+
+async def run_in_db_executor(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking database call on the shared MongoDB executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+# --- Connection ---
+async def get_movies_collection():
+    _, _, movies_collection = await run_in_db_executor(get_mongo_client)
+    return movies_collection
+
+
+# --- crud.py ---
+async def get_movie(movie_id: str) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(crud.get_movie, movie_id)
+
+
+async def get_movies(skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(crud.get_movies, skip, limit)
+
+
+async def search_movies(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(crud.search_movies, query, limit)
+
+
+async def get_latest_movies(limit: int = 10, genre: str = None) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(crud.get_latest_movies, limit, genre)
+
+
+async def get_upcoming_movies(limit: int = 10) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(crud.get_upcoming_movies, limit)
+
+
+async def get_upcoming_movie_list(region: str = None) -> Optional[List[Dict[str, Any]]]:
+    return await run_in_db_executor(crud.get_upcoming_movie_list, region)
+
+
+async def get_upcoming_movies_page(cursor: str = None, limit: int = 50, region: str = None) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(crud.get_upcoming_movies_page, cursor, limit, region)
+
+
+async def get_movie_graph_data() -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(crud.get_movie_graph_data)
+
+
+async def get_movie_graph_year(year: int, skip: int = 0, limit: int = 30) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(crud.get_movie_graph_year, year, skip, limit)
+
+
+async def report_analytics(start_date=None, end_date=None, min_rating=None) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(crud.report_analytics, start_date, end_date, min_rating)
+
+
+# The match check runs here; the returned chunk iterator is consumed later by
+# StreamingResponse, which iterates sync generators on its own thread pool.
+async def export_public_report(start_date=None, end_date=None, min_rating=None,
+                               limit: int = 20, compress: bool = False) -> Optional[Iterator[bytes]]:
+    return await run_in_db_executor(crud.export_public_report, start_date, end_date, min_rating, limit, compress)
+
+
+async def export_admin_report(start_date=None, end_date=None, min_rating=None,
+                              compress: bool = False) -> Optional[Iterator[bytes]]:
+    return await run_in_db_executor(crud.export_admin_report, start_date, end_date, min_rating, compress)
+
+
+# --- utils.py ---
+async def is_database_populated() -> bool:
+    return await run_in_db_executor(utils.is_database_populated)
+
+
+async def search_movie_by_title(title: str) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(utils.search_movie_by_title, title)
+
+
+async def fuzzy_search_movie(query: str, threshold: int = 80) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(utils.fuzzy_search_movie, query, threshold)
+
+
+async def get_movies_from_chart(chart_type: str, limit: int = 5) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(utils.get_movies_from_chart, chart_type, limit)
+
+
+async def get_movies_by_genre(genre: str, limit: int = 5) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(utils.get_movies_by_genre, genre, limit)
+
+
+async def process_chat_message(message: str) -> str:
+    return await run_in_db_executor(utils.process_chat_message, message)
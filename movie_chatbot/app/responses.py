@@ -0,0 +1,23 @@
+"""
+JSON response class for the larger API payloads.
+
+With orjson installed, FastJSONResponse serializes through it: several times
+faster than the stdlib encoder, and it handles datetimes natively. Without
+it, this is the plain JSONResponse.
+"""
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
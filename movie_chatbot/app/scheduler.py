@@ -1,57 +1,154 @@
+"""
+Scheduled scrapes.
+
+Jobs live in a MongoDB job store, so every process that starts the scheduler
+(the scheduler service and any web worker with RUN_SCHEDULER set) sees the
+same schedule. Each of them may fire a job; run_exclusive() lets only one
+run it per slot, by holding a lease and recording every run in the
+`scheduler_runs` collection. scheduler_status() reads both collections, so
+it works whether or not this process runs the scheduler.
+
+Job functions are referenced by name (`app.scheduler:run_daily_scrape`) so
+the job store can serialize them.
+"""
 import time
 import logging
 import atexit
 import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
-from .scrapers.upcoming_movies_scraper import UpcomingMoviesScraper
-from .config import LOGGING_CONFIG
+from .config import (
+    configure_logging,
+    SCHEDULER_MISFIRE_GRACE_SECONDS,
+    SCHEDULER_JOB_LEASE_SECONDS,
+)
 from .database import get_mongo_client
+from .locks import MongoLease, make_owner_id
 
-# Configure logging
-logging.config.dictConfig(LOGGING_CONFIG)
 logger = logging.getLogger(__name__)
 
+JOBS_COLLECTION = 'scheduler_jobs'
+RUNS_COLLECTION = 'scheduler_runs'
+
+# job id -> add_job arguments
+SCHEDULED_JOBS = {
+    'daily_scrape': {
+        'func': 'app.scheduler:run_daily_scrape',
+        'trigger': 'cron',
+        'hour': 3,  # 3 AM
+        'minute': 0,
+        'name': 'Daily chart and upcoming scrape',
+    },
+}
+
 # Global scheduler instance
 scheduler = None
 
-# Initialize scraper instance
-global_scraper = UpcomingMoviesScraper()
+def run_exclusive(job_id: str, func: Callable[[], Any]) -> Optional[Any]:
+    """Run `func` for a scheduled job unless another process already is.
+
+    Runs that started within SCHEDULER_MISFIRE_GRACE_SECONDS count as this
+    slot's run, so a scheduler that wakes up late does not repeat it.
+    """
+    _, mongo_db, _ = get_mongo_client()
+    if mongo_db is None:
+        logger.error(f"MongoDB unavailable, skipping scheduled job {job_id}")
+        return None
+
+    runs = mongo_db[RUNS_COLLECTION]
+    owner = make_owner_id()
+    lease = MongoLease(mongo_db['locks'], f"scheduled:{job_id}", SCHEDULER_JOB_LEASE_SECONDS, owner)
+    if not lease.acquire():
+        logger.info(f"Scheduled job {job_id} is running on {(lease.holder() or {}).get('owner')}, skipping")
+        return None
+    try:
+        now = datetime.utcnow()
+        last = runs.find_one({'_id': job_id}, {'last_started_at': 1}) or {}
+        if last.get('last_started_at') and now - last['last_started_at'] < timedelta(seconds=SCHEDULER_MISFIRE_GRACE_SECONDS):
+            logger.info(f"Scheduled job {job_id} already ran at {last['last_started_at']}, skipping")
+            return None
+
+        runs.update_one(
+            {'_id': job_id},
+            {'$set': {'last_started_at': now, 'last_status': 'running', 'owner': owner}},
+            upsert=True
+        )
+        logger.info(f"Running scheduled job {job_id}")
+        start = time.perf_counter()
+        update = {}
+        try:
+            result = func()
+            update = {'last_status': 'ok', 'last_result': result, 'last_error': None}
+            return result
+        except Exception as e:
+            logger.error(f"Scheduled job {job_id} failed: {str(e)}", exc_info=True)
+            update = {'last_status': 'failed', 'last_result': None, 'last_error': str(e)}
+        finally:
+            update.update({'last_finished_at': datetime.utcnow(), 'last_duration_s': round(time.perf_counter() - start, 1)})
+            runs.update_one({'_id': job_id}, {'$set': update})
+    finally:
+        lease.release()
+
+def daily_scrape() -> Dict[str, Any]:
+    from .scraper import scrape_imdb_movies
+    from .jobs import scrape_upcoming_exclusive
+
+    charts = scrape_imdb_movies()
+    upcoming = scrape_upcoming_exclusive()
+    if upcoming is None:
+        raise RuntimeError(f"No upcoming calendar page could be fetched (charts: {charts})")
+    return {'charts': charts, 'upcoming': upcoming}
+
+def run_daily_scrape():
+    """Scrape the charts, then the upcoming calendars."""
+    return run_exclusive('daily_scrape', daily_scrape)
+
+def make_job_store():
+    """MongoDB job store, or None to fall back to memory."""
+    mongo_client, mongo_db, _ = get_mongo_client()
+    if mongo_client is None:
+        return None
+    from apscheduler.jobstores.mongodb import MongoDBJobStore
+    return MongoDBJobStore(database=mongo_db.name, collection=JOBS_COLLECTION, client=mongo_client)
 
 def init_scheduler():
     """Initialize and return the scheduler with jobs."""
     global scheduler
     if scheduler and scheduler.running:
         return scheduler
-        
-    scheduler = BackgroundScheduler()
-    
-    # Get MongoDB collection
-    _, _, movies_collection = get_mongo_client()
-    
-    # Add the job to run daily at 3 AM
-    scheduler.add_job(
-        func=lambda: global_scraper.scrape_and_store_movies(movies_collection),
-        trigger='cron',
-        hour=3,  # 3 AM
-        minute=0,
-        name='scrape_and_store_movies',
-        replace_existing=True
-    )
-    
+
+    job_store = make_job_store()
+    if job_store is None:
+        logger.warning("MongoDB unavailable, scheduling jobs in memory for this process only")
+    options = {
+        'job_defaults': {
+            'coalesce': True,  # Several missed runs fire once
+            'max_instances': 1,
+            'misfire_grace_time': SCHEDULER_MISFIRE_GRACE_SECONDS,
+        },
+    }
+    if job_store is not None:
+        options['jobstores'] = {'default': job_store}
+    scheduler = BackgroundScheduler(**options)
+
+    for job_id, job in SCHEDULED_JOBS.items():
+        scheduler.add_job(id=job_id, replace_existing=True, **job)
+
     # Handle shutdown
     atexit.register(shutdown_scheduler)
-    
+
     return scheduler
 
 def start_scheduler():
     """Start the scheduler in a separate thread."""
     global scheduler
     scheduler = init_scheduler()
-    
+
     if not scheduler.running:
         scheduler.start()
         logger.info("Scheduler started successfully.")
-    
+
     return scheduler
 
 def shutdown_scheduler():
@@ -61,6 +158,41 @@ def shutdown_scheduler():
         scheduler.shutdown()
         logger.info("Scheduler shut down successfully.")
 
+def _from_timestamp(value) -> Optional[datetime]:
+    # The MongoDB job store keeps next_run_time as a UTC epoch timestamp
+    return datetime.utcfromtimestamp(value) if value is not None else None
+
+def scheduler_status() -> Optional[List[Dict[str, Any]]]:
+    """Next and last run of every scheduled job; None if MongoDB is unavailable."""
+    _, mongo_db, _ = get_mongo_client()
+    if mongo_db is None:
+        return None
+
+    stored = {doc['_id']: doc for doc in mongo_db[JOBS_COLLECTION].find({}, {'next_run_time': 1})}
+    runs = {doc['_id']: doc for doc in mongo_db[RUNS_COLLECTION].find()}
+    running = mongo_db['locks'].find(
+        {'_id': {'$in': [f"scheduled:{job_id}" for job_id in SCHEDULED_JOBS]}, 'expires_at': {'$gt': datetime.utcnow()}}
+    )
+    holders = {lock['_id'].split(':', 1)[1]: lock['owner'] for lock in running}
+
+    status = []
+    for job_id, job in SCHEDULED_JOBS.items():
+        run = runs.get(job_id, {})
+        status.append({
+            'id': job_id,
+            'name': job['name'],
+            'scheduled': job_id in stored,
+            'next_run_time': _from_timestamp(stored.get(job_id, {}).get('next_run_time')),
+            'running_on': holders.get(job_id),
+            'last_started_at': run.get('last_started_at'),
+            'last_finished_at': run.get('last_finished_at'),
+            'last_status': run.get('last_status'),
+            'last_duration_s': run.get('last_duration_s'),
+            'last_result': run.get('last_result'),
+            'last_error': run.get('last_error'),
+        })
+    return status
+
 def run_scheduler():
     """Run the scheduler in the main thread (for testing)."""
     scheduler = start_scheduler()
@@ -72,6 +204,7 @@ def run_scheduler():
         shutdown_scheduler()
 
 if __name__ == "__main__":
+    configure_logging()
     # Start the scheduler without initial run
     logger.info("Starting scheduler...")
     run_scheduler()
@@ -1,33 +1,33 @@
-from bs4 import BeautifulSoup
-import requests
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import time
 import logging
 import re
-from urllib.parse import urljoin
-from .database import get_mongo_client
+from pymongo import UpdateOne
+from .database import get_mongo_client, BulkUpserter
+from .page_parser import extract_movie_fields, make_soup
+from .normalize import normalize_movie
+from .fetcher import Fetcher, make_parse_executor, UNCHANGED
+from .http_cache import make_session, cache_summary
+from .cache import invalidate_movie_caches
 from .config import (
-    REQUEST_DELAY,
-    IMDB_TOP_MOVIES_URL,
-    SCRAPER_USER_AGENT,
-    LOGGING_CONFIG
+    IMDB_BASE_URL,
+    CHART_REFRESH_TTL_HOURS,
+    CHART_REFRESH_DEFAULT_TTL_HOURS,
 )
 
-# Configure logging
-logging.config.dictConfig(LOGGING_CONFIG)
 logger = logging.getLogger(__name__)
 
 def get_http_session():
-    """Create a session with realistic browser headers."""
-    session = requests.Session()
+    """Create a session with realistic browser headers, backed by the HTTP cache."""
+    session = make_session()
     session.headers.update({
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.5',
         'Accept-Encoding': 'gzip, deflate, br',
         'Connection': 'keep-alive',
-        'Referer': 'https://www.imdb.com/',
+        'Referer': f'{IMDB_BASE_URL}/',
         'DNT': '1',
         'Upgrade-Insecure-Requests': '1',
         'Sec-Fetch-Dest': 'document',
@@ -37,360 +37,352 @@ def get_http_session():
     })
     return session
 
-def scrape_imdb_chart(chart_type='top'):
-    """Scrape movies from IMDB charts with updated selectors."""
-    charts = {
-        'top_250': {
-            'url': 'https://www.imdb.com/chart/top/',
-            'selector': 'li.ipc-metadata-list-summary-item',
-            'title_selector': 'h3.ipc-title__text',
-            'link_selector': 'a.ipc-title-link-wrapper',
-            'limit': 250,  # Top 250 movies
-            'source': 'imdb_top_250'
-        },
-        'popular': {
-            'url': 'https://www.imdb.com/chart/moviemeter/',
-            'selector': 'li.ipc-metadata-list-summary-item',
-            'title_selector': 'h3.ipc-title__text',
-            'link_selector': 'a.ipc-title-link-wrapper',
-            'limit': 100,  # Top 100 popular movies
-            'source': 'imdb_popular'
-        },
-        'trending': {
-            'url': 'https://www.imdb.com/chart/moviemeter/?ref_=nv_mv_mpm',
-            'selector': 'li.ipc-metadata-list-summary-item',
-            'title_selector': 'h3.ipc-title__text',
-            'link_selector': 'a.ipc-title-link-wrapper',
-            'limit': 50,  # Top 50 trending movies
-            'source': 'imdb_trending'
-        },
-        'action': {
-            'url': 'https://www.imdb.com/search/title/?genres=action&tags=action&title_type=feature&languages=en&count=100',
-            'selector': 'li.ipc-metadata-list-summary-item',
-            'title_selector': 'h3.ipc-title__text',
-            'link_selector': 'a.ipc-title-link-wrapper',
-            'limit': 100,  # Top 100 action movies
-            'source': 'imdb_action'
-        },
-        'comedy': {
-            'url': 'https://www.imdb.com/search/title/?genres=comedy&tags=comedy&title_type=feature&languages=en&count=100',
-            'selector': 'li.ipc-metadata-list-summary-item',
-            'title_selector': 'h3.ipc-title__text',
-            'link_selector': 'a.ipc-title-link-wrapper',
-            'limit': 100,  # Top 100 comedy movies
-            'source': 'imdb_comedy'
-        },
-        'horror': {
-            'url': 'https://www.imdb.com/search/title/?genres=horror&tags=horror&title_type=feature&languages=en&count=100',
-            'selector': 'li.ipc-metadata-list-summary-item',
-            'title_selector': 'h3.ipc-title__text',
-            'link_selector': 'a.ipc-title-link-wrapper',
-            'limit': 100,  # Top 100 horror movies
-            'source': 'imdb_horror'
-        }
+IMDB_ID_PATTERN = re.compile(r'title\/(tt\d+)\/?')
+
+def extract_imdb_id(url: str) -> Optional[str]:
+    """Return the tt-id from an IMDb title URL."""
+    imdb_match = IMDB_ID_PATTERN.search(url)
+    return imdb_match.group(1) if imdb_match else None
+
+def chart_key(imdb_id) -> Dict:
+    """Filter for a charted title's document.
+
+    Upcoming calendar entries share imdb ids but carry a region; charted
+    titles have none.
+    """
+    return {'imdb_id': imdb_id, 'region': None}
+
+# Chart pages scraped on every run
+CHARTS = {
+    'top_250': {
+        'url': f'{IMDB_BASE_URL}/chart/top/',
+        'selector': 'li.ipc-metadata-list-summary-item',
+        'title_selector': 'h3.ipc-title__text',
+        'link_selector': 'a.ipc-title-link-wrapper',
+        'limit': 250,  # Top 250 movies
+        'source': 'imdb_top_250'
+    },
+    'popular': {
+        'url': f'{IMDB_BASE_URL}/chart/moviemeter/',
+        'selector': 'li.ipc-metadata-list-summary-item',
+        'title_selector': 'h3.ipc-title__text',
+        'link_selector': 'a.ipc-title-link-wrapper',
+        'limit': 100,  # Top 100 popular movies
+        'source': 'imdb_popular'
+    },
+    'trending': {
+        'url': f'{IMDB_BASE_URL}/chart/moviemeter/?ref_=nv_mv_mpm',
+        'selector': 'li.ipc-metadata-list-summary-item',
+        'title_selector': 'h3.ipc-title__text',
+        'link_selector': 'a.ipc-title-link-wrapper',
+        'limit': 50,  # Top 50 trending movies
+        'source': 'imdb_trending'
+    },
+    'action': {
+        'url': f'{IMDB_BASE_URL}/search/title/?genres=action&tags=action&title_type=feature&languages=en&count=100',
+        'selector': 'li.ipc-metadata-list-summary-item',
+        'title_selector': 'h3.ipc-title__text',
+        'link_selector': 'a.ipc-title-link-wrapper',
+        'limit': 100,  # Top 100 action movies
+        'source': 'imdb_action'
+    },
+    'comedy': {
+        'url': f'{IMDB_BASE_URL}/search/title/?genres=comedy&tags=comedy&title_type=feature&languages=en&count=100',
+        'selector': 'li.ipc-metadata-list-summary-item',
+        'title_selector': 'h3.ipc-title__text',
+        'link_selector': 'a.ipc-title-link-wrapper',
+        'limit': 100,  # Top 100 comedy movies
+        'source': 'imdb_comedy'
+    },
+    'horror': {
+        'url': f'{IMDB_BASE_URL}/search/title/?genres=horror&tags=horror&title_type=feature&languages=en&count=100',
+        'selector': 'li.ipc-metadata-list-summary-item',
+        'title_selector': 'h3.ipc-title__text',
+        'link_selector': 'a.ipc-title-link-wrapper',
+        'limit': 100,  # Top 100 horror movies
+        'source': 'imdb_horror'
     }
+}
+
+def refresh_ttl(chart_types: List[str]) -> timedelta:
+    """How long a title's details stay fresh: the shortest TTL of its charts."""
+    hours = min(
+        (CHART_REFRESH_TTL_HOURS.get(chart_type, CHART_REFRESH_DEFAULT_TTL_HOURS) for chart_type in chart_types),
+        default=CHART_REFRESH_DEFAULT_TTL_HOURS
+    )
+    return timedelta(hours=hours)
+
+def parse_chart_page(html: str, chart: Dict) -> List[str]:
+    """Extract movie detail URLs from a chart page."""
+    soup = make_soup(html)
+    movie_links = []
 
-    if chart_type not in charts:
+    # Find all movie containers
+    movie_containers = soup.select(chart['selector'])
+    logger.info(f"Found {len(movie_containers)} movie containers")
+
+    # Extract movie links
+    for container in movie_containers[:chart['limit']]:
+        try:
+            # Try to find link element
+            link_elem = container.select_one(chart.get('link_selector', 'a'))
+            if not link_elem:
+                continue
+
+            # Get the href attribute
+            href = link_elem.get('href', '')
+            if not href or '/title/tt' not in href:
+                continue
+
+            # Clean and format the URL
+            full_url = f"{IMDB_BASE_URL}{href.split('?')[0]}"
+            if full_url not in movie_links:
+                movie_links.append(full_url)
+
+        except Exception as e:
+            logger.warning(f"Error processing movie container: {e}")
+            continue
+
+    logger.info(f"Found {len(movie_links)} valid movie links")
+    return movie_links
+
+def scrape_imdb_chart(chart_type='top', fetcher: Optional[Fetcher] = None):
+    """Scrape movies from IMDB charts with updated selectors."""
+    if chart_type not in CHARTS:
         logger.error(f"Invalid chart type: {chart_type}")
         return []
 
-    chart = charts[chart_type]
+    chart = CHARTS[chart_type]
     logger.info(f"Fetching {chart_type} chart from {chart['url']}")
-    
-    session = get_http_session()
+
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = Fetcher(get_http_session())
     try:
-        # Add delay to mimic human behavior
-        time.sleep(2)
-        
-        response = session.get(
-            chart['url'],
-            headers={'Referer': 'https://www.imdb.com/'},
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        movie_links = []
-        
-        # Find all movie containers
-        movie_containers = soup.select(chart['selector'])
-        logger.info(f"Found {len(movie_containers)} movie containers")
-        
-        # Extract movie links
-        for container in movie_containers[:chart['limit']]:
-            try:
-                # Try to find link element
-                link_elem = container.select_one(chart.get('link_selector', 'a'))
-                if not link_elem:
-                    continue
-                    
-                # Get the href attribute
-                href = link_elem.get('href', '')
-                if not href or '/title/tt' not in href:
-                    continue
-                    
-                # Clean and format the URL
-                full_url = f"https://www.imdb.com{href.split('?')[0]}"
-                if full_url not in movie_links:
-                    movie_links.append(full_url)
-                    
-            except Exception as e:
-                logger.warning(f"Error processing movie container: {e}")
-                continue
-        
-        logger.info(f"Found {len(movie_links)} valid movie links")
-        return movie_links
-        
+        response = fetcher.get(chart['url'], headers={'Referer': f'{IMDB_BASE_URL}/'})
+        return parse_chart_page(response.text, chart)
     except Exception as e:
         logger.error(f"Failed to scrape {chart_type} chart: {str(e)}", exc_info=True)
         return []
+    finally:
+        if owns_fetcher:
+            fetcher.close()
+            fetcher.session.close()
+
+def parse_movie_page(html: str, url: str, source: str = 'imdb', chart_types: List[str] = None) -> Optional[Dict]:
+    """Extract movie data from a downloaded title page.
+
+    Runs on the parse executor, so it must stay a module-level function that
+    only depends on its arguments.
 
-def scrape_movie_page(session, url: str, source: str = 'imdb', chart_type: str = None) -> Optional[Dict]:
-    """Scrape detailed movie data with robust error handling.
-    
     Args:
-        session: The HTTP session to use for requests
-        url: The URL of the movie page to scrape
+        html: The title page HTML
+        url: The URL of the movie page
         source: The source of the movie (e.g., 'imdb_top_250')
-        chart_type: The type of chart the movie was found in (e.g., 'top_250', 'popular')
+        chart_types: Every chart the movie was found in (e.g., ['top_250', 'popular'])
     """
     try:
-        logger.info(f"Scraping: {url}")
-        
         # Extract IMDb ID from URL
-        imdb_match = re.search(r'title\/(tt\d+)\/?', url)
-        if not imdb_match:
+        imdb_id = extract_imdb_id(url)
+        if not imdb_id:
             logger.error(f"Invalid IMDB URL: {url}")
             return None
-        imdb_id = imdb_match.group(1)
-        
-        # Make the HTTP request with retries
-        for attempt in range(3):
-            try:
-                response = session.get(url, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Referer': 'https://www.imdb.com/'
-                }, timeout=30)
-                response.raise_for_status()
-                break  # If successful, exit the retry loop
-            except Exception as e:
-                if attempt == 2:  # If this was the last attempt
-                    logger.error(f"Failed to fetch {url} after 3 attempts: {e}")
-                    return None
-                time.sleep(2)  # Wait before retrying
-        
-        # Parse the HTML response
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Helper function to safely get text from selector
-        def get_text(selector, attr='text', default=None):
-            try:
-                elem = soup.select_one(selector)
-                if not elem:
-                    return default
-                if attr == 'text':
-                    return elem.get_text(strip=True)
-                return elem.get(attr, default)
-            except Exception as e:
-                logger.debug(f"Error getting {selector}: {e}")
-                return default
-        
-        # Extract movie data with more robust selectors
-        title = get_text('h1[data-testid="hero__pageTitle"]')
-        if not title:  # Fallback for different page structure
-            title = get_text('h1')
-        
-        year = get_text('a[href*="releaseinfo"]')
-        if not year:  # Try alternative year selector
-            year = get_text('span[data-testid="title-details-releasedate"] a')
-        
-        rating = get_text('div[data-testid="hero-rating-bar__aggregate-rating__score"]')
-        if not rating:  # Try alternative rating selector
-            rating = get_text('span.sc-7ab21ed2-1.jGRxWM')
-        
-        plot = get_text('span[data-testid="plot-xl"]')
-        if not plot:  # Fallback to shorter plot
-            plot = get_text('span[data-testid="plot-l"]')
-        
-        # Try multiple genre selectors
-        genres = []
-        
-        # Try new genre selector (IMDB's current format)
-        genre_section = soup.find('div', {'class': 'ipc-chip-list'})
-        if genre_section:
-            genres = [g.get_text(strip=True) for g in genre_section.find_all('a')]
-            if genres:
-                logger.debug(f"Found genres using ipc-chip-list selector: {genres}")
-                
-        # Try genre selector in title block
-        if not genres:
-            title_block = soup.find('div', {'class': 'sc-52d569c6-0'})
-            if title_block:
-                genres = [g.get_text(strip=True) for g in title_block.find_all('a') if '/genres=' in g.get('href', '')]
-                if genres:
-                    logger.debug(f"Found genres using title block selector: {genres}")
-                    
-        # Try genre selector in title details
-        if not genres:
-            title_details = soup.find('div', {'data-testid': 'title-details-section'})
-            if title_details:
-                genres = [g.get_text(strip=True) for g in title_details.find_all('a') if '/genres=' in g.get('href', '')]
-                if genres:
-                    logger.debug(f"Found genres using title details selector: {genres}")
-                    
-        # Try genre selector in title story
-        if not genres:
-            title_story = soup.find('div', {'data-testid': 'storyline-genres'})
-            if title_story:
-                genres = [g.get_text(strip=True) for g in title_story.find_all('a')]
-                if genres:
-                    logger.debug(f"Found genres using storyline selector: {genres}")
-                    
-        # Try genre selector in title info
-        if not genres:
-            title_info = soup.find('div', {'data-testid': 'title-genres'})
-            if title_info:
-                genres = [g.get_text(strip=True) for g in title_info.find_all('a')]
-                if genres:
-                    logger.debug(f"Found genres using title info selector: {genres}")
-                    
-        # Clean up genres
-        genres = [g.lower().strip() for g in genres if g]
-        if not genres:
-            logger.warning(f"No genres found for {title}")
+
+        fields = extract_movie_fields(html)
+        title = fields['title']
+        if fields['genres']:
+            logger.info(f"Found genres for {title}: {fields['genres']}")
         else:
-            logger.info(f"Found genres for {title}: {genres}")
-        
-        # Get release date
-        release_date = None
-        release_info = soup.find('li', {'data-testid': 'title-details-releasedate'})
-        if release_info:
-            date_text = release_info.find('a').get_text(strip=True)
-            try:
-                # Try to parse date in format "Month DD, YYYY"
-                date_obj = datetime.strptime(date_text, '%B %d, %Y')
-                release_date = date_obj.strftime('%Y-%m-%d')
-                # Store only the year
-                movie['year'] = str(date_obj.year)
-            except ValueError:
-                logger.warning(f"Could not parse release date for {title}: {date_text}")
-        
-        director = get_text('a[href*="tt_ov_dr"]')
-        if not director:  # Fallback for director
-            director_elem = soup.find('a', {'data-testid': 'title-pc-principal-credit'})
-            if director_elem:
-                director = director_elem.get_text(strip=True)
-        
-        cast = [actor.get_text(strip=True) for actor in soup.select('a[data-testid="title-cast-item__actor"]')]
-        if not cast:  # Fallback for cast
-            cast = [a.get_text(strip=True) for a in soup.select('a[href*="/name/nm"][data-testid="title-cast-item__actor"]')]
-        
-        poster = get_text('img[data-testid="hero-media__poster"]', 'src')
-        if not poster:  # Fallback for poster
-            poster_elem = soup.find('img', {'class': 'ipc-image'})
-            if poster_elem:
-                poster = poster_elem.get('src')
+            logger.warning(f"No genres found for {title}")
         
         data = {
             'imdb_id': imdb_id,
             'title': title,
-            'year': year,
-            'rating': rating,
-            'plot': plot,
-            'genres': genres,
-            'director': director,
-            'cast': cast[:10],  # Limit to top 10 cast members
-            'poster': poster,
+            'year': fields.get('year'),
+            'rating': fields.get('rating'),
+            'plot': fields.get('plot'),
+            'genres': fields['genres'],
+            'director': fields.get('director'),
+            'cast': fields['cast'],  # Limited to the top 10 cast members
+            'poster': fields.get('poster'),
             'url': url,
             'source': source,  # e.g., 'imdb_top_250'
-            'chart_type': chart_type,  # e.g., 'top_250', 'popular', 'trending'
+            'chart_types': chart_types,  # e.g., ['top_250', 'popular']
             'last_updated': datetime.utcnow(),
             'scraped_at': datetime.utcnow(),
-            'release_date': release_date
+            'release_date': fields.get('release_date')
         }
         
-        return {k: v for k, v in data.items() if v}  # Remove None values
+        return normalize_movie({k: v for k, v in data.items() if v})  # Remove None values, type the rest
         
     except Exception as e:
-        logger.error(f"Error scraping {url}: {str(e)}", exc_info=True)
+        logger.error(f"Error parsing {url}: {str(e)}", exc_info=True)
         return None
 
-def scrape_imdb_movies():
-    """Main scraping function with enhanced logging and scheduling."""
+def scrape_movie_page(session, url: str, source: str = 'imdb', chart_types: List[str] = None) -> Optional[Dict]:
+    """Fetch and parse a single movie page.
+
+    Args:
+        session: The HTTP session to use for requests
+        url: The URL of the movie page to scrape
+        source: The source of the movie (e.g., 'imdb_top_250')
+        chart_types: Every chart the movie was found in (e.g., ['top_250', 'popular'])
+    """
+    logger.info(f"Scraping: {url}")
+    with Fetcher(session) as fetcher:
+        try:
+            response = fetcher.get(url)
+        except Exception as e:
+            logger.error(f"Failed to fetch {url} after {fetcher.max_retries} attempts: {e}")
+            return None
+    return parse_movie_page(response.text, url, source, chart_types)
+
+def scrape_imdb_movies(force_refresh: bool = False):
+    """Main scraping function with enhanced logging and scheduling.
+
+    Chart and detail pages are fetched concurrently under the shared rate
+    limiter; detail pages are parsed on a separate executor while the
+    results are written to MongoDB as they complete.
+
+    Chart pages are always fetched so rank membership stays current, but a
+    title's detail page is only fetched when its `last_updated` is older
+    than the refresh TTL of its charts, unless `force_refresh` is set.
+
+    Returns the run counts. Failures are logged and re-raised.
+    """
     try:
         logger.info("Starting IMDB scraping session")
+        start_time = time.perf_counter()
         
         _, _, movies_collection = get_mongo_client()
         session = get_http_session()
+        fetcher = Fetcher(session)
+        parse_executor = make_parse_executor()
         
         # Scrape all charts
         # Define all chart types including genres
         chart_types = ['top_250', 'popular', 'trending', 'action', 'comedy', 'horror']
-        total_saved = 0
-        total_errors = 0
         
-        for chart_type in chart_types:
-            try:
-                # For genre-specific charts, use the source as the chart type
-                source = chart_type if chart_type in ['action', 'comedy', 'horror'] else chart_type
-                
-                logger.info(f"Processing {chart_type} chart...")
-                movie_urls = scrape_imdb_chart(chart_type)
-                if not movie_urls:
-                    logger.warning(f"No movies found in {chart_type} chart")
+        # Collect every chart first so each title is fetched once per run,
+        # however many charts it appears in
+        titles = {}  # imdb_id -> {'url': ..., 'chart_types': [...]}
+        chart_members = {}  # chart_type -> imdb_ids, for charts fetched this run
+        chart_urls = {CHARTS[chart_type]['url']: chart_type for chart_type in chart_types}
+        for url, response in fetcher.fetch_all(chart_urls, headers={'Referer': f'{IMDB_BASE_URL}/'}):
+            chart_type = chart_urls[url]
+            if response is None:
+                continue
+            movie_urls = parse_chart_page(response.text, CHARTS[chart_type])
+            if not movie_urls:
+                logger.warning(f"No movies found in {chart_type} chart")
+                continue
+            
+            members = chart_members[chart_type] = set()
+            for movie_url in movie_urls:
+                imdb_id = extract_imdb_id(movie_url)
+                if not imdb_id or imdb_id in members:
+                    continue
+                members.add(imdb_id)
+                entry = titles.setdefault(imdb_id, {'url': movie_url, 'chart_types': []})
+                entry['chart_types'].append(chart_type)
+            logger.info(f"{chart_type}: {len(members)} movies")
+        
+        chart_entries = sum(len(members) for members in chart_members.values())
+        logger.info(f"Found {chart_entries} chart entries covering {len(titles)} unique titles")
+        
+        # When each stored title was last refreshed
+        last_updated = {
+            doc['imdb_id']: doc.get('last_updated') for doc in
+            movies_collection.find(chart_key({'$in': list(titles)}), {'imdb_id': 1, 'last_updated': 1, '_id': 0})
+        }
+        now = datetime.utcnow()
+        fresh = {
+            imdb_id for imdb_id, updated in last_updated.items()
+            if not force_refresh and isinstance(updated, datetime)
+            and now - updated < refresh_ttl(titles[imdb_id]['chart_types'])
+        }
+        jobs = [
+            (entry['url'], (f"imdb_{entry['chart_types'][0]}", entry['chart_types']))
+            for imdb_id, entry in titles.items() if imdb_id not in fresh
+        ]
+        logger.info(f"{len(fresh)} titles within their refresh TTL, fetching {len(jobs)} detail pages")
+        
+        # Pages identical to the cached copy are only skipped for titles we
+        # already have; a wiped collection must still be repopulated
+        skip_unchanged = {titles[imdb_id]['url'] for imdb_id in last_updated}
+        parse_errors = 0
+        unchanged = 0
+        
+        # Fetch and parse detail pages concurrently, batching the upserts
+        with BulkUpserter(movies_collection) as upserter:
+            # Fresh titles only get their chart membership refreshed
+            for imdb_id in fresh:
+                upserter.add(UpdateOne(
+                    chart_key(imdb_id),
+                    {'$set': {'chart_types': titles[imdb_id]['chart_types']}, '$unset': {'chart_type': ''}}
+                ))
+            
+            for i, (url, (source, movie_charts), movie_data) in enumerate(
+                    fetcher.pipeline(jobs, parse_movie_page, parse_executor, skip_unchanged), 1):
+                if movie_data is UNCHANGED:
+                    # Details unchanged: refresh chart membership and mark
+                    # the title as checked so it waits out its TTL again
+                    unchanged += 1
+                    upserter.add(UpdateOne(
+                        chart_key(extract_imdb_id(url)),
+                        {'$set': {'chart_types': movie_charts, 'last_updated': datetime.utcnow()},
+                         '$unset': {'chart_type': ''}}
+                    ))
+                    continue
+                if not movie_data:
+                    parse_errors += 1
                     continue
                 
-                saved_count = 0
-                error_count = 0
-                
-                # Process each movie URL
-                for i, url in enumerate(movie_urls, 1):
-                    try:
-                        # Use the source directly for genre-specific charts
-                        source = f'imdb_{chart_type}'
-                        
-                        movie_data = scrape_movie_page(
-                            session=session,
-                            url=url,
-                            source=source,
-                            chart_type=chart_type  # Pass the chart_type to scrape_movie_page
-                        )
-                        if not movie_data:
-                            error_count += 1
-                            continue
-                        
-                        # Update or insert movie
-                        result = movies_collection.update_one(
-                            {'imdb_id': movie_data['imdb_id']},
-                            {'$set': movie_data},
-                            upsert=True
-                        )
-                        
-                        if result.upserted_id:
-                            saved_count += 1
-                        
-                        logger.debug(f"Processed {i}/{len(movie_urls)} from {chart_type}: {movie_data.get('title')}")
-                        
-                        # Be nice to IMDB
-                        time.sleep(1.5)  # Slightly longer delay to avoid rate limiting
-                        
-                    except Exception as e:
-                        error_count += 1
-                        logger.error(f"Error processing {url}: {str(e)}")
-                
-                logger.info(f"{chart_type}: Saved {saved_count}, Errors {error_count}")
-                total_saved += saved_count
-                total_errors += error_count
+                # Update or insert movie; chart_types replaces the old
+                # single chart_type field
+                upserter.add(UpdateOne(
+                    chart_key(movie_data['imdb_id']),
+                    {'$set': movie_data, '$unset': {'chart_type': ''}},
+                    upsert=True
+                ))
                 
-            except Exception as e:
-                logger.error(f"Failed to process {chart_type} chart: {str(e)}")
-                continue
+                logger.debug(f"Processed {i}/{len(jobs)} ({', '.join(movie_charts)}): {movie_data.get('title')}")
+        
+        # Drop membership for titles that left a chart refreshed this run
+        for chart_type, members in chart_members.items():
+            movies_collection.update_many(
+                {'chart_types': chart_type, 'imdb_id': {'$nin': list(members)}},
+                {'$pull': {'chart_types': chart_type}}
+            )
         
-        logger.info(f"Scraping complete. Total saved: {total_saved}, Total errors: {total_errors}")
+        logger.info(
+            f"Scraping complete in {time.perf_counter() - start_time:.1f}s. "
+            f"Fetched {len(jobs)} pages for {chart_entries} chart entries ({len(fresh)} still fresh). "
+            f"Saved: {upserter.inserted}, Updated: {upserter.updated}, Unchanged pages: {unchanged}, "
+            f"Errors: {parse_errors + upserter.errors} ({upserter.batches} bulk batches)"
+        )
+        summary = cache_summary(session)
+        if summary:
+            logger.info(summary)
+        invalidate_movie_caches()
+        return {
+            'charts': len(chart_members),
+            'chart_entries': chart_entries,
+            'fetched': len(jobs),
+            'fresh': len(fresh),
+            'inserted': upserter.inserted,
+            'updated': upserter.updated,
+            'unchanged_pages': unchanged,
+            'errors': parse_errors + upserter.errors,
+        }
         
     except Exception as e:
         logger.error(f"Scraping failed: {str(e)}", exc_info=True)
+        raise
     finally:
+        if 'fetcher' in locals():
+            fetcher.close()
+        if 'parse_executor' in locals():
+            parse_executor.shutdown(wait=True)
         if 'session' in locals():
-            session.close()
\ No newline at end of file
+            session.close()
@@ -1,20 +1,114 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 import time
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import PyMongoError
-from app.config import MONGODB_URL, MONGODB_DB
+from app.config import (
+    MONGODB_URL,
+    MONGODB_DB,
+    IMDB_BASE_URL,
+    SCRAPER_DIAGNOSTICS,
+    UPCOMING_REGIONS,
+    UPCOMING_CONTENT_TYPES,
+)
+from app.database import BulkUpserter
+from app.fetcher import Fetcher, make_parse_executor, UNCHANGED
+from app.http_cache import make_session, cache_summary
+from app.page_parser import make_soup
+from app.normalize import normalize_date, normalize_movie, normalize_year
+from app.scraper import extract_imdb_id
 from app.utils import get_mongo_client
+from app.cache import invalidate_movie_caches
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _dump(label: str, node) -> None:
+    """Log the start of a subtree's HTML when diagnostics are on.
+
+    The tree is only serialized when SCRAPER_DIAGNOSTICS is set and DEBUG
+    is enabled for this logger.
+    """
+    if SCRAPER_DIAGNOSTICS and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"{label}: {str(node)[:500]}")
+
+
+def calendar_url(region: str, content_type: str) -> str:
+    return f"{IMDB_BASE_URL}/calendar/?region={region}&type={content_type}"
+
+
+def parse_calendar(html: str, region: str = 'US', content_type: str = 'MOVIE') -> Tuple[List[dict], dict]:
+    """Extract normalized upcoming movies from an IMDb calendar page.
+
+    Items are identified by the IMDb id in their link. Returns the movies
+    and a summary of what was found and skipped.
+    """
+    soup = make_soup(html)
+    date_headers = soup.find_all('h3', class_='ipc-title__text')
+    summary = {'dates': len(date_headers), 'movies': 0, 'skipped_sections': 0, 'skipped_items': 0, 'undated': 0}
+    current_year = datetime.now().year
+    movies = []
+
+    for header in date_headers:
+        release_date = header.text.strip()
+
+        # Find the parent section
+        section = header.find_parent('section')
+        movie_list = section.find('ul', class_='ipc-metadata-list') if section else None
+        if not movie_list:
+            logger.debug(f"No movie list found for date: {release_date}")
+            summary['skipped_sections'] += 1
+            continue
+        _dump(f"Section for {release_date}", section)
+
+        # Headers without a year are for the current year
+        release = normalize_date(release_date) or normalize_date(f"{release_date}, {current_year}")
+        if release is None:
+            logger.warning(f"Could not parse release date: {release_date}")
+
+        for item in movie_list.find_all('li', class_='ipc-metadata-list-summary-item'):
+            # Find the title link
+            title_link = item.find('a', class_='ipc-metadata-list-summary-item__t')
+            imdb_id = extract_imdb_id(title_link.get('href', '')) if title_link else None
+            if not imdb_id:
+                _dump(f"Item without a title link for {release_date}", item)
+                summary['skipped_items'] += 1
+                continue
+
+            # Extract title and year from the text
+            title_text = title_link.text.strip()
+            title = title_text.split('(')[0].strip()
+            year = normalize_year(title_text.split('(')[1].split(')')[0]) if '(' in title_text else None
+
+            movies.append(normalize_movie({
+                "imdb_id": imdb_id,
+                "region": region,
+                "content_type": content_type,
+                "title": title,
+                "year": year,
+                "url": f"{IMDB_BASE_URL}/title/{imdb_id}/",
+                "last_updated": datetime.utcnow(),
+                "release_date": release,
+                "type": 'upcoming'
+            }))
+            if release is None:
+                summary['undated'] += 1
+
+    summary['movies'] = len(movies)
+    return movies, summary
+
+
+def parse_calendar_page(html: str, url: str, region: str, content_type: str) -> Tuple[List[dict], dict]:
+    """Fetcher.pipeline entry point for one calendar page."""
+    return parse_calendar(html, region, content_type)
+
+
 class UpcomingMoviesScraper:
-    def __init__(self):
-        self.base_url = "https://www.imdb.com/calendar/?region=us"
-        self.session = requests.Session()
+    def __init__(self, regions: List[str] = None, content_types: List[str] = None):
+        self.regions = [region.upper() for region in (regions or UPCOMING_REGIONS)]
+        self.content_types = [kind.upper() for kind in (content_types or UPCOMING_CONTENT_TYPES)]
+        self.session = make_session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -22,123 +116,121 @@ class UpcomingMoviesScraper:
             'Accept-Encoding': 'gzip, deflate, br'
         })
 
-    def scrape_and_store_movies(self, movies_collection) -> None:
-        """Scrape upcoming movies from IMDb and store them in MongoDB"""
+    def calendar_pages(self) -> List[Tuple[str, Tuple[str, str]]]:
+        """(url, (region, content_type)) for every calendar page to fetch."""
+        return [
+            (calendar_url(region, kind), (region, kind))
+            for region in self.regions for kind in self.content_types
+        ]
+
+    def scrape_and_store_movies(self, movies_collection, progress=None) -> Optional[dict]:
+        """Scrape the upcoming calendars from IMDb and store them in MongoDB.
+
+        Every region/content type page is fetched concurrently under the
+        shared rate limit. Movies are keyed by (imdb_id, region).
+
+        `progress`, if given, is called with a dict of counters as the
+        scrape advances. Returns the run counts, or None if no calendar
+        page could be fetched.
+        """
+        report = progress or (lambda update: None)
         try:
             # Check if collection is valid
             if movies_collection is None:
                 logger.error("Invalid MongoDB collection")
-                return
-
-            # Make request to IMDb calendar page
-            response = self.session.get(self.base_url)
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch IMDb calendar page: {response.status_code}")
-                return
-
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            logger.info(f"HTML content length: {len(response.text)}")
-            
-            # Find all date headers
-            date_headers = soup.find_all('h3', class_='ipc-title__text')
-            logger.info(f"Found {len(date_headers)} date headers")
-            
-            # Log the first few date headers for debugging
-            for i, header in enumerate(date_headers[:3]):
-                logger.info(f"Header {i+1} content: {header.text.strip()}")
-                logger.info(f"Header {i+1} HTML: {header.prettify()[:200]}...")
-            
-            total_movies = 0
-            movies_saved = 0
-            
-            for header in date_headers:
-                # Get the date text
-                release_date = header.text.strip()
-                logger.info(f"Processing movies for date: {release_date}")
-                
-                # Find the parent section
-                section = header.find_parent('section')
-                if not section:
-                    logger.warning(f"No section found for date: {release_date}")
-                    continue
-                    
-                # Log section structure for debugging
-                logger.info(f"Section HTML for date {release_date}: {section.prettify()[:500]}...")
-                
-                # Find the movie list
-                movie_list = section.find('ul', class_='ipc-metadata-list')
-                if not movie_list:
-                    logger.warning(f"No movie list found for date: {release_date}")
-                    continue
-                    
-                # Log movie list structure for debugging
-                logger.info(f"Movie list HTML for date {release_date}: {movie_list.prettify()[:500]}...")
-                
-                # Find all movie items in this section
-                movie_items = movie_list.find_all('li', class_='ipc-metadata-list-summary-item')
-                total_movies += len(movie_items)
-                logger.info(f"Found {len(movie_items)} movies for date: {release_date}")
-                
-                for item in movie_items:
-                    # Find the title link
-                    title_link = item.find('a', class_='ipc-metadata-list-summary-item__t')
-                    if not title_link:
-                        logger.warning(f"No title link found in item for date: {release_date}")
-                        continue
-                        
-                    # Log movie item structure for debugging
-                    logger.info(f"Movie item HTML: {item.prettify()[:500]}...")
-                        
-                    # Extract title and year from the text
-                    title_text = title_link.text.strip()
-                    title = title_text.split('(')[0].strip()
-                    year = title_text.split('(')[1].split(')')[0] if '(' in title_text else None
-                    
-                    # Get URL
-                    url = f"https://www.imdb.com{title_link.get('href')}"
-                    
-                    # Create movie dictionary with proper date format
-                    try:
-                        # Try to parse the date string
-                        date_parts = release_date.split()
-                        if len(date_parts) >= 2:
-                            month = date_parts[0]
-                            day = date_parts[1]
-                            year = date_parts[2] if len(date_parts) > 2 else datetime.now().year
-                            formatted_date = f"{month} {day}, {year}"
+                return None
+
+            pages = self.calendar_pages()
+            report({'stage': 'fetching', 'pages_total': len(pages), 'pages_done': 0, 'movies': 0})
+
+            # A page identical to last run's needs no parse or write, as long
+            # as that region's results are still stored
+            skip_unchanged = {
+                url for url, (region, _) in pages
+                if movies_collection.find_one({'type': 'upcoming', 'region': region}, {'_id': 1})
+            }
+
+            start = time.perf_counter()
+            movies: Dict[Tuple[str, str], dict] = {}
+            totals = {'pages': len(pages), 'unchanged_pages': 0, 'failed_pages': 0,
+                      'dates': 0, 'skipped_items': 0, 'undated': 0, 'duplicates': 0}
+
+            # Calendar pages are few, so they are parsed on one thread; the
+            # scrape also runs inside the web process, which must not fork
+            parse_executor = make_parse_executor(0)
+            try:
+                with Fetcher(self.session) as fetcher:
+                    for pages_done, (url, (region, kind), result) in enumerate(
+                            fetcher.pipeline(pages, parse_calendar_page, parse_executor, skip_unchanged), 1):
+                        if result is UNCHANGED:
+                            totals['unchanged_pages'] += 1
+                        elif result is None:
+                            totals['failed_pages'] += 1
                         else:
-                            formatted_date = release_date
-                    except Exception as e:
-                        logger.error(f"Error formatting date {release_date}: {str(e)}")
-                        formatted_date = release_date
-
-                    movie = {
-                        "title": title,
-                        "year": year,
-                        "url": url,
-                        "created_at": datetime.utcnow().isoformat(),
-                        "last_updated": datetime.utcnow().isoformat(),
-                        "release_date": formatted_date,
-                        "type": 'upcoming'
-                    }
-                    
-                    # Store or update movie
-                    existing_movie = movies_collection.find_one({'title': movie['title'], 'type': 'upcoming'})
-                    if existing_movie:
-                        movies_collection.update_one(
-                            {'_id': existing_movie['_id']},
-                            {'$set': movie}
-                        )
-                        logger.info(f"Updated movie: {title} for date: {formatted_date}")
-                    else:
-                        movies_collection.insert_one(movie)
-                        logger.info(f"Stored new movie: {title} for date: {formatted_date}")
-                        movies_saved += 1
-            
-            logger.info(f"Total movies processed: {total_movies}")
-            logger.info(f"Movies saved/updated: {movies_saved}")
-            
+                            page_movies, summary = result
+                            totals['dates'] += summary['dates']
+                            totals['skipped_items'] += summary['skipped_items']
+                            totals['undated'] += summary['undated']
+                            for movie in page_movies:
+                                key = (movie['imdb_id'], region)
+                                if key in movies:
+                                    # Listed under several dates or content types
+                                    totals['duplicates'] += 1
+                                    continue
+                                movies[key] = movie
+                        report({'pages_done': pages_done, 'movies': len(movies)})
+            finally:
+                parse_executor.shutdown(wait=True)
+            parsed = time.perf_counter()
+
+            if totals['failed_pages'] == len(pages):
+                logger.error(f"Failed to fetch any of {len(pages)} IMDb calendar pages")
+                return None
+            if totals['unchanged_pages'] == len(pages):
+                logger.info(f"Calendar pages unchanged, skipping parse. {cache_summary(self.session)}")
+                report({'stage': 'done'})
+                return {'unchanged_page': True}
+
+            report({'stage': 'writing', 'movies': len(movies)})
+            with BulkUpserter(movies_collection) as upserter:
+                for (imdb_id, region), movie in movies.items():
+                    # Store or update movie in one round-trip, batched
+                    upserter.add(UpdateOne(
+                        {'imdb_id': imdb_id, 'region': region},
+                        {'$set': movie, '$setOnInsert': {'created_at': datetime.utcnow()}},
+                        upsert=True
+                    ))
+
+            # Documents from before upcoming movies were keyed by region
+            legacy = movies_collection.delete_many({'type': 'upcoming', 'region': {'$exists': False}}).deleted_count
+            if legacy:
+                logger.info(f"Removed {legacy} title-keyed upcoming movies")
+
+            logger.info(
+                f"Upcoming scrape: {len(pages)} pages ({', '.join(self.regions)} x {', '.join(self.content_types)}; "
+                f"{totals['unchanged_pages']} unchanged, {totals['failed_pages']} failed), "
+                f"{totals['dates']} dates, {len(movies)} movies ({totals['duplicates']} duplicates, "
+                f"{totals['skipped_items']} items skipped, {totals['undated']} undated); "
+                f"saved {upserter.inserted}, updated {upserter.updated}, unchanged {upserter.unchanged}, "
+                f"errors {upserter.errors}; fetch and parse {(parsed - start) * 1000:.0f} ms, "
+                f"write {(time.perf_counter() - parsed) * 1000:.0f} ms"
+            )
+            http_summary = cache_summary(self.session)
+            if http_summary:
+                logger.info(http_summary)
+            invalidate_movie_caches()
+            report({'stage': 'done'})
+            return {
+                'pages': len(pages),
+                'unchanged_pages': totals['unchanged_pages'],
+                'failed_pages': totals['failed_pages'],
+                'movies': len(movies),
+                'inserted': upserter.inserted,
+                'updated': upserter.updated,
+                'unchanged': upserter.unchanged,
+                'errors': upserter.errors,
+            }
+
         except Exception as e:
             logger.error(f"Error scraping movies: {str(e)}", exc_info=True)
             raise
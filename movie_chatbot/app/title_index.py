@@ -0,0 +1,191 @@
+"""
+Process-resident title index used by the chatbot's fuzzy title lookup.
+
+Titles are normalized and split into character trigrams. A lookup only scores
+the handful of titles that share the most trigrams with the query instead of
+running fuzzywuzzy over the whole collection.
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from .config import TITLE_INDEX_TTL_SECONDS, TITLE_INDEX_MAX_CANDIDATES
+from .database import get_mongo_client
+from .normalize import normalize_title
+
+logger = logging.getLogger(__name__)
+
+# Trigrams present in more than this share of titles carry almost no signal
+# ("the", " th", ...) and are skipped when rarer ones are available.
+STOP_GRAM_RATIO = 0.2
+
+
+def trigrams(key: str) -> List[str]:
+    """Return the distinct padded trigrams of a normalized title."""
+    padded = f" {key} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class TitleIndex:
+    """Trigram inverted index over movie titles."""
+
+    def __init__(self, max_candidates: int = TITLE_INDEX_MAX_CANDIDATES):
+        self.max_candidates = max_candidates
+        # (titles, gram_counts, exact, postings), replaced as a whole on rebuild
+        self._data = ([], [], {}, {})
+        self._built_at: Optional[float] = None
+        self._stale = True
+        self._invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data[0])
+
+    @property
+    def built(self) -> bool:
+        return self._built_at is not None
+
+    def build(self, titles: Iterable[str]) -> None:
+        """Rebuild the index from an iterable of titles."""
+        # An invalidation during the build leaves the new index stale
+        invalidations = self._invalidations
+        new_titles = []
+        gram_counts = []
+        exact = {}
+        postings = defaultdict(list)
+
+        for title in titles:
+            key = normalize_title(title)
+            if not key or key in exact:
+                continue
+            idx = len(new_titles)
+            new_titles.append(title)
+            exact[key] = idx
+            grams = trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(idx)
+
+        # Swap the structures in one step so concurrent readers never see a
+        # half-built index.
+        self._data = (new_titles, gram_counts, exact, dict(postings))
+        self._built_at = time.monotonic()
+        self._stale = self._invalidations != invalidations
+
+    def invalidate(self) -> None:
+        """Mark the index stale so the next lookup reloads it."""
+        self._invalidations += 1
+        self._stale = True
+
+    def needs_refresh(self, ttl_seconds: int = TITLE_INDEX_TTL_SECONDS) -> bool:
+        if self._stale or self._built_at is None:
+            return True
+        return time.monotonic() - self._built_at > ttl_seconds
+
+    def _candidates(self, data, key: str) -> List[int]:
+        titles, gram_counts, _, postings = data
+        stop_limit = max(1, int(len(titles) * STOP_GRAM_RATIO))
+
+        lists = [postings[gram] for gram in trigrams(key) if gram in postings]
+        rare = [ids for ids in lists if len(ids) <= stop_limit]
+        if rare:
+            lists = rare
+
+        shared = defaultdict(int)
+        for ids in lists:
+            for idx in ids:
+                shared[idx] += 1
+
+        # Favour titles that are mostly covered by the query: chat messages
+        # usually wrap the title in extra words.
+        return heapq.nlargest(
+            self.max_candidates,
+            shared,
+            key=lambda idx: shared[idx] * shared[idx] / gram_counts[idx]
+        )
+
+    def candidates(self, query: str) -> List[str]:
+        """Return the titles sharing the most trigrams with the query."""
+        data = self._data
+        key = normalize_title(query)
+        if not key:
+            return []
+        return [data[0][idx] for idx in self._candidates(data, key)]
+
+    def search(self, query: str, threshold: int = 80) -> Optional[str]:
+        """Return the best matching title scoring at least `threshold`."""
+        data = self._data
+        titles, _, exact, _ = data
+        key = normalize_title(query)
+        if not key:
+            return None
+
+        exact_idx = exact.get(key)
+        if exact_idx is not None:
+            return titles[exact_idx]
+
+        choices = {idx: titles[idx] for idx in self._candidates(data, key)}
+        if not choices:
+            return None
+
+        # Imported on first fuzzy lookup; exact and trigram hits never need it
+        from fuzzywuzzy import process
+        best_match = process.extractOne(query, choices, score_cutoff=threshold)
+        if best_match:
+            return best_match[0]
+        return None
+
+
+# Shared index for the web process
+title_index = TitleIndex()
+_refresh_lock = threading.Lock()
+
+
+def refresh_title_index() -> TitleIndex:
+    """Reload the shared index from MongoDB."""
+    _, _, movies_collection = get_mongo_client()
+    if movies_collection is None:
+        return title_index
+    start = time.perf_counter()
+    title_index.build(
+        movie["title"]
+        for movie in movies_collection.find({"title": {"$exists": True}}, {"title": 1, "_id": 0})
+        if movie.get("title")
+    )
+    logger.info(f"Title index built with {len(title_index)} titles in {time.perf_counter() - start:.2f}s")
+    return title_index
+
+
+def _refresh_in_background() -> None:
+    try:
+        refresh_title_index()
+    except Exception as e:
+        logger.error(f"Title index rebuild failed: {str(e)}", exc_info=True)
+    finally:
+        _refresh_lock.release()
+
+
+def get_title_index() -> TitleIndex:
+    """Return the shared index, reloading it if stale or expired.
+
+    Only the first build blocks lookups. After that a stale index keeps
+    answering while one background thread rebuilds it.
+    """
+    from .cache import check_scrape_generation
+    check_scrape_generation()
+    if not title_index.needs_refresh():
+        return title_index
+    if not title_index.built:
+        with _refresh_lock:
+            if not title_index.built:
+                refresh_title_index()
+    elif _refresh_lock.acquire(blocking=False):
+        threading.Thread(target=_refresh_in_background, name="title-index", daemon=True).start()
+    return title_index
+
+
+def invalidate_title_index() -> None:
+    """Called when a scrape finishes writing so new titles are picked up."""
+    title_index.invalidate()
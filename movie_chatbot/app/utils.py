@@ -1,17 +1,19 @@
 import logging
-from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, timedelta
-import atexit
 from typing import Dict, Any, List, Optional
-from fuzzywuzzy import process
-from .scraper import scrape_imdb_movies
-from .config import SCRAPER_INTERVAL_MINUTES, LOGGING_CONFIG
+from .title_index import get_title_index
+from .cache import TTLCache, MISSING
+from .intents import classify, best_intent, has_title_words
+from .normalize import genre_key, genre_prefix_query, genre_query, normalize_title
+from .config import CHAT_CACHE_TTL_SECONDS, CHAT_CACHE_MAX_ENTRIES
 from .database import get_mongo_client
 
-# Configure logging
-logging.config.dictConfig(LOGGING_CONFIG)
 logger = logging.getLogger(__name__)
 
+# Answers to chart/genre/latest queries, keyed by resolved intent. Cleared by
+# the scrapers when they finish writing.
+chat_response_cache = TTLCache('chat_responses', CHAT_CACHE_MAX_ENTRIES, CHAT_CACHE_TTL_SECONDS)
+
 
 
 
@@ -21,35 +23,48 @@ def is_database_populated() -> bool:
     """Check if movies exist in database."""
     try:
         _, _, movies_collection = get_mongo_client()
-        return movies_collection.count_documents({}) > 0
+        return movies_collection.find_one({}, {"_id": 1}) is not None
     except Exception as e:
         logger.error(f"Database check failed: {str(e)}")
         return False
 
+def title_query(title: str) -> Dict[str, Any]:
+    return {"title_key": normalize_title(title)}
+
 def search_movie_by_title(title: str) -> Optional[Dict[str, Any]]:
-    """Exact match search (case-insensitive)."""
+    """Exact match search on the normalized title (case and accent insensitive)."""
     try:
+        query = title_query(title)
+        if not query["title_key"]:
+            return None
         _, _, movies_collection = get_mongo_client()
-        return movies_collection.find_one(
-            {"title": {"$regex": f"^{title}$", "$options": "i"}}
-        )
+        return movies_collection.find_one(query)
     except Exception as e:
         logger.error(f"Title search failed: {str(e)}")
         return None
 
 def fuzzy_search_movie(query: str, threshold: int = 80) -> Optional[Dict[str, Any]]:
-    """Fuzzy match movie titles."""
+    """Fuzzy match movie titles against the in-memory title index."""
     try:
-        _, _, movies_collection = get_mongo_client()
-        all_titles = [movie["title"] for movie in movies_collection.find({}, {"title": 1})]
-        best_match = process.extractOne(query, all_titles)
-        if best_match and best_match[1] >= threshold:
-            return search_movie_by_title(best_match[0])
+        best_match = get_title_index().search(query, threshold)
+        if best_match:
+            return search_movie_by_title(best_match)
         return None
     except Exception as e:
         logger.error(f"Fuzzy search failed: {str(e)}")
         return None
 
+# Map user-friendly chart names to database values
+CHART_MAPPING = {
+    'top': 'top_250',
+    'popular': 'popular',
+    'trending': 'trending'
+}
+
+def chart_query(chart_type: str) -> Dict[str, Any]:
+    # Use the mapped value or the original if not found
+    return {"chart_types": CHART_MAPPING.get(chart_type.lower(), chart_type)}
+
 def get_movies_from_chart(chart_type: str, limit: int = 5) -> List[Dict[str, Any]]:
     """Get movies by their original chart.
     
@@ -59,20 +74,7 @@ def get_movies_from_chart(chart_type: str, limit: int = 5) -> List[Dict[str, Any
     """
     try:
         _, _, movies_collection = get_mongo_client()
-        
-        # Map user-friendly chart names to database values
-        chart_mapping = {
-            'top': 'top_250',
-            'popular': 'popular',
-            'trending': 'trending'
-        }
-        
-        # Use the mapped value or the original if not found
-        db_chart_type = chart_mapping.get(chart_type.lower(), chart_type)
-        
-        return list(movies_collection.find(
-            {"chart_type": db_chart_type}
-        ).limit(limit))
+        return list(movies_collection.find(chart_query(chart_type)).sort("rating", -1).limit(limit))
     except Exception as e:
         logger.error(f"Chart query failed for {chart_type}: {str(e)}")
         return []
@@ -82,13 +84,15 @@ def get_movies_by_genre(genre: str, limit: int = 5) -> List[Dict[str, Any]]:
     try:
         _, _, movies_collection = get_mongo_client()
         
-        # Clean the genre input
-        search_genre = genre.lower().strip()
+        # Exact match on the stored genre keys uses the (genre_keys, rating) index
+        search_key = genre_key(genre)
+        if not search_key:
+            return []
+        movies = list(movies_collection.find(genre_query(genre)).sort("rating", -1).limit(limit))
         
-        # Try partial matches using regex
-        movies = list(movies_collection.find(
-            {"genres": {"$regex": f".*{search_genre}.*", "$options": "i"}}
-        ).limit(limit))
+        # Fall back to a prefix match ("sci" finds "sci fi")
+        if not movies:
+            movies = list(movies_collection.find(genre_prefix_query(genre)).sort("rating", -1).limit(limit))
         
         logger.info(f"Genre search for '{genre}' found {len(movies)} movies")
         return movies
@@ -170,6 +174,46 @@ def format_movie_list(movies: List[Dict[str, Any]]) -> str:
     return "\n\n".join(formatted_movies)
 
 # --- Chat Processing ---
+def cached_chat_answer(key: tuple, build) -> str:
+    """Return the cached answer for a resolved intent, building it on a miss.
+
+    `build()` returns (answer, cacheable); answers built from an empty
+    result are not cached since the database may still be filling up.
+    """
+    answer = chat_response_cache.get(key)
+    if answer is not MISSING:
+        return answer
+    answer, cacheable = build()
+    if cacheable:
+        chat_response_cache.set(key, answer)
+    return answer
+
+def answer_top_movies(limit: int = 5):
+    movies = get_movies_from_chart("top_250", limit=limit)
+    if not movies:
+        return "Couldn't find top movies. The database might be updating. Please try again in a moment.", False
+    return f"IMDB Top 5 Movies:\n\n" + format_movie_list(movies) + "\n\nAsk for more details about any movie!", True
+
+def answer_popular_movies(limit: int = 5):
+    movies = get_movies_from_chart("popular", limit=limit)
+    if not movies:
+        movies = get_movies_from_chart("trending", limit=limit)
+    if not movies:
+        return "Couldn't find popular movies. The database might be updating. Please try again in a moment.", False
+    return f"Popular Movies Right Now:\n\n" + format_movie_list(movies), True
+
+def answer_genre_movies(genre: str, limit: int = 5):
+    movies = get_movies_by_genre(genre, limit=limit)
+    if not movies:
+        return f"Couldn't find any {genre} movies. Try another genre or check back later.", False
+    return f"Top {genre.capitalize()} Movies:\n\n" + format_movie_list(movies), True
+
+def answer_latest_movies(limit: int = 5):
+    movies = get_latest_movies(limit=limit)
+    if not movies:
+        return "Couldn't find recent movies. The database might be updating. Please try again in a moment.", False
+    return f"Recently Added Movies:\n\n" + format_movie_list(movies), True
+
 def process_chat_message(message: str) -> str:
     """Handle user queries about movies."""
     # Initialize database check flag if not exists
@@ -178,17 +222,19 @@ def process_chat_message(message: str) -> str:
         if not is_database_populated():
             # Start async scraping if empty
             import threading
+            from .scraper import scrape_imdb_movies
             threading.Thread(target=scrape_imdb_movies).start()
             return "Loading movie database for the first time (this may take 2-3 minutes)..."
     
-    message_lower = message.lower().strip()
+    # One pass over the message finds every intent keyword
+    matches = classify(message)
     
     # Greetings
-    if any(word in message_lower for word in ["hello", "hi", "hey"]):
+    if best_intent(matches, 'greeting'):
         return "Hello! I'm your movie bot. Ask me about movies, actors, or get recommendations!"
     
     # Help command
-    if any(word in message_lower for word in ["help", "what can you do", "options"]):
+    if best_intent(matches, 'help'):
         return (
             "**How I can help you**:\n\n"
             "• **Search movies**: 'Tell me about The Dark Knight'\n"
@@ -199,54 +245,29 @@ def process_chat_message(message: str) -> str:
             "Try asking me anything about movies!"
         )
     
-    # Exact title match
-    if len(message.split()) > 1:  # Only search for titles if message has multiple words
+    # Exact title match, skipped when the message is nothing but intent
+    # keywords and filler ("show me horror movies")
+    if len(message.split()) > 1 and (not matches or has_title_words(message, matches)):
         movie = search_movie_by_title(message.strip()) or fuzzy_search_movie(message.strip())
         if movie:
             return format_movie_response(movie)
     
-    # Chart-specific queries
-    if any(term in message_lower for term in ["top 250", "top movies", "best movies"]):
-        movies = get_movies_from_chart("top_250", limit=5)
-        if not movies:
-            return "Couldn't find top movies. The database might be updating. Please try again in a moment."
-        return f"IMDB Top 5 Movies:\n\n" + format_movie_list(movies) + "\n\nAsk for more details about any movie!"
+    intent = best_intent(matches, 'chart', 'genre', 'latest')
     
-    if any(term in message_lower for term in ["popular", "trending", "what's hot"]):
-        movies = get_movies_from_chart("popular", limit=5)
-        if not movies:
-            movies = get_movies_from_chart("trending", limit=5)
-        if not movies:
-            return "Couldn't find popular movies. The database might be updating. Please try again in a moment."
-        return f"Popular Movies Right Now:\n\n" + format_movie_list(movies)
+    # Chart-specific queries
+    if intent and intent.intent == 'chart':
+        if intent.value == 'top_250':
+            return cached_chat_answer(('chart', 'top_250', 5), lambda: answer_top_movies(5))
+        return cached_chat_answer(('chart', 'popular', 5), lambda: answer_popular_movies(5))
     
     # Genre queries
-    genre_map = {
-        "horror": ["horror", "scary", "frightening", "terrifying"],
-        "action": ["action", "fight", "battle", "explosion"],
-        "adventure": ["adventure", "expedition", "journey", "quest"],
-        "comedy": ["comedy", "funny", "humor", "hilarious"],
-        "drama": ["drama", "emotional", "serious"],
-        "sci-fi": ["sci-fi", "science fiction", "space", "future", "alien"],
-        "romance": ["romance", "romantic", "love story", "rom com"],
-        "thriller": ["thriller", "suspense", "mystery", "crime"],
-        "animation": ["animation", "animated", "cartoon"],
-        "fantasy": ["fantasy", "magic", "sword", "dragon"]
-    }
-    
-    for genre, keywords in genre_map.items():
-        if any(kw in message_lower for kw in keywords):
-            movies = get_movies_by_genre(genre, limit=5)
-            if not movies:
-                return f"Couldn't find any {genre} movies. Try another genre or check back later."
-            return f"Top {genre.capitalize()} Movies:\n\n" + format_movie_list(movies)
+    if intent and intent.intent == 'genre':
+        genre = intent.value
+        return cached_chat_answer(('genre', genre, 5), lambda: answer_genre_movies(genre, 5))
     
     # Latest movies
-    if any(word in message_lower for word in ["new", "latest", "recent", "just added"]):
-        movies = get_latest_movies(limit=5)
-        if not movies:
-            return "Couldn't find recent movies. The database might be updating. Please try again in a moment."
-        return f"Recently Added Movies:\n\n" + format_movie_list(movies)
+    if intent and intent.intent == 'latest':
+        return cached_chat_answer(('latest', 5), lambda: answer_latest_movies(5))
     
     # If we got here, we didn't understand the query
     return (
@@ -0,0 +1,5 @@
+"""
+Benchmark scripts. Run from the movie_chatbot directory, e.g.:
+
+    python -m benchmarks.bench_title_index
+"""
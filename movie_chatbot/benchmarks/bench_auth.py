@@ -0,0 +1,69 @@
+"""
+Authenticated request throughput with and without the auth principal cache.
+
+Creates a throwaway SQLite user database, issues a token for an admin user
+and sends --requests authenticated requests to a one-route app guarded by
+auth.get_admin_user, first with the cache disabled (TTL 0) and then enabled.
+Also times the get_current_user dependency on its own, which is where the
+JWT decode and the user query happen.
+
+    python -m benchmarks.bench_auth [--requests 2000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench_auth.db')}"
+
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+
+    from app import auth, database, models
+    from benchmarks.common import print_row, summarize, time_calls
+
+    database.init_db()
+    db = database.SessionLocal()
+    db.add(models.User(username="bench@example.com", email="bench@example.com",
+                       hashed_password="unused", is_active=True, is_admin=True))
+    db.commit()
+    token = auth.create_access_token({"sub": "bench@example.com"})
+
+    app = FastAPI()
+
+    @app.get("/whoami")
+    def whoami(user=Depends(auth.get_admin_user)):
+        return {"username": user.username}
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+    ttl = auth.auth_cache.ttl_seconds
+
+    for label, ttl_seconds in [("no cache", 0), (f"cache (ttl {ttl}s)", ttl)]:
+        auth.auth_cache.ttl_seconds = ttl_seconds
+        auth.invalidate_auth_cache()
+
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            assert client.get("/whoami", headers=headers).status_code == 200
+        elapsed = time.perf_counter() - start
+        print(f"{label:<20} {args.requests / elapsed:>10,.0f} req/s")
+
+        latencies = time_calls(auth.get_current_user, [(token, db)] * args.requests)
+        print_row("  get_current_user", summarize(latencies))
+
+    print(f"auth cache: {auth.auth_cache.stats()}")
+    db.close()
+    database.engine.dispose()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
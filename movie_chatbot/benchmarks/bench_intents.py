@@ -0,0 +1,105 @@
+"""
+Chat intent classification throughput.
+
+Classifies a corpus of sample chat messages with the old substring cascade
+and with the compiled intent router, then runs the whole corpus through
+process_chat_message() against a mongomock collection. Reports messages/sec.
+
+    python -m benchmarks.bench_intents [--messages 20000] [--titles 2000]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import make_titles
+
+TEMPLATES = [
+    "hi", "hello there", "hey bot", "help", "what can you do?",
+    "show top movies", "IMDB top 250", "best movies of all time",
+    "what's popular?", "trending movies", "what's hot right now",
+    "show me {genre} movies", "any good {genre} films?", "I want something {genre}",
+    "what's new?", "latest movies", "anything recent", "just added",
+    "tell me about {title}", "{title}", "{title} please", "gibberish query here",
+]
+GENRE_WORDS = ["horror", "scary", "action", "funny", "sci-fi", "romantic", "thriller", "cartoon", "magic"]
+
+# The keyword cascade process_chat_message used before the router
+LEGACY_CASCADE = [
+    ("greeting", ["hello", "hi", "hey"]),
+    ("help", ["help", "what can you do", "options"]),
+    ("top", ["top 250", "top movies", "best movies"]),
+    ("popular", ["popular", "trending", "what's hot"]),
+    ("horror", ["horror", "scary", "frightening", "terrifying"]),
+    ("action", ["action", "fight", "battle", "explosion"]),
+    ("adventure", ["adventure", "expedition", "journey", "quest"]),
+    ("comedy", ["comedy", "funny", "humor", "hilarious"]),
+    ("drama", ["drama", "emotional", "serious"]),
+    ("sci-fi", ["sci-fi", "science fiction", "space", "future", "alien"]),
+    ("romance", ["romance", "romantic", "love story", "rom com"]),
+    ("thriller", ["thriller", "suspense", "mystery", "crime"]),
+    ("animation", ["animation", "animated", "cartoon"]),
+    ("fantasy", ["fantasy", "magic", "sword", "dragon"]),
+    ("latest", ["new", "latest", "recent", "just added"]),
+]
+
+
+def legacy_classify(message: str):
+    message_lower = message.lower().strip()
+    for intent, keywords in LEGACY_CASCADE:
+        if any(kw in message_lower for kw in keywords):
+            return intent
+    return None
+
+
+def make_corpus(count: int, titles, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(genre=rng.choice(GENRE_WORDS), title=rng.choice(titles))
+        for _ in range(count)
+    ]
+
+
+def throughput(label: str, func, corpus) -> None:
+    start = time.perf_counter()
+    for message in corpus:
+        func(message)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {len(corpus) / elapsed:>12,.0f} msg/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--titles", type=int, default=2000)
+    args = parser.parse_args()
+
+    titles = make_titles(args.titles)
+    corpus = make_corpus(args.messages, titles)
+
+    from app.intents import classify, best_intent
+
+    throughput("legacy substring cascade", legacy_classify, corpus)
+    throughput("compiled intent router", lambda m: best_intent(classify(m)), corpus)
+
+    import mongomock
+    from app import database, utils
+
+    client = mongomock.MongoClient()
+    database.mongo_client = client
+    database.mongo_db = client["movie_chatbot"]
+    database.movies_collection = database.mongo_db["movies"]
+    from app.normalize import normalize_movie
+    database.movies_collection.insert_many([
+        normalize_movie({"title": title, "year": "2000", "rating": "7.0", "genres": ["horror", "action"],
+                         "chart_types": ["top_250", "popular"], "url": "", "scraped_at": i})
+        for i, title in enumerate(titles)
+    ])
+    utils.process_chat_message._db_checked = True
+
+    sample = corpus[:max(1, args.messages // 20)]
+    throughput("process_chat_message (mongomock)", utils.process_chat_message, sample)
+    print(f"chat cache: {utils.chat_response_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
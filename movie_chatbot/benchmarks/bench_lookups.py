@@ -0,0 +1,131 @@
+"""
+Title and genre lookup latency.
+
+Seeds a scratch database with synthetic movies (normalized the way the
+scrapers write them), applies the index registry, then times the old
+case-insensitive regex lookups against the stored title_key/genre_keys
+equality and prefix lookups. Reports p50/p99 and the winning plan of each.
+
+The numbers only mean something against a real mongod; --mongomock runs the
+same queries in-process as a smoke test. The scratch database is dropped
+afterwards.
+
+    python -m benchmarks.bench_lookups [--mongodb-url mongodb://localhost:27017/] [--docs 100000]
+"""
+import argparse
+import random
+import re
+
+from benchmarks.common import make_titles, print_row, summarize, time_calls
+
+GENRES = ["action", "adventure", "animation", "comedy", "crime", "drama", "fantasy",
+          "horror", "mystery", "romance", "sci-fi", "thriller", "war", "western"]
+
+
+def seed(collection, count: int) -> list:
+    from app.normalize import normalize_movie
+
+    titles = make_titles(count)
+    rng = random.Random(3)
+    batch = []
+    for i, title in enumerate(titles):
+        batch.append(normalize_movie({
+            "imdb_id": f"tt{i:07d}",
+            "title": title,
+            "year": rng.randint(1950, 2026),
+            "rating": round(rng.uniform(1, 10), 1),
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+        }))
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+    return titles
+
+
+def lookups(collection, titles, queries: int):
+    from app.normalize import genre_prefix_query, genre_query, normalize_title
+
+    rng = random.Random(5)
+    # Mixed-case input, as users type it
+    sample_titles = [rng.choice(titles).swapcase() for _ in range(queries)]
+    sample_genres = [rng.choice(GENRES).upper() for _ in range(queries)]
+    sample_prefixes = [rng.choice(GENRES)[:3] for _ in range(queries)]
+
+    def by_genre(query):
+        return lambda: list(collection.find(query).sort("rating", -1).limit(5))
+
+    return [
+        ("title regex /^...$/i", [
+            (lambda t=t: collection.find_one({"title": {"$regex": f"^{re.escape(t)}$", "$options": "i"}}),)
+            for t in sample_titles]),
+        ("title_key equality", [
+            (lambda t=t: collection.find_one({"title_key": normalize_title(t)}),)
+            for t in sample_titles]),
+        ("genre regex /.../i", [
+            (by_genre({"genres": {"$regex": re.escape(g), "$options": "i"}}),)
+            for g in sample_genres]),
+        ("genre_keys equality", [
+            (by_genre(genre_query(g)),)
+            for g in sample_genres]),
+        ("genre regex /.../i (partial)", [
+            (by_genre({"genres": {"$regex": re.escape(p), "$options": "i"}}),)
+            for p in sample_prefixes]),
+        ("genre_keys prefix /^.../", [
+            (by_genre(genre_prefix_query(p)),)
+            for p in sample_prefixes]),
+    ]
+
+
+def plan(query) -> str:
+    from app.indexes import _plan_stages
+
+    planner = query.explain().get('queryPlanner', {})
+    winning = planner.get('winningPlan', {})
+    return ' <- '.join(_plan_stages(winning.get('queryPlan', winning))) if winning else 'n/a'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017/")
+    parser.add_argument("--mongomock", action="store_true", help="Run in-process (smoke test only)")
+    parser.add_argument("--db", default="movie_chatbot_bench")
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongodb_url)
+    client.drop_database(args.db)
+    collection = client[args.db]["movies"]
+
+    try:
+        from app.indexes import apply_indexes
+
+        titles = seed(collection, args.docs)
+        apply_indexes(collection)
+        print(f"{collection.count_documents({})} documents")
+
+        for label, calls in lookups(collection, titles, args.queries):
+            print_row(label, summarize(time_calls(lambda call: call(), calls)))
+
+        if not args.mongomock:
+            print()
+            for label, query in [
+                ("title regex /^...$/i", collection.find({"title": {"$regex": "^the dark knight$", "$options": "i"}})),
+                ("title_key equality", collection.find({"title_key": "the dark knight"})),
+                ("genre regex /.../i", collection.find({"genres": {"$regex": "hor", "$options": "i"}}).sort("rating", -1)),
+                ("genre_keys prefix /^.../", collection.find({"genre_keys": {"$regex": "^hor"}}).sort("rating", -1)),
+            ]:
+                print(f"{label:<32} {plan(query)}")
+    finally:
+        client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
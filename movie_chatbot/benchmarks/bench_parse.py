@@ -0,0 +1,70 @@
+"""
+Per-page parse cost of IMDb title pages for each extraction strategy.
+
+Compares the CSS-selector path on each BeautifulSoup tree builder with the
+embedded JSON-LD path, reporting latency percentiles and peak Python memory
+(tracemalloc) per page. Uses synthetic pages unless --pages points at a
+directory of saved title pages (*.html, searched recursively).
+
+    python -m benchmarks.bench_parse [--pages DIR] [--count 50] [--filler-kb 500]
+"""
+import argparse
+import glob
+import os
+import tracemalloc
+
+from benchmarks.common import print_row, summarize, time_calls
+from benchmarks.fixtures import make_movies, render_title_page
+
+
+def load_pages(directory: str):
+    paths = glob.glob(os.path.join(directory, "**", "*.html"), recursive=True)
+    pages = []
+    for path in sorted(paths):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+def peak_kb(func, page) -> float:
+    tracemalloc.start()
+    func(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", help="Directory of saved title pages")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--filler-kb", type=int, default=500)
+    args = parser.parse_args()
+
+    from app.page_parser import extract_movie_fields
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        pages = [render_title_page(movie, args.filler_kb) for movie in make_movies(args.count)]
+    if not pages:
+        raise SystemExit("No pages to parse")
+    avg_kb = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {avg_kb:.0f} KB average\n")
+
+    strategies = {"selectors/html.parser": lambda page: extract_movie_fields(page, False, "html.parser")}
+    try:
+        import lxml  # noqa: F401
+        strategies["selectors/lxml"] = lambda page: extract_movie_fields(page, False, "lxml")
+    except ImportError:
+        print("lxml not installed, skipping the lxml tree builder")
+    strategies["structured (JSON-LD)"] = lambda page: extract_movie_fields(page)
+
+    for label, func in strategies.items():
+        stats = summarize(time_calls(func, [(page,) for page in pages]))
+        stats["peak_kb"] = max(peak_kb(func, page) for page in pages[:5])
+        print_row(label, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+End-to-end scrape of a local fixture site into mongomock.
+
+Generates a synthetic IMDb site, serves it with simulated network latency and
+runs scrape_imdb_movies() against it. Reports wall time, pages requested and
+documents stored.
+
+    python -m benchmarks.bench_scrape_pipeline [--titles 300] [--latency-ms 150]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fixture_server import start_fixture_server
+from benchmarks.fixtures import write_imdb_site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--rate", default="20", help="SCRAPER_RATE_PER_SECOND")
+    parser.add_argument("--workers", default="8", help="SCRAPER_MAX_WORKERS")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="imdb-fixtures-")
+    write_imdb_site(root, args.titles)
+    server, base_url = start_fixture_server(root, args.latency_ms)
+
+    # Configuration is read at import time, so set it before importing app
+    os.environ["IMDB_BASE_URL"] = base_url
+    os.environ["SCRAPER_RATE_PER_SECOND"] = args.rate
+    os.environ["SCRAPER_BURST"] = args.rate
+    os.environ["SCRAPER_MAX_WORKERS"] = args.workers
+    os.environ["SCRAPER_MAX_PER_HOST"] = args.workers
+
+    import mongomock
+    from app import database
+    from app.scraper import scrape_imdb_movies
+
+    client = mongomock.MongoClient()
+    database.mongo_client = client
+    database.mongo_db = client["movie_chatbot"]
+    database.movies_collection = database.mongo_db["movies"]
+
+    start = time.perf_counter()
+    scrape_imdb_movies()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    print(f"\nscrape_imdb_movies: {elapsed:.1f}s, {server.requests_served} pages requested, "
+          f"{database.movies_collection.count_documents({})} documents stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Fuzzy title lookup latency: trigram index vs. full-list extractOne.
+
+    python -m benchmarks.bench_title_index [--queries 200] [--baseline-queries 20]
+"""
+import argparse
+import random
+
+from fuzzywuzzy import process
+
+from app.title_index import TitleIndex
+from benchmarks.common import make_titles, print_row, summarize, time_calls
+
+
+def make_queries(titles, count, seed=7):
+    """Mix of chatty wrappers, typos and misses, like real chat messages."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        title = rng.choice(titles)
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(f"tell me about {title.lower()}")
+        elif kind < 0.7:
+            pos = rng.randrange(len(title))
+            queries.append(title[:pos] + title[pos + 1:])
+        elif kind < 0.9:
+            queries.append(title)
+        else:
+            queries.append("what should i watch tonight")
+    return queries
+
+
+def legacy_search(titles, query, threshold=80):
+    best_match = process.extractOne(query, titles)
+    if best_match and best_match[1] >= threshold:
+        return best_match[0]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--baseline-queries", type=int, default=20,
+                        help="full scans are slow; 0 skips the baseline")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        titles = make_titles(size)
+        queries = make_queries(titles, args.queries)
+
+        index = TitleIndex()
+        build_ms = time_calls(index.build, [(titles,)])[0]
+        print(f"\n{size} titles (index build {build_ms:.0f} ms)")
+
+        print_row("trigram index", summarize(time_calls(index.search, [(q,) for q in queries])))
+        if args.baseline_queries:
+            sample = [(titles, q) for q in queries[:args.baseline_queries]]
+            print_row("full extractOne", summarize(time_calls(legacy_search, sample)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Parse time of an IMDb calendar page with and without scraper diagnostics.
+
+"diagnostics" reproduces the old behaviour: the calendar HTML of every
+section and item is serialized and logged (here to an in-memory stream).
+"quiet" is the default, where that work is skipped. Uses a synthetic
+calendar unless --page points at a saved calendar page.
+
+    python -m benchmarks.bench_upcoming_parse [--page FILE] [--count 400] [--runs 20]
+"""
+import argparse
+import io
+import logging
+
+from benchmarks.common import print_row, summarize, time_calls
+from benchmarks.fixtures import make_movies, render_calendar_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page", help="Saved IMDb calendar page")
+    parser.add_argument("--count", type=int, default=400, help="Movies on the synthetic page")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    from app.scrapers import upcoming_movies_scraper as scraper
+
+    if args.page:
+        with open(args.page, encoding="utf-8") as f:
+            html = f.read()
+    else:
+        html = render_calendar_page(make_movies(args.count))
+    movies, summary = scraper.parse_calendar(html)
+    print(f"{len(html) // 1024} KB page, {summary['dates']} dates, {len(movies)} movies\n")
+
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    scraper.logger.addHandler(handler)
+    scraper.logger.propagate = False
+
+    for label, diagnostics in [("quiet", False), ("diagnostics", True)]:
+        scraper.SCRAPER_DIAGNOSTICS = diagnostics
+        scraper.logger.setLevel(logging.DEBUG if diagnostics else logging.INFO)
+        stream.seek(0)
+        stream.truncate()
+        stats = summarize(time_calls(scraper.parse_calendar, [(html,)] * args.runs))
+        stats["log_kb"] = len(stream.getvalue()) / 1024 / args.runs
+        print_row(label, stats)
+
+
+if __name__ == "__main__":
+    main()
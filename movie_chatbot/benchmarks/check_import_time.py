@@ -0,0 +1,108 @@
+"""
+Cold-import profile of app.main.
+
+Imports app.main in fresh interpreters under `python -X importtime` and
+reports the slowest app modules. The budget is relative: app.main may take
+at most MAX_RATIO times as long as importing the frameworks it cannot do
+without (BASELINE_IMPORTS), measured the same way on the same machine. The
+pass/fail checks run under pytest in tests/test_import_time.py; this script
+prints the numbers behind them:
+
+    python -m benchmarks.check_import_time [--runs 3] [--max-ratio 1.6]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by scrapes, the scheduler, fuzzy fallback or PNG reports
+DEFERRED_MODULES = [
+    "apscheduler", "bs4", "lxml", "requests", "fuzzywuzzy", "matplotlib", "pandas",
+    "app.scraper", "app.scheduler", "app.scrapers.upcoming_movies_scraper",
+]
+
+# What app.main has to import whatever the app does at startup
+BASELINE_IMPORTS = (
+    "import fastapi, fastapi.templating, fastapi.staticfiles, fastapi.security, "
+    "pymongo, sqlalchemy.orm, jose.jwt, passlib.context, jinja2, dotenv"
+)
+
+# app.main on top of the baseline measured about 1.2-1.35x; this leaves
+# room for machine noise but not for a newly eager heavy import
+MAX_RATIO = 1.6
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def import_profile(code: str, db_path: str):
+    """Run `code` in a cold interpreter.
+
+    Returns ({module: cumulative_us}, total_ms), where the total adds up the
+    top-level imports.
+    """
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{code} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+            if len(match.group(3)) == 1:
+                total_us += int(match.group(2))
+    return modules, total_us / 1000
+
+
+def best_import_ms(code: str, db_path: str, runs: int = 3) -> float:
+    return min(import_profile(code, db_path)[1] for _ in range(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-ratio", type=float, default=MAX_RATIO)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "import_check.db")
+        baseline = best_import_ms(BASELINE_IMPORTS, db_path, args.runs)
+        timings = []
+        for _ in range(args.runs):
+            modules, total = import_profile("import app.main", db_path)
+            timings.append(total)
+
+        deferred = [name for name in DEFERRED_MODULES if name in modules]
+        if deferred:
+            failures.append(f"imported at startup: {', '.join(deferred)}")
+        if os.path.exists(db_path):
+            failures.append("importing app.main created or opened the SQL database")
+
+    best = min(timings)
+    budget = baseline * args.max_ratio
+    print(f"app.main cold import: best {best:.0f} ms of {args.runs} runs "
+          f"(baseline {baseline:.0f} ms, budget {budget:.0f} ms = {args.max_ratio:g}x)")
+    top = sorted(((us, name) for name, us in modules.items() if name.startswith("app.")), reverse=True)[:8]
+    for us, name in top:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if best > budget:
+        failures.append(f"{best:.0f} ms is over the {budget:.0f} ms budget")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
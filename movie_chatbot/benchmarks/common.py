@@ -0,0 +1,60 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import random
+import time
+from typing import Callable, Dict, Iterable, List
+
+WORDS = [
+    "dark", "knight", "return", "king", "shadow", "city", "love", "story", "last",
+    "night", "star", "war", "lost", "world", "man", "woman", "great", "escape",
+    "blade", "runner", "silent", "river", "fire", "ice", "dead", "alive", "ghost",
+    "house", "secret", "garden", "iron", "storm", "red", "blue", "green", "mile",
+    "road", "dream", "empire", "strikes", "back", "rising", "fall", "golden", "age",
+    "wild", "heart", "lady", "bird", "little", "women", "big", "short", "hunt",
+]
+
+
+def make_titles(count: int, seed: int = 42) -> List[str]:
+    """Generate `count` distinct synthetic movie titles."""
+    rng = random.Random(seed)
+    titles = set()
+    while len(titles) < count:
+        words = rng.sample(WORDS, rng.randint(1, 4))
+        title = " ".join(words).title()
+        if rng.random() < 0.3:
+            title = f"The {title}"
+        if rng.random() < 0.2:
+            title = f"{title} {rng.randint(2, 5)}"
+        titles.add(title)
+    return sorted(titles)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def time_calls(func: Callable, args_list: Iterable) -> List[float]:
+    """Call `func(*args)` for each args tuple and return latencies in ms."""
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+    }
+
+
+def print_row(label: str, stats: Dict[str, float]) -> None:
+    values = "  ".join(f"{key}={value:9.3f}" for key, value in stats.items())
+    print(f"{label:<32} {values}")
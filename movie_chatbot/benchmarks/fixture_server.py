@@ -0,0 +1,84 @@
+"""
+Local HTTP server that serves saved (or generated) IMDb pages.
+
+Request paths map to `<root>/<path>/index.html`. The query parameters IMDb
+uses to select a page are folded into the path, so
+`/search/title/?genres=action&...` is served from `search/title/action/` and
+`/calendar/?region=US&type=MOVIE` from `calendar/US/MOVIE/`. Other query strings are ignored.
+
+    python -m benchmarks.fixture_server --generate 300 --latency-ms 150
+
+then run the scrapers with IMDB_BASE_URL=http://127.0.0.1:<port>.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Query parameters that select a distinct page, in path order
+PAGE_SELECTORS = ('genres', 'region', 'type')
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    latency_s = 0.0
+
+    def translate_path(self, path):
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        segments = [parts.path.rstrip('/')]
+        segments.extend(query[key][0] for key in PAGE_SELECTORS if key in query)
+        return super().translate_path('/'.join(segments) + '/')
+
+    def do_GET(self):
+        with self.server.stats_lock:
+            self.server.requests_served += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(root: str, latency_ms: float = 0, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve `root` on a daemon thread; returns the server and its base URL."""
+    handler = type("Handler", (FixtureHandler,), {"latency_s": latency_ms / 1000.0})
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(handler, directory=root))
+    server.requests_served = 0
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", help="directory of saved pages")
+    parser.add_argument("--generate", type=int, default=0, help="generate N synthetic titles instead")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    root = args.root
+    if args.generate:
+        from benchmarks.fixtures import write_imdb_site
+        root = root or tempfile.mkdtemp(prefix="imdb-fixtures-")
+        write_imdb_site(root, args.generate)
+    if not root or not os.path.isdir(root):
+        parser.error("pass --root or --generate")
+
+    server, base_url = start_fixture_server(root, args.latency_ms, args.port)
+    print(f"Serving {root} at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
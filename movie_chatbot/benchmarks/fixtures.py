@@ -0,0 +1,168 @@
+"""
+Synthetic IMDb-like pages for exercising the scrapers offline.
+
+The markup mirrors the selectors the scrapers rely on (chart list items,
+hero title, rating bar, genre chips, release-date details, cast, JSON-LD).
+Saved real pages can be dropped into the same layout instead; see
+benchmarks/fixture_server.py for how request paths map to files.
+"""
+import json
+import os
+import random
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.common import WORDS, make_titles
+
+CHART_PATHS = {
+    'top_250': 'chart/top',
+    'popular': 'chart/moviemeter',
+    'action': 'search/title/action',
+    'comedy': 'search/title/comedy',
+    'horror': 'search/title/horror',
+}
+GENRES = ['Action', 'Comedy', 'Horror', 'Drama', 'Thriller', 'Adventure', 'Sci-Fi', 'Romance']
+
+CHART_ITEM = """
+<li class="ipc-metadata-list-summary-item">
+  <div class="ipc-title"><a href="/title/{imdb_id}/?ref_=chttp_t_{rank}" class="ipc-title-link-wrapper">
+    <h3 class="ipc-title__text">{rank}. {title}</h3></a></div>
+  <span class="sc-chart-meta">{year}</span><span class="ipc-rating-star">{rating}</span>
+</li>"""
+
+TITLE_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><title>{title} ({year}) - IMDb</title>
+<script type="application/ld+json">{json_ld}</script>
+</head><body>
+<nav>{filler}</nav>
+<section class="hero">
+  <h1 data-testid="hero__pageTitle"><span class="hero__primary-text">{title}</span></h1>
+  <ul><li><a href="/title/{imdb_id}/releaseinfo?ref_=tt_ov_rdat">{year}</a></li></ul>
+  <div data-testid="hero-rating-bar__aggregate-rating__score"><span>{rating}</span><span>/10</span></div>
+  <img data-testid="hero-media__poster" class="ipc-image" src="https://m.media-amazon.com/images/{imdb_id}.jpg">
+  <div class="ipc-chip-list">{genre_links}</div>
+  <p><span data-testid="plot-xl">{plot}</span><span data-testid="plot-l">{plot}</span></p>
+  <ul><li><a href="/name/nm{director_id}/?ref_=tt_ov_dr">{director}</a></li></ul>
+</section>
+<section data-testid="title-cast">{cast_links}</section>
+<section data-testid="title-details-section"><ul>
+  <li data-testid="title-details-releasedate"><a href="/title/{imdb_id}/releaseinfo">{release_date}</a></li>
+</ul></section>
+<footer>{filler}</footer>
+</body></html>
+"""
+
+CALENDAR_SECTION = """
+<section class="ipc-page-section">
+  <div class="ipc-title"><h3 class="ipc-title__text">{date}</h3></div>
+  <ul class="ipc-metadata-list">{items}</ul>
+</section>"""
+
+CALENDAR_ITEM = """
+<li class="ipc-metadata-list-summary-item">
+  <div class="ipc-metadata-list-summary-item__c">
+    <a class="ipc-metadata-list-summary-item__t" href="/title/{imdb_id}/?ref_=rlm">{title} ({year})</a>
+    <ul class="ipc-inline-list"><li>{genre}</li></ul>
+  </div>
+</li>"""
+
+
+def _write(root: str, path: str, html: str) -> None:
+    directory = os.path.join(root, path)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "index.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def make_movies(count: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    movies = []
+    for i, title in enumerate(make_titles(count, seed)):
+        year = rng.randint(1950, 2026)
+        movies.append({
+            "imdb_id": f"tt{1000000 + i:07d}",
+            "title": title,
+            "year": year,
+            "rating": f"{rng.uniform(3, 9.5):.1f}",
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "plot": " ".join(rng.choice(WORDS) for _ in range(40)).capitalize() + ".",
+            "director": " ".join(rng.sample(WORDS, 2)).title(),
+            "cast": [" ".join(rng.sample(WORDS, 2)).title() for _ in range(12)],
+            "release_date": f"{rng.choice(['January', 'March', 'June', 'October'])} {rng.randint(1, 28)}, {year}",
+        })
+    return movies
+
+
+def render_title_page(movie: Dict, filler_kb: int = 200) -> str:
+    """Title pages are padded to roughly the size of real ones (~0.5-1 MB)."""
+    filler = "".join(
+        f'<div class="sc-filler-{i}"><a href="/list/ls{i:06d}/">Related list {i}</a></div>'
+        for i in range(filler_kb * 1024 // 120)
+    )
+    json_ld = json.dumps({
+        "@context": "https://schema.org",
+        "@type": "Movie",
+        "url": f"/title/{movie['imdb_id']}/",
+        "name": movie["title"],
+        "description": movie["plot"],
+        "genre": movie["genres"],
+        "datePublished": datetime.strptime(movie["release_date"], "%B %d, %Y").strftime("%Y-%m-%d"),
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": float(movie["rating"])},
+        "director": [{"@type": "Person", "name": movie["director"]}],
+        "actor": [{"@type": "Person", "name": name} for name in movie["cast"]],
+        "image": f"https://m.media-amazon.com/images/{movie['imdb_id']}.jpg",
+    })
+    return TITLE_PAGE.format(
+        json_ld=json_ld,
+        filler=filler,
+        genre_links="".join(
+            f'<a class="ipc-chip" href="/search/title/?genres={g.lower()}"><span>{g}</span></a>'
+            for g in movie["genres"]
+        ),
+        cast_links="".join(
+            f'<a data-testid="title-cast-item__actor" href="/name/nm{i:07d}/">{name}</a>'
+            for i, name in enumerate(movie["cast"])
+        ),
+        director_id=movie["imdb_id"][2:],
+        **{k: v for k, v in movie.items() if k not in ("genres", "cast")},
+    )
+
+
+def render_chart_page(movies: List[Dict]) -> str:
+    items = "".join(
+        CHART_ITEM.format(rank=rank, **movie) for rank, movie in enumerate(movies, 1)
+    )
+    return f'<html><body><ul class="ipc-metadata-list">{items}</ul></body></html>'
+
+
+def render_calendar_page(movies: List[Dict], per_date: int = 8) -> str:
+    sections = []
+    for start in range(0, len(movies), per_date):
+        group = movies[start:start + per_date]
+        items = "".join(
+            CALENDAR_ITEM.format(genre=movie["genres"][0], **movie) for movie in group
+        )
+        sections.append(CALENDAR_SECTION.format(date=group[0]["release_date"], items=items))
+    return f'<html><body><main>{"".join(sections)}</main></body></html>'
+
+
+def write_imdb_site(root: str, count: int = 300, seed: int = 42, filler_kb: int = 200) -> List[Dict]:
+    """Write chart, title and calendar pages for `count` movies under `root`.
+
+    Charts overlap the way IMDb's do: the popular chart shares titles with
+    the top chart and the genre searches.
+    """
+    rng = random.Random(seed)
+    movies = make_movies(count, seed)
+    for chart_type, path in CHART_PATHS.items():
+        limit = 250 if chart_type == 'top_250' else 100
+        if chart_type in ('action', 'comedy', 'horror'):
+            pool = [m for m in movies if chart_type.title() in m["genres"]] or movies
+        else:
+            pool = movies
+        chart_movies = rng.sample(pool, min(limit, len(pool)))
+        _write(root, path, render_chart_page(chart_movies))
+    for movie in movies:
+        _write(root, f"title/{movie['imdb_id']}", render_title_page(movie, filler_kb))
+    _write(root, "calendar/US/MOVIE", render_calendar_page(movies[:80]))
+    return movies
@@ -0,0 +1,123 @@
+"""
+Concurrency load test for the async repository layer.
+
+Fires N concurrent chart/latest queries from one event loop and reports
+throughput. "blocking" calls the sync utils functions straight from the
+coroutine (the old route behaviour); "repository" awaits the executor-backed
+wrappers.
+
+By default a mongomock collection stands in for MongoDB, with --latency-ms of
+simulated round-trip added to every query so the effect of overlapping I/O is
+visible. mongomock itself runs in-process under the GIL, so keep the seeded
+collection small; pass --mongodb-url to run against a real mongod instead.
+
+    python -m benchmarks.load_repository [--mongodb-url mongodb://localhost:27017/]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app import database, repository, utils
+
+
+class SlowCollection:
+    """Wrap a collection and sleep before each query to mimic network latency."""
+
+    def __init__(self, collection, latency_s):
+        self._collection = collection
+        self._latency_s = latency_s
+
+    def find(self, *args, **kwargs):
+        time.sleep(self._latency_s)
+        return self._collection.find(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+def install_collection(args):
+    """Point database.get_mongo_client() at the benchmark collection."""
+    if args.mongodb_url:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongodb_url)
+        collection = client[args.db]["movies"]
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+        collection = client[args.db]["movies"]
+    collection.delete_many({})
+    charts = ["top_250", "popular", "trending", "action", "comedy", "horror"]
+    rng = random.Random(1)
+    collection.insert_many([
+        {
+            "imdb_id": f"tt{i:07d}",
+            "title": f"Movie {i}",
+            "year": str(rng.randint(1950, 2026)),
+            "rating": f"{rng.uniform(1, 10):.1f}",
+            "genres": [rng.choice(charts[3:])],
+            "chart_types": [rng.choice(charts)],
+            "scraped_at": i,
+        }
+        for i in range(args.documents)
+    ])
+    if not args.mongodb_url and args.latency_ms:
+        collection = SlowCollection(collection, args.latency_ms / 1000.0)
+
+    database.mongo_client = client
+    database.mongo_db = client[args.db]
+    database.movies_collection = collection
+
+
+def one_request_blocking(i):
+    if i % 2:
+        return utils.get_movies_from_chart("popular", limit=5)
+    return utils.get_latest_movies(limit=5)
+
+
+async def one_request_async(i):
+    if i % 2:
+        return await repository.get_movies_from_chart("popular", limit=5)
+    return await repository.get_latest_movies(limit=5)
+
+
+async def blocking_handler(i):
+    return one_request_blocking(i)
+
+
+async def run_level(handler, concurrency, total):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def guarded(i):
+        async with semaphore:
+            await handler(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(guarded(i) for i in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main_async(args):
+    print(f"{'concurrency':>11}  {'blocking req/s':>15}  {'repository req/s':>17}")
+    for concurrency in args.concurrency:
+        blocking = await run_level(blocking_handler, concurrency, args.requests)
+        async_rps = await run_level(one_request_async, concurrency, args.requests)
+        print(f"{concurrency:>11}  {blocking:>15.1f}  {async_rps:>17.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mongodb-url", default=None)
+    parser.add_argument("--db", default="movie_chatbot_bench")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    install_collection(args)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Cold-import regression checks for app.main.
+
+Each import runs in a fresh interpreter under `python -X importtime`, so
+the results do not depend on what the test process has already imported.
+"""
+import pytest
+
+from benchmarks.check_import_time import (
+    BASELINE_IMPORTS,
+    DEFERRED_MODULES,
+    MAX_RATIO,
+    best_import_ms,
+    import_profile,
+)
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    return tmp_path_factory.mktemp("import_time") / "import_check.db"
+
+
+@pytest.fixture(scope="module")
+def modules(db_path):
+    return import_profile("import app.main", str(db_path))[0]
+
+
+def test_deferred_modules_not_imported(modules):
+    assert [name for name in DEFERRED_MODULES if name in modules] == []
+
+
+def test_import_does_not_open_sql_database(modules, db_path):
+    assert not db_path.exists()
+
+
+def test_import_time_within_budget(db_path):
+    baseline = best_import_ms(BASELINE_IMPORTS, str(db_path))
+    app_main = best_import_ms("import app.main", str(db_path))
+    assert app_main <= baseline * MAX_RATIO, (
+        f"app.main took {app_main:.0f} ms, over {MAX_RATIO:g}x the {baseline:.0f} ms framework baseline"
+    )